@@ -0,0 +1 @@
+"""Декларативный граф шагов диалога и движок переходов."""
@@ -0,0 +1,181 @@
+"""Движок диалога: показ шагов, переходы вперёд и назад по графу."""
+
+from aiogram.enums import ParseMode
+from aiogram.fsm.context import FSMContext
+from aiogram.types import InlineKeyboardMarkup, Message, User
+
+from app.bot.flow.graph import CALCULATION, FLOW_BY_STATE, STEPS
+from app.bot.flow.live import adopt_live, show_live, with_notice
+from app.bot.flow.prompt import send_prompt
+from app.bot.flow.progress import get_progress_header
+from app.bot.flow.steps import Flow, Step
+from app.bot.handlers.result import complete_measurement, show_result
+from app.bot.keyboards.generation import next_generation, remember_generation, stamp
+from app.bot.keyboards.inline import get_contact_method_keyboard
+from app.bot.states import CalculationStates
+from app.core.config import settings
+from app.monitoring.tracing import traced
+from app.schemas.session import Session
+from app.services.chat_logger import chat_logger
+from app.templates.messages.texts import WELCOME_MESSAGE
+from app.utils.images import find_image
+
+
+@traced()
+def render_question(step: Step, session: Session) -> str:
+    """Текст вопроса шага с прогресс-баром.
+
+    Args:
+        step: Шаг диалога
+        session: Сессия (нужны тип карниза и выбранные типы освещения)
+
+    Returns:
+        Вопрос, при необходимости с прогресс-баром
+    """
+    if step.progress is None:
+        return step.question
+    header = get_progress_header(step.progress, session)
+    return f"{header}\n\n{step.question}"
+
+
+async def show_welcome(message: Message, state: FSMContext, session: Session, user: User) -> None:
+    """Сбрасывает расчёт и показывает приветствие с выбором способа связи."""
+    session.reset()
+    generation = session.keyboard_generation = next_generation(session.keyboard_generation)
+    remember_generation(user.id, generation)
+    welcome_text = WELCOME_MESSAGE.format(name=user.first_name or "Пользователь")
+    markup = stamp(get_contact_method_keyboard(), generation)
+    sent = await message.answer(welcome_text, reply_markup=markup, parse_mode=ParseMode.HTML)
+    if settings.live_message:
+        adopt_live(session, sent)
+    await state.set_state(CalculationStates.choosing_contact_method)
+    chat_logger.log_message(user_id=user.id, username="БОТ", message=welcome_text, is_bot=True)
+
+
+@traced()
+async def ask_step(
+    message: Message,
+    state: FSMContext,
+    session: Session,
+    user_id: int,
+    step: Step,
+    notice: str | None = None,
+) -> None:
+    """Показывает вопрос шага и переводит FSM в его состояние.
+
+    Args:
+        message: Сообщение для ответа
+        state: Контекст FSM
+        session: Сессия пользователя
+        user_id: ID пользователя для лога чата
+        step: Шаг диалога
+        notice: Подтверждение предыдущего ответа (в режиме одного сообщения)
+    """
+    session.update(step.on_enter)
+    text = with_notice(notice, render_question(step, session))
+    image = find_image(step.image, list(step.fallback_images)) if step.image else None
+    markup = stamp(step.markup(), session.keyboard_generation)
+
+    if settings.live_message:
+        await show_live(message, session, text, markup, image)
+    else:
+        await send_prompt(message, text, markup, image)
+
+    await state.set_state(step.state)
+    chat_logger.log_message(user_id=user_id, username="БОТ", message=step.question, is_bot=True)
+
+
+async def refresh_prompt(
+    message: Message, session: Session, text: str, markup: InlineKeyboardMarkup
+) -> None:
+    """Обновляет показанный вопрос: подпись у фото или текст сообщения."""
+    markup = stamp(markup, session.keyboard_generation)
+    if message.photo:
+        await message.edit_caption(caption=text, reply_markup=markup, parse_mode=ParseMode.HTML)
+    else:
+        await message.edit_text(text, reply_markup=markup, parse_mode=ParseMode.HTML)
+
+
+async def _finish(
+    message: Message,
+    state: FSMContext,
+    session: Session,
+    user: User,
+    flow: Flow,
+    notice: str | None,
+) -> None:
+    """Завершает маршрут: показывает результат или оформляет заказ замера."""
+    if flow is CALCULATION:
+        await show_result(message, state, session, user, notice=notice)
+    else:
+        await complete_measurement(message, state, session, user, notice=notice)
+
+
+def _leaves_edited_section(session: Session, flow: Flow, step: Step, target: Step | None) -> bool:
+    """Редактирование параметра закончено, если переход выходит за его раздел."""
+    if not flow.editable or not session.editing_mode:
+        return False
+    return target is None or target.section != step.section
+
+
+@traced()
+async def advance(
+    message: Message,
+    state: FSMContext,
+    session: Session,
+    user: User,
+    step: Step,
+    notice: str | None = None,
+) -> None:
+    """Переходит от отвеченного шага к следующему по графу.
+
+    Args:
+        message: Сообщение для ответа
+        state: Контекст FSM
+        session: Сессия с уже сохранённым ответом
+        user: Пользователь, который ответил на шаг
+        step: Отвеченный шаг
+        notice: Подтверждение принятого ответа
+    """
+    if notice:
+        chat_logger.log_message(user_id=user.id, username="БОТ", message=notice, is_bot=True)
+        # В режиме одного сообщения подтверждение встраивается в следующий экран
+        if not settings.live_message:
+            await message.answer(notice, parse_mode=ParseMode.HTML)
+            notice = None
+
+    flow = FLOW_BY_STATE[step.state.state]
+    following = flow.next(step, session)
+
+    if _leaves_edited_section(session, flow, step, following):
+        session.editing_mode = False
+        await show_result(message, state, session, user, is_update=True, notice=notice)
+    elif following is not None:
+        await ask_step(message, state, session, user.id, following, notice)
+    else:
+        await _finish(message, state, session, user, flow, notice)
+
+
+async def go_back(message: Message, state: FSMContext, session: Session, user: User) -> None:
+    """Возвращает к предыдущему шагу маршрута.
+
+    С первого шага расчёта — к выбору способа связи, с первого шага заказа
+    замера и из редактируемого раздела — к результату.
+    """
+    current_state = await state.get_state()
+    step = STEPS.get(current_state or "")
+    if step is None:
+        return
+
+    flow = FLOW_BY_STATE[step.state.state]
+    previous = flow.previous(step, session)
+
+    if _leaves_edited_section(session, flow, step, previous):
+        session.editing_mode = False
+        await show_result(message, state, session, user, notify=False)
+    elif previous is not None:
+        await ask_step(message, state, session, user.id, previous)
+    elif flow is CALCULATION:
+        await show_welcome(message, state, session, user)
+    else:
+        await show_result(message, state, session, user, notify=False)
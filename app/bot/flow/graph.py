@@ -0,0 +1,343 @@
+"""Граф шагов расчёта и заказа замера."""
+
+from pathlib import Path
+
+from app.bot.flow.steps import Condition, Flow, MultiSelect, Step, TextInput
+from app.bot.keyboards.inline import (
+    get_back_keyboard,
+    get_cornice_keyboard,
+    get_lighting_types_keyboard,
+    get_profile_keyboard,
+    get_skip_row_keyboard,
+    get_spotlight_types_keyboard,
+    get_track_types_keyboard,
+    get_wall_finish_keyboard,
+)
+from app.bot.states import CalculationStates
+from app.core.config import settings
+from app.schemas.session import Session
+from app.templates.messages import texts
+from app.utils.validation import (
+    normalize_phone,
+    parse_float,
+    parse_int,
+    validate_phone,
+    validate_range,
+)
+
+_LIGHTING_DIR = Path(settings.lighting_dir)
+
+SPOTLIGHT_NAMES = {"builtin": "Встроенные", "surface": "Накладные", "pendant": "Подвесные"}
+TRACK_NAMES = {"surface": "Накладные треки", "builtin": "Встроенные треки"}
+
+
+def _selected(key: str, option: str) -> Condition:
+    """Условие: вариант option отмечен в мультивыборе key."""
+    return lambda session: option in (getattr(session, key) or ())
+
+
+def _parse_phone(text: str) -> str | None:
+    phone = text.strip()
+    return normalize_phone(phone) if validate_phone(phone) else None
+
+
+def _spotlight_count_step(spot_type: str, question: str) -> Step:
+    return Step(
+        state=getattr(CalculationStates, f"entering_spotlights_{spot_type}"),
+        question=question,
+        section="spotlights",
+        keyboard=get_skip_row_keyboard,
+        when=_selected("selected_spotlight_types", spot_type),
+        input=TextInput(
+            field=f"spotlights_{spot_type}",
+            parse=parse_int,
+            invalid=texts.SPOTLIGHTS_INVALID_INPUT,
+            valid=lambda count: validate_range(count, 0, settings.max_count),
+            out_of_range=texts.get_count_validation_error(settings.max_count),
+            accepted=lambda count, _: texts.SPOTLIGHTS_ACCEPTED.format(
+                spot_type=SPOTLIGHT_NAMES[spot_type], count=count
+            ),
+            skippable=True,
+        ),
+    )
+
+
+def _track_length_step(track_type: str, question: str) -> Step:
+    return Step(
+        state=getattr(CalculationStates, f"entering_track_{track_type}_length"),
+        question=question,
+        section="tracks",
+        keyboard=get_skip_row_keyboard,
+        when=_selected("selected_track_types", track_type),
+        input=TextInput(
+            field=f"track_{track_type}_length",
+            parse=parse_float,
+            invalid=texts.TRACK_INVALID_INPUT,
+            valid=lambda length: validate_range(length, 0.0, settings.max_line_length),
+            out_of_range=texts.get_cornice_validation_error(settings.max_line_length),
+            accepted=lambda length, _: texts.TRACK_LENGTH_ACCEPTED.format(
+                track_type=TRACK_NAMES[track_type], length=length
+            ),
+            skippable=True,
+        ),
+    )
+
+
+def _cornice_accepted(length: float, session: Session) -> str:
+    cornice_name = texts.get_cornice_name(session.cornice_type)
+    return texts.CORNICE_ACCEPTED.format(cornice_name=cornice_name, length=length)
+
+
+AREA = Step(
+    state=CalculationStates.waiting_for_area,
+    question=texts.AREA_QUESTION,
+    section="area",
+    keyboard=get_back_keyboard,
+    progress="area",
+    input=TextInput(
+        field="area",
+        parse=parse_float,
+        invalid=texts.AREA_INVALID_INPUT,
+        valid=lambda area: 0 < area <= 1000,
+        accepted=lambda area, _: texts.AREA_ACCEPTED.format(area=area),
+        log="Площадь: {value} м²",
+    ),
+)
+
+PROFILE = Step(
+    state=CalculationStates.choosing_profile,
+    question=texts.PROFILE_QUESTION,
+    section="profile",
+    keyboard=get_profile_keyboard,
+    progress="profile",
+    image=Path(settings.profiles_dir) / "profiles_all.jpg",
+    fallback_images=("insert.jpg", "shadow_eco.jpg", "floating.jpg"),
+)
+
+CORNICE_TYPE = Step(
+    state=CalculationStates.choosing_cornice_type,
+    question=texts.CORNICE_TYPE_QUESTION,
+    section="cornice",
+    keyboard=get_cornice_keyboard,
+    progress="cornice_type",
+    image=Path(settings.cornices_dir) / "cornices_all.jpg",
+    fallback_images=("carnices_all.jpg", "pk14.jpg", "pk5.jpg", "bp40.jpg"),
+)
+
+CORNICE_LENGTH = Step(
+    state=CalculationStates.entering_cornice_length,
+    question=texts.CORNICE_LENGTH_QUESTION,
+    section="cornice",
+    keyboard=get_back_keyboard,
+    progress="cornice_length",
+    when=lambda session: session.cornice_type is not None,
+    input=TextInput(
+        field="cornice_length",
+        parse=parse_float,
+        invalid=texts.CORNICE_INVALID_INPUT,
+        valid=lambda length: validate_range(length, 0.0, settings.max_cornice_length),
+        out_of_range=texts.get_cornice_validation_error(settings.max_cornice_length),
+        accepted=_cornice_accepted,
+        log="Длина карнизов: {value} пог.м",
+    ),
+)
+
+LIGHTING_TYPES = Step(
+    state=CalculationStates.choosing_lighting_types,
+    question=texts.LIGHTING_TYPES_QUESTION,
+    section="lighting",
+    progress="lighting",
+    image=_LIGHTING_DIR / "lightnint_variants.jpg",
+    on_enter={"selected_lighting": set()},
+    select=MultiSelect(
+        field="selected_lighting",
+        prefix="toggle_",
+        keyboards=get_lighting_types_keyboard,
+        resets={
+            "spotlights": {
+                "selected_spotlight_types": set(),
+                "spotlights_builtin": 0,
+                "spotlights_surface": 0,
+                "spotlights_pendant": 0,
+            },
+            "tracks": {
+                "selected_track_types": set(),
+                "track_surface_length": 0,
+                "track_builtin_length": 0,
+            },
+            "light_lines": {"light_lines": 0},
+            "chandeliers": {"chandeliers": 0},
+        },
+        skipped=texts.NO_LIGHTING,
+    ),
+)
+
+SPOTLIGHT_TYPES = Step(
+    state=CalculationStates.choosing_spotlight_types,
+    question=texts.SPOTLIGHT_TYPES_QUESTION,
+    section="spotlights",
+    progress="spotlights",
+    image=_LIGHTING_DIR / "spotlight_variants.jpg",
+    when=_selected("selected_lighting", "spotlights"),
+    on_enter={"selected_spotlight_types": set()},
+    select=MultiSelect(
+        field="selected_spotlight_types",
+        prefix="toggle_spot_",
+        keyboards=get_spotlight_types_keyboard,
+        resets={spot_type: {f"spotlights_{spot_type}": 0} for spot_type in SPOTLIGHT_NAMES},
+        skipped=texts.NO_SPOTLIGHTS,
+    ),
+)
+
+TRACK_TYPES = Step(
+    state=CalculationStates.choosing_track_types,
+    question=texts.TRACK_TYPES_QUESTION,
+    section="tracks",
+    progress="tracks",
+    image=_LIGHTING_DIR / "tracks_all.jpg",
+    when=_selected("selected_lighting", "tracks"),
+    on_enter={"selected_track_types": set()},
+    select=MultiSelect(
+        field="selected_track_types",
+        prefix="toggle_track_",
+        keyboards=get_track_types_keyboard,
+        resets={track_type: {f"track_{track_type}_length": 0} for track_type in TRACK_NAMES},
+        skipped=texts.NO_TRACKS,
+    ),
+)
+
+LIGHT_LINES = Step(
+    state=CalculationStates.entering_light_lines,
+    question=texts.LIGHT_LINES_QUESTION,
+    section="light_lines",
+    keyboard=get_skip_row_keyboard,
+    progress="light_lines",
+    image=_LIGHTING_DIR / "light_lines.jpg",
+    when=_selected("selected_lighting", "light_lines"),
+    input=TextInput(
+        field="light_lines",
+        parse=parse_float,
+        invalid=texts.LIGHT_LINES_INVALID_INPUT,
+        valid=lambda length: validate_range(length, 0.0, settings.max_line_length),
+        out_of_range=texts.get_cornice_validation_error(settings.max_line_length),
+        accepted=lambda length, _: texts.LIGHT_LINES_ACCEPTED.format(length=length),
+        log="Световые линии: {value} пог.м",
+        skipped=texts.NO_LIGHT_LINES,
+        skippable=True,
+    ),
+)
+
+CHANDELIERS = Step(
+    state=CalculationStates.entering_chandeliers,
+    question=texts.CHANDELIERS_QUESTION,
+    section="chandeliers",
+    keyboard=get_skip_row_keyboard,
+    progress="chandeliers",
+    image=_LIGHTING_DIR / "chandeliers.jpg",
+    when=_selected("selected_lighting", "chandeliers"),
+    input=TextInput(
+        field="chandeliers",
+        parse=parse_int,
+        invalid=texts.CHANDELIERS_INVALID_INPUT,
+        valid=lambda count: validate_range(count, 0, settings.max_count),
+        out_of_range=texts.get_count_validation_error(settings.max_count),
+        accepted=lambda count, _: texts.CHANDELIERS_ACCEPTED.format(count=count),
+        log="Люстры: {value} шт",
+        skippable=True,
+    ),
+)
+
+WALL_FINISH = Step(
+    state=CalculationStates.choosing_wall_finish,
+    question=texts.WALL_FINISH_QUESTION,
+    section="wall_finish",
+    keyboard=get_wall_finish_keyboard,
+    progress="wall_finish",
+)
+
+CALCULATION = Flow(
+    "calculation",
+    (
+        AREA,
+        PROFILE,
+        CORNICE_TYPE,
+        CORNICE_LENGTH,
+        LIGHTING_TYPES,
+        SPOTLIGHT_TYPES,
+        _spotlight_count_step("builtin", texts.SPOTLIGHTS_BUILTIN_QUESTION),
+        _spotlight_count_step("surface", texts.SPOTLIGHTS_SURFACE_QUESTION),
+        _spotlight_count_step("pendant", texts.SPOTLIGHTS_PENDANT_QUESTION),
+        TRACK_TYPES,
+        _track_length_step("surface", texts.TRACK_SURFACE_LENGTH_QUESTION),
+        _track_length_step("builtin", texts.TRACK_BUILTIN_LENGTH_QUESTION),
+        LIGHT_LINES,
+        CHANDELIERS,
+        WALL_FINISH,
+    ),
+    editable=True,
+)
+
+NAME = Step(
+    state=CalculationStates.entering_name,
+    question=texts.NAME_QUESTION,
+    section="measurement",
+    keyboard=get_back_keyboard,
+    input=TextInput(
+        field="customer_name",
+        parse=str.strip,
+        invalid=texts.NAME_INVALID_INPUT,
+        valid=lambda name: len(name) >= 2,
+        accepted=lambda name, _: texts.NAME_ACCEPTED.format(name=name),
+        log="Имя: {value}",
+    ),
+)
+
+PHONE = Step(
+    state=CalculationStates.entering_phone,
+    question=texts.PHONE_QUESTION,
+    section="measurement",
+    keyboard=get_back_keyboard,
+    input=TextInput(
+        field="phone",
+        parse=_parse_phone,
+        invalid=texts.PHONE_INVALID_INPUT,
+        valid=bool,
+        accepted=lambda phone, _: texts.PHONE_ACCEPTED.format(phone=phone),
+        log="Телефон: {value}",
+    ),
+)
+
+ADDRESS = Step(
+    state=CalculationStates.entering_address,
+    question=texts.ADDRESS_QUESTION,
+    section="measurement",
+    keyboard=get_back_keyboard,
+    input=TextInput(
+        field="address",
+        parse=str.strip,
+        invalid=texts.ADDRESS_INVALID_INPUT,
+        valid=lambda address: len(address) >= 5,
+        accepted=lambda address, _: texts.ADDRESS_ACCEPTED.format(address=address),
+        log="Адрес: {value}",
+    ),
+)
+
+MEASUREMENT = Flow("measurement", (NAME, PHONE, ADDRESS))
+
+FLOWS = (CALCULATION, MEASUREMENT)
+
+STEPS: dict[str, Step] = {step.state.state: step for flow in FLOWS for step in flow.steps}
+FLOW_BY_STATE: dict[str, Flow] = {step.state.state: flow for flow in FLOWS for step in flow.steps}
+INPUT_STATES = tuple(step.state for step in STEPS.values() if step.input is not None)
+SELECT_STATES = tuple(step.state for step in STEPS.values() if step.select is not None)
+
+EDIT_TARGETS: dict[str, Step] = {
+    "edit_area": AREA,
+    "edit_profile": PROFILE,
+    "edit_cornice": CORNICE_TYPE,
+    "edit_spotlights": SPOTLIGHT_TYPES,
+    "edit_tracks": TRACK_TYPES,
+    "edit_light_lines": LIGHT_LINES,
+    "edit_chandeliers": CHANDELIERS,
+    "edit_wall_finish": WALL_FINISH,
+}
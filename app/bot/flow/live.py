@@ -0,0 +1,112 @@
+"""Режим одного сообщения: шаги сессии редактируют одно «живое» сообщение.
+
+Включается настройкой LIVE_MESSAGE. id сообщения и показанная в нём
+картинка хранятся в сессии (live_message_id, live_message_image). Картинка
+фото-сообщения меняется через editMessageMedia, подпись и текст — на месте.
+Новое сообщение отправляется, только если его ещё нет, если Telegram
+отказался его редактировать или если шаг меняет текст на фото (или
+наоборот): Bot API не превращает текстовое сообщение в медиа и обратно.
+"""
+
+import logging
+from pathlib import Path
+
+from aiogram.enums import ParseMode
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import InlineKeyboardMarkup, InputMediaPhoto, Message
+
+from app.bot.flow.prompt import send_prompt
+from app.schemas.session import Session
+from app.utils.images import photo_input, remember_file_id
+
+logger = logging.getLogger(__name__)
+
+
+def with_notice(notice: str | None, text: str) -> str:
+    """Встраивает подтверждение предыдущего ответа перед текстом экрана."""
+    return f"{notice}\n\n{text}" if notice else text
+
+
+async def _edit(
+    message: Message,
+    message_id: int,
+    shown_image: str,
+    text: str,
+    markup: InlineKeyboardMarkup,
+    image: Path | None,
+) -> bool:
+    """Редактирует живое сообщение. Возвращает False, если это невозможно."""
+    bot, chat_id = message.bot, message.chat.id
+    try:
+        if image is None:
+            await bot.edit_message_text(
+                text=text,
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=markup,
+                parse_mode=ParseMode.HTML,
+            )
+        elif shown_image == str(image):
+            await bot.edit_message_caption(
+                caption=text,
+                chat_id=chat_id,
+                message_id=message_id,
+                reply_markup=markup,
+                parse_mode=ParseMode.HTML,
+            )
+        else:
+            media = InputMediaPhoto(
+                media=photo_input(image), caption=text, parse_mode=ParseMode.HTML
+            )
+            edited = await bot.edit_message_media(
+                media=media, chat_id=chat_id, message_id=message_id, reply_markup=markup
+            )
+            remember_file_id(image, edited)
+    except TelegramBadRequest as e:
+        if "message is not modified" in str(e):
+            return True
+        logger.warning(f"Не удалось изменить сообщение {message_id}: {e}")
+        return False
+    return True
+
+
+async def show_live(
+    message: Message,
+    session: Session,
+    text: str,
+    markup: InlineKeyboardMarkup,
+    image: Path | None = None,
+) -> None:
+    """Показывает шаг в живом сообщении сессии.
+
+    Args:
+        message: Сообщение из чата сессии
+        session: Сессия пользователя
+        text: Текст (подпись) шага
+        markup: Клавиатура шага
+        image: Картинка шага, None — текстовый шаг
+    """
+    message_id = session.live_message_id
+    shown_image = session.live_message_image
+    same_kind = bool(shown_image) == (image is not None)
+
+    if message_id is not None and same_kind:
+        if await _edit(message, message_id, shown_image, text, markup, image):
+            session.live_message_image = str(image or "")
+            return
+
+    sent = await send_prompt(message, text, markup, image)
+    session.live_message_id = sent.message_id
+    session.live_message_image = str(image) if image is not None and sent.photo else ""
+
+
+def adopt_live(session: Session, sent: Message) -> None:
+    """Делает отправленное текстовое сообщение живым сообщением сессии."""
+    session.live_message_id = sent.message_id
+    session.live_message_image = ""
+
+
+def release_live(session: Session) -> None:
+    """Отвязывает живое сообщение: следующий шаг начнёт новое."""
+    session.live_message_id = None
+    session.live_message_image = ""
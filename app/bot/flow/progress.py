@@ -0,0 +1,101 @@
+"""Нумерация шагов для прогресс-бара.
+
+Номера шагов и готовые заголовки прогресс-бара считаются один раз при
+импорте для каждого варианта маршрута, поэтому показ шага — один поиск
+в словаре.
+"""
+
+from itertools import combinations
+
+from app.schemas.session import Session
+from app.templates.messages.texts import format_progress
+
+# Шаги до выбора освещения, включая сам выбор
+BASE_KEYS = ("area", "profile", "cornice_type", "cornice_length", "lighting")
+
+# Разделы освещения в порядке вопросов (длины треков идут без прогресса)
+LIGHTING_KEYS = ("spotlights", "tracks", "light_lines", "chandeliers")
+
+FINAL_KEY = "wall_finish"
+
+# Все шаги: 5 базовых + 4 освещения + чистовые (TOTAL_STEPS)
+PROGRESS_KEYS = (*BASE_KEYS, *LIGHTING_KEYS, FINAL_KEY)
+
+# Вариант маршрута: (спрашивается ли длина карнизов, выбранные типы освещения).
+# None вместо набора — режим "Все по шагам": типы освещения ещё не выбраны.
+Variant = tuple[bool, frozenset[str] | None]
+
+
+def _route(variant: Variant) -> tuple[str, ...]:
+    """Ключи шагов, которые пользователь пройдёт в данном варианте маршрута."""
+    with_cornice, lighting = variant
+    return tuple(
+        key
+        for key in PROGRESS_KEYS
+        if (key != "cornice_length" or with_cornice)
+        and (key not in LIGHTING_KEYS or lighting is None or key in lighting)
+    )
+
+
+def _positions(variant: Variant) -> dict[str, tuple[int, int]]:
+    """Номер каждого шага и общее количество шагов в варианте маршрута.
+
+    Шаг вне маршрута (его можно открыть из меню редактирования) получает
+    номер, который он занял бы в маршруте.
+    """
+    route = _route(variant)
+    return {
+        key: (sum(k in route for k in PROGRESS_KEYS[:position]) + 1, len(route))
+        for position, key in enumerate(PROGRESS_KEYS)
+    }
+
+
+def _variants() -> list[Variant]:
+    """Все варианты маршрута: каждый набор типов освещения и режим "Все по шагам"."""
+    subsets: list[frozenset[str] | None] = [None]
+    for size in range(len(LIGHTING_KEYS) + 1):
+        subsets.extend(frozenset(c) for c in combinations(LIGHTING_KEYS, size))
+    return [(with_cornice, subset) for with_cornice in (True, False) for subset in subsets]
+
+
+STEP_POSITIONS: dict[Variant, dict[str, tuple[int, int]]] = {
+    variant: _positions(variant) for variant in _variants()
+}
+
+PROGRESS_HEADERS: dict[Variant, dict[str, str]] = {
+    variant: {key: format_progress(*position) for key, position in positions.items()}
+    for variant, positions in STEP_POSITIONS.items()
+}
+
+
+def get_variant(key: str, session: Session) -> Variant:
+    """Вариант маршрута по сессии.
+
+    Пока шаг карнизов не пройден, длина карнизов считается частью маршрута
+    ("Без карнизов" сразу ставит длину 0). На шаге выбора освещения набор
+    ещё редактируется, поэтому прогресс до нажатия "Готово" показывается
+    для режима "Все по шагам" и не меняется от переключения типов.
+    """
+    with_cornice = session.cornice_type is not None or session.cornice_length is None
+    selected = session.selected_lighting
+    if selected is None or key == "lighting":
+        return with_cornice, None
+    return with_cornice, frozenset(selected).intersection(LIGHTING_KEYS)
+
+
+def get_step_position(key: str, session: Session) -> tuple[int, int]:
+    """Возвращает номер шага и общее количество шагов для прогресс-бара.
+
+    Args:
+        key: Ключ шага в прогресс-баре (Step.progress)
+        session: Сессия (тип карниза и выбранные типы освещения)
+
+    Returns:
+        (номер шага, всего шагов)
+    """
+    return STEP_POSITIONS[get_variant(key, session)][key]
+
+
+def get_progress_header(key: str, session: Session) -> str:
+    """Возвращает готовый прогресс-бар вида ●●●○○○○○○○ (3/10)."""
+    return PROGRESS_HEADERS[get_variant(key, session)][key]
@@ -0,0 +1,46 @@
+"""Отправка вопроса шага: картинка с вопросом в подписи одним сообщением."""
+
+import logging
+from pathlib import Path
+
+from aiogram.enums import ParseMode
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from app.utils.images import photo_input, remember_file_id
+
+logger = logging.getLogger(__name__)
+
+# Ограничение Telegram на длину подписи к фото
+CAPTION_LIMIT = 1024
+
+
+async def send_prompt(
+    message: Message, text: str, markup: InlineKeyboardMarkup, image: Path | None = None
+) -> Message:
+    """Отправляет вопрос: фото с подписью и клавиатурой или просто текст.
+
+    Если картинки нет, подпись слишком длинная или фото не отправилось,
+    вопрос уходит обычным текстовым сообщением.
+
+    Args:
+        message: Сообщение для ответа
+        text: Текст вопроса (с прогресс-баром)
+        markup: Клавиатура вопроса
+        image: Путь к существующей картинке шага
+
+    Returns:
+        Отправленное сообщение
+    """
+    if image is not None and len(text) <= CAPTION_LIMIT:
+        try:
+            sent = await message.answer_photo(
+                photo=photo_input(image),
+                caption=text,
+                reply_markup=markup,
+                parse_mode=ParseMode.HTML,
+            )
+            remember_file_id(image, sent)
+            return sent
+        except Exception as e:
+            logger.error(f"Не удалось отправить изображение {image}: {e}")
+    return await message.answer(text, reply_markup=markup, parse_mode=ParseMode.HTML)
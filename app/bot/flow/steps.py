@@ -0,0 +1,138 @@
+"""Описание шагов диалога: вопрос, картинка, клавиатура, ввод и условия."""
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.types import InlineKeyboardMarkup
+
+from app.schemas.session import Session
+
+Condition = Callable[[Session], bool]
+
+
+def always(session: Session) -> bool:
+    """Условие шага, который показывается всегда."""
+    return True
+
+
+def non_negative(value: Any) -> bool:
+    """Проверка по умолчанию для числового ввода."""
+    return value >= 0
+
+
+@dataclass(frozen=True, slots=True)
+class TextInput:
+    """Текстовый ввод шага и его валидация.
+
+    Attributes:
+        field: Поле сессии, в которое сохраняется значение
+        parse: Разбор текста, None — если текст не распознан
+        invalid: Сообщение о нераспознанном вводе
+        accepted: Подтверждение принятого значения (значение, сессия)
+        valid: Проверка допустимого диапазона
+        out_of_range: Сообщение о значении вне диапазона (по умолчанию invalid)
+        log: Шаблон записи ввода в лог чата с подстановкой {value}
+        skipped: Подтверждение для кнопки 'Пропустить' (по умолчанию accepted(0))
+        skippable: Клавиатура шага показывает 'Пропустить' (нажатие ставит 0);
+            на остальных шагах нажатие старой кнопки игнорируется
+    """
+
+    field: str
+    parse: Callable[[str], Any]
+    invalid: str
+    accepted: Callable[[Any, Session], str]
+    valid: Callable[[Any], bool] = non_negative
+    out_of_range: str | None = None
+    log: str | None = None
+    skipped: str | None = None
+    skippable: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class MultiSelect:
+    """Шаг мультивыбора с кнопками-переключателями, 'Готово' и 'Пропустить'.
+
+    Attributes:
+        field: Поле сессии с множеством выбранных вариантов
+        prefix: Префикс callback_data переключателей
+        keyboards: Клавиатура для заданного набора отметок
+        resets: Значения, которые обнуляются для невыбранного варианта
+        skipped: Подтверждение, если ничего не выбрано
+    """
+
+    field: str
+    prefix: str
+    keyboards: Callable[[set[str]], InlineKeyboardMarkup]
+    resets: Mapping[str, Mapping[str, Any]]
+    skipped: str
+
+
+@dataclass(frozen=True, slots=True)
+class Step:
+    """Шаг диалога.
+
+    Attributes:
+        state: Состояние FSM, в котором ждём ответ
+        question: Текст вопроса
+        section: Раздел расчёта; при редактировании движок возвращается к
+            результату, как только следующий шаг выходит за раздел
+        keyboard: Клавиатура вопроса (для мультивыбора берётся из select)
+        progress: Ключ шага в прогресс-баре, None — без прогресса
+        image: Картинка, отправляемая перед вопросом
+        fallback_images: Имена запасных картинок в той же папке
+        when: Условие, при котором шаг входит в маршрут
+        on_enter: Значения, сбрасываемые при показе шага
+        input: Текстовый ввод шага
+        select: Мультивыбор шага
+    """
+
+    state: State
+    question: str
+    section: str
+    keyboard: Callable[[], InlineKeyboardMarkup] | None = None
+    progress: str | None = None
+    image: Path | None = None
+    fallback_images: tuple[str, ...] = ()
+    when: Condition = always
+    on_enter: Mapping[str, Any] = field(default_factory=dict)
+    input: TextInput | None = None
+    select: MultiSelect | None = None
+
+    def markup(self, selected: set[str] | None = None) -> InlineKeyboardMarkup:
+        """Клавиатура шага с учётом отметок мультивыбора."""
+        if self.select is not None:
+            return self.select.keyboards(selected or set())
+        if self.keyboard is None:
+            raise ValueError(f"У шага {self.state.state} нет клавиатуры")
+        return self.keyboard()
+
+
+class Flow:
+    """Скомпилированный маршрут: индексы шагов строятся один раз при импорте."""
+
+    def __init__(self, name: str, steps: tuple[Step, ...], editable: bool = False) -> None:
+        self.name = name
+        self.steps = steps
+        self.editable = editable
+        self._index = {step.state.state: position for position, step in enumerate(steps)}
+
+    def __contains__(self, state: str | None) -> bool:
+        return state in self._index
+
+    def step(self, state: str | None) -> Step | None:
+        """Возвращает шаг по состоянию FSM."""
+        position = self._index.get(state) if state else None
+        return None if position is None else self.steps[position]
+
+    def next(self, step: Step, session: Session) -> Step | None:
+        """Следующий шаг маршрута, условие которого выполняется."""
+        position = self._index[step.state.state]
+        return next((s for s in self.steps[position + 1 :] if s.when(session)), None)
+
+    def previous(self, step: Step, session: Session) -> Step | None:
+        """Предыдущий шаг маршрута, условие которого выполняется."""
+        position = self._index[step.state.state]
+        return next((s for s in reversed(self.steps[:position]) if s.when(session)), None)
@@ -0,0 +1,194 @@
+"""Команды администратора для диагностики работающего бота.
+
+/profile [секунды] — сэмплирующий профиль цикла событий, файл collapsed stacks.
+/memsnap — прирост памяти с прошлого снимка tracemalloc; /memsnap stop — выключить.
+/find <запрос> — поиск диалогов по телефону, имени или адресу.
+/leads [с] [по] [csv|parquet] — файл заявок за период (даты ГГГГ-ММ-ДД).
+Доступны только пользователям из ADMIN_IDS.
+"""
+
+import asyncio
+import html
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from aiogram import Router
+from aiogram.enums import ParseMode
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, FSInputFile, Message
+
+from app.core.config import settings
+from app.monitoring.profiler import MemorySnapshots, render_profile, sample_stacks
+from app.services.chat_logger import chat_logger
+from app.services.lead_export import FORMATS, export_leads
+from app.services.leads import lead_store
+from app.services.search import MATCH_END, MATCH_START, Hit
+from app.templates.messages.texts import (
+    FIND_DISABLED,
+    FIND_HIT,
+    FIND_NOTHING,
+    FIND_RESULTS,
+    FIND_USAGE,
+    LEADS_DONE,
+    LEADS_EMPTY,
+    LEADS_TOO_LARGE,
+    LEADS_USAGE,
+    MEMSNAP_DONE,
+    MEMSNAP_STARTED,
+    MEMSNAP_STOPPED,
+    PROFILE_BUSY,
+    PROFILE_DONE,
+    PROFILE_STARTED,
+)
+
+DEFAULT_PROFILE_SECONDS = 10
+MAX_PROFILE_SECONDS = 120
+# Подпись к файлу в Telegram ограничена 1024 символами
+CAPTION_LIMIT = 1024
+# Бот может отправить файл не больше 50 МБ
+UPLOAD_LIMIT = 50 * 1024 * 1024
+
+ADMIN_IDS = frozenset(settings.admin_ids_list)
+
+router = Router()
+router.message.filter(lambda message: message.from_user and message.from_user.id in ADMIN_IDS)
+
+_profiling = asyncio.Lock()
+_snapshots = MemorySnapshots()
+
+
+def _profile_seconds(args: str | None) -> int:
+    """Длительность профиля из аргумента команды, в допустимых пределах."""
+    if not args or not args.strip().isdigit():
+        return DEFAULT_PROFILE_SECONDS
+    return max(1, min(int(args), MAX_PROFILE_SECONDS))
+
+
+def _file(content: bytes, kind: str) -> BufferedInputFile:
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return BufferedInputFile(content, filename=f"{kind}-{stamp}.txt.gz")
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject) -> None:
+    """Снимает профиль цикла событий и отправляет его файлом."""
+    if _profiling.locked():
+        await message.answer(PROFILE_BUSY)
+        return
+
+    seconds = _profile_seconds(command.args)
+    async with _profiling:
+        await message.answer(PROFILE_STARTED.format(seconds=seconds))
+        loop_thread = threading.get_ident()
+        stacks = await asyncio.to_thread(sample_stacks, loop_thread, seconds)
+        content, summary = render_profile(stacks)
+
+    caption = PROFILE_DONE.format(seconds=seconds, samples=sum(stacks.values()), summary=summary)
+    await message.answer_document(_file(content, "profile"), caption=caption[:CAPTION_LIMIT])
+
+
+@router.message(Command("memsnap"))
+async def cmd_memsnap(message: Message, command: CommandObject) -> None:
+    """Отправляет прирост памяти с прошлого снимка или выключает tracemalloc."""
+    if (command.args or "").strip() == "stop":
+        _snapshots.stop()
+        await message.answer(MEMSNAP_STOPPED)
+        return
+
+    result = await asyncio.to_thread(_snapshots.take)
+    if result is None:
+        await message.answer(MEMSNAP_STARTED)
+        return
+    content, summary = result
+    caption = MEMSNAP_DONE.format(summary=summary)
+    await message.answer_document(_file(content, "memsnap"), caption=caption[:CAPTION_LIMIT])
+
+
+def _format_hit(hit: Hit) -> str:
+    """Строка результата: ссылка на пользователя, время и фрагмент с выделением."""
+    snippet = html.escape(hit.snippet).replace(MATCH_START, "<b>").replace(MATCH_END, "</b>")
+    return FIND_HIT.format(
+        user_id=hit.user_id,
+        time=datetime.fromtimestamp(hit.ts).strftime("%d.%m.%Y %H:%M"),
+        sender=html.escape(hit.sender),
+        snippet=snippet,
+    )
+
+
+@router.message(Command("find"))
+async def cmd_find(message: Message, command: CommandObject) -> None:
+    """Ищет диалоги по телефону, имени или адресу."""
+    query = (command.args or "").strip()
+    if not query:
+        await message.answer(FIND_USAGE)
+        return
+    if chat_logger.index is None:
+        await message.answer(FIND_DISABLED)
+        return
+
+    started = time.perf_counter()
+    hits = await asyncio.to_thread(chat_logger.index.search, query)
+    elapsed = (time.perf_counter() - started) * 1000
+    if not hits:
+        await message.answer(FIND_NOTHING.format(elapsed=elapsed))
+        return
+    results = "\n\n".join(_format_hit(hit) for hit in hits)
+    await message.answer(
+        FIND_RESULTS.format(count=len(hits), elapsed=elapsed, results=results),
+        parse_mode=ParseMode.HTML,
+    )
+
+
+def _leads_args(args: str | None) -> tuple[date | None, date | None, str]:
+    """Период и формат выгрузки из аргументов /leads.
+
+    Raises:
+        ValueError: Аргумент не дата и не формат
+    """
+    dates = []
+    fmt = "csv"
+    for arg in (args or "").split():
+        if arg in FORMATS:
+            fmt = arg
+        else:
+            dates.append(date.fromisoformat(arg))
+    if len(dates) > 2:
+        raise ValueError("больше двух дат")
+    since, until = (dates + [None, None])[:2]
+    return since, until, fmt
+
+
+@router.message(Command("leads"))
+async def cmd_leads(message: Message, command: CommandObject) -> None:
+    """Выгружает заявки за период и отправляет файлом."""
+    try:
+        since, until, fmt = _leads_args(command.args)
+    except ValueError:
+        await message.answer(LEADS_USAGE)
+        return
+
+    fd, name = tempfile.mkstemp(suffix=f".{fmt}")
+    os.close(fd)
+    path = Path(name)
+    try:
+        records = lead_store.read(since, until)
+        count = await asyncio.to_thread(export_leads, records, path, fmt)
+        size = path.stat().st_size
+        if not count:
+            await message.answer(LEADS_EMPTY)
+        elif size > UPLOAD_LIMIT:
+            await message.answer(LEADS_TOO_LARGE.format(size=size / 1024 / 1024))
+        else:
+            period = f"{since or '…'} — {until or '…'}"
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            document = FSInputFile(path, filename=f"leads-{stamp}.{fmt}")
+            caption = LEADS_DONE.format(count=count, period=period)
+            await message.answer_document(document, caption=caption)
+    except ValueError as e:
+        await message.answer(str(e))
+    finally:
+        path.unlink(missing_ok=True)
@@ -0,0 +1,56 @@
+"""Обработчики меню редактирования параметров и заказа замера."""
+
+from aiogram.enums import ParseMode
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+
+from app.bot.flow.engine import ask_step
+from app.bot.flow.graph import EDIT_TARGETS, NAME
+from app.bot.handlers.result import show_result
+from app.bot.keyboards.generation import stamp
+from app.bot.keyboards.inline import get_edit_params_keyboard
+from app.bot.routing import callbacks
+from app.schemas.session import Session
+from app.services.chat_logger import chat_logger
+from app.templates.messages.texts import EDIT_PARAMS_MESSAGE
+from app.utils.callback import safe_answer_callback
+
+
+@callbacks.on("edit_params")
+async def show_edit_menu(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
+    """Показ меню редактирования параметров."""
+    await safe_answer_callback(callback)
+
+    await callback.message.answer(
+        EDIT_PARAMS_MESSAGE,
+        reply_markup=stamp(get_edit_params_keyboard(session), session.keyboard_generation),
+        parse_mode=ParseMode.HTML,
+    )
+    chat_logger.log_message(
+        user_id=callback.from_user.id, username="БОТ", message=EDIT_PARAMS_MESSAGE, is_bot=True
+    )
+
+
+@callbacks.on("back_to_result")
+async def back_to_result(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
+    """Возврат к результату расчёта из меню редактирования."""
+    await safe_answer_callback(callback)
+    await show_result(callback.message, state, session, callback.from_user, notify=False)
+
+
+@callbacks.on(*EDIT_TARGETS)
+async def edit_parameter(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
+    """Редактирование параметра: переход к первому шагу его раздела."""
+    await safe_answer_callback(callback)
+    session.editing_mode = True
+    step = EDIT_TARGETS[callback.data]
+    await ask_step(callback.message, state, session, callback.from_user.id, step)
+
+
+@callbacks.on("order_measurement")
+async def start_measurement_order(
+    callback: CallbackQuery, state: FSMContext, session: Session
+) -> None:
+    """Начало заказа бесплатного замера."""
+    await safe_answer_callback(callback)
+    await ask_step(callback.message, state, session, callback.from_user.id, NAME)
@@ -0,0 +1,70 @@
+"""Обработчики шагов мультивыбора: освещение, светильники и треки."""
+
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery
+
+from app.bot.flow.engine import advance, refresh_prompt, render_question
+from app.bot.flow.graph import SELECT_STATES, STEPS
+from app.bot.flow.steps import Step
+from app.bot.routing import callbacks
+from app.schemas.session import Session
+from app.utils.callback import safe_answer_callback
+
+
+async def _current_step(state: FSMContext) -> Step:
+    """Шаг мультивыбора, на котором находится пользователь."""
+    return STEPS[await state.get_state()]
+
+
+async def _skip(callback: CallbackQuery, state: FSMContext, session: Session, step: Step) -> None:
+    """Обнуляет все варианты шага и переходит дальше."""
+    select = step.select
+    for reset in select.resets.values():
+        session.update(reset)
+    setattr(session, select.field, set())
+    await advance(callback.message, state, session, callback.from_user, step, select.skipped)
+
+
+@callbacks.on_action("toggle", states=SELECT_STATES)
+async def toggle_option(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
+    """Переключает отметку варианта и перерисовывает клавиатуру."""
+    await safe_answer_callback(callback)
+
+    step = await _current_step(state)
+    select = step.select
+    option = callback.data.removeprefix(select.prefix)
+    if option not in select.resets:
+        return
+
+    selected = set(getattr(session, select.field) or ()) ^ {option}
+    setattr(session, select.field, selected)
+
+    await refresh_prompt(
+        callback.message, session, render_question(step, session), step.markup(selected)
+    )
+
+
+@callbacks.on("lighting_done", "spotlights_done", "tracks_done", states=SELECT_STATES)
+async def selection_done(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
+    """Завершает выбор: обнуляет невыбранные варианты и идёт к их вопросам."""
+    await safe_answer_callback(callback)
+
+    step = await _current_step(state)
+    select = step.select
+    selected = set(getattr(session, select.field) or ())
+    if not selected:
+        await _skip(callback, state, session, step)
+        return
+
+    for option, reset in select.resets.items():
+        if option not in selected:
+            session.update(reset)
+    setattr(session, select.field, selected)
+    await advance(callback.message, state, session, callback.from_user, step)
+
+
+@callbacks.on("lighting_skip", "spotlights_skip", "tracks_skip", states=SELECT_STATES)
+async def selection_skip(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
+    """Пропускает шаг мультивыбора целиком."""
+    await safe_answer_callback(callback)
+    await _skip(callback, state, session, await _current_step(state))
@@ -0,0 +1,116 @@
+"""Показ результата расчёта и завершение заказа замера."""
+
+import logging
+
+from aiogram.enums import ParseMode
+from aiogram.fsm.context import FSMContext
+from aiogram.types import Message, User
+
+from app.bot.flow.live import release_live, with_notice
+from app.bot.keyboards.generation import stamp
+from app.bot.keyboards.inline import get_result_keyboard
+from app.bot.states import CalculationStates
+from app.monitoring.tracing import traced
+from app.schemas.session import Session
+from app.services.calculator import calculate_total
+from app.services.chat_logger import chat_logger
+from app.services.leads import lead_store
+from app.services.notifications import notify_managers
+from app.services.report import (
+    format_admin_report,
+    format_measurement_report,
+    format_result_message,
+)
+from app.templates.messages.texts import INCOMPLETE_CALCULATION_MESSAGE, MEASUREMENT_THANK_YOU
+from app.utils.user import get_user_mention
+
+logger = logging.getLogger(__name__)
+
+
+@traced()
+async def show_result(
+    message: Message,
+    state: FSMContext,
+    session: Session,
+    user: User,
+    notify: bool = True,
+    is_update: bool = False,
+    notice: str | None = None,
+) -> None:
+    """Показывает результат расчёта и уведомляет менеджеров.
+
+    Args:
+        message: Сообщение для ответа
+        state: Контекст FSM
+        session: Сессия с ответами пользователя
+        user: Пользователь, для которого сделан расчёт
+        notify: Отправить отчёт менеджерам
+        is_update: Расчёт изменён после редактирования
+        notice: Подтверждение последнего ответа (в режиме одного сообщения)
+    """
+    # Проверка обязательных полей
+    if session.area is None or session.profile_type is None:
+        await message.answer(INCOMPLETE_CALCULATION_MESSAGE, parse_mode=ParseMode.HTML)
+        return
+
+    calculation = calculate_total(session)
+    result_text = format_result_message(calculation)
+
+    text = with_notice(notice, result_text)
+    markup = stamp(get_result_keyboard(), session.keyboard_generation)
+    await message.answer(text, reply_markup=markup, parse_mode=ParseMode.HTML)
+    # Результат остаётся в чате, следующий вопрос начнёт новое живое сообщение
+    release_live(session)
+    await state.set_state(CalculationStates.showing_result)
+    chat_logger.log_message(user_id=user.id, username="БОТ", message=result_text, is_bot=True)
+
+    if notify:
+        lead_store.add_quote(user.id, user.full_name, calculation, is_update)
+    if notify and message.bot:
+        try:
+            report = format_admin_report(
+                get_user_mention(user), user.full_name, calculation, is_update
+            )
+            notify_managers(message.bot, report)
+        except Exception as e:
+            logger.error(f"Ошибка отправки уведомления: {e}")
+
+
+def _save_measurement(session: Session, user: User) -> None:
+    """Сохраняет заказ замера вместе с расчётом, если он завершён."""
+    calculation = None
+    if session.area is not None and session.profile_type is not None:
+        calculation = calculate_total(session)
+    lead_store.add_measurement(
+        user.id, user.full_name, session.customer_name, session.phone, session.address, calculation
+    )
+
+
+@traced()
+async def complete_measurement(
+    message: Message,
+    state: FSMContext,
+    session: Session,
+    user: User,
+    notice: str | None = None,
+) -> None:
+    """Благодарит за заказ замера, уведомляет менеджеров и возвращает к результату."""
+    text = with_notice(notice, MEASUREMENT_THANK_YOU)
+    await message.answer(text, parse_mode=ParseMode.HTML)
+    chat_logger.log_message(
+        user_id=user.id, username="БОТ", message=MEASUREMENT_THANK_YOU, is_bot=True
+    )
+
+    if not session.customer_name or not session.phone or not session.address:
+        logger.warning("Не удалось отправить уведомление о замере: отсутствуют данные")
+    else:
+        _save_measurement(session, user)
+        if message.bot:
+            try:
+                report = format_measurement_report(get_user_mention(user), user.full_name, session)
+                notify_managers(message.bot, report)
+            except Exception as e:
+                logger.error(f"Ошибка отправки уведомления о замере: {e}")
+
+    release_live(session)
+    await state.set_state(CalculationStates.showing_result)
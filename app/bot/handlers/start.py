@@ -1,22 +1,25 @@
 """Обработчик команды /start."""
 
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message, CallbackQuery
 
-from app.bot.keyboards.inline import get_contact_method_keyboard, get_edit_params_keyboard
+from app.bot.keyboards.generation import stamp
+from app.bot.keyboards.inline import get_edit_params_keyboard
+from app.bot.routing import callbacks
 from app.bot.states import CalculationStates
+from app.schemas.session import Session
 from app.templates.messages.texts import (
-    WELCOME_MESSAGE,
     MANAGER_CONTACTS,
     EDIT_PARAMS_MESSAGE,
     NO_CALCULATION_MESSAGE,
 )
 from app.services.chat_logger import chat_logger
 from app.core.config import settings
-from app.bot.handlers.calculation import ask_area
+from app.bot.flow.engine import ask_step, show_welcome
+from app.bot.flow.graph import AREA
 from app.utils.user import get_user_display_name
 from app.utils.callback import safe_answer_callback
 
@@ -24,56 +27,31 @@ router = Router()
 
 
 @router.message(Command("start"))
-async def cmd_start(message: Message, state: FSMContext) -> None:
+async def cmd_start(message: Message, state: FSMContext, session: Session) -> None:
     """Обработчик команды /start."""
-    await state.clear()
-
     username = get_user_display_name(message.from_user)
-    user_name = message.from_user.first_name or "Пользователь"
     chat_logger.log_message(
         user_id=message.from_user.id, username=username, message="/start", is_bot=False
     )
-
-    welcome_text = WELCOME_MESSAGE.format(name=user_name)
-    await message.answer(welcome_text, reply_markup=get_contact_method_keyboard(), parse_mode=ParseMode.HTML)
-    await state.set_state(CalculationStates.choosing_contact_method)
-
-    chat_logger.log_message(
-        user_id=message.from_user.id, username="БОТ", message=welcome_text, is_bot=True
-    )
+    await show_welcome(message, state, session, message.from_user)
 
 
-@router.callback_query(F.data == "start_calculation")
-async def start_new_calculation(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.on("start_calculation")
+async def start_new_calculation(
+    callback: CallbackQuery, state: FSMContext, session: Session
+) -> None:
     """Начало нового расчёта — показ приветствия и выбора способа связи."""
     await safe_answer_callback(callback)
-    await state.clear()
 
     # Очистка истории чата для нового расчёта
     if callback.from_user:
         chat_logger.clear_chat_history(callback.from_user.id)
 
-    user_name = callback.from_user.first_name or "Пользователь"
-    welcome_text = WELCOME_MESSAGE.format(name=user_name)
-
-    await callback.message.answer(
-        text=welcome_text,
-        reply_markup=get_contact_method_keyboard(),
-        parse_mode=ParseMode.HTML
-    )
-
-    await state.set_state(CalculationStates.choosing_contact_method)
-
-    chat_logger.log_message(
-        user_id=callback.from_user.id,
-        username="БОТ",
-        message=welcome_text,
-        is_bot=True
-    )
+    await show_welcome(callback.message, state, session, callback.from_user)
 
 
-@router.callback_query(F.data == "method_manager")
-async def contact_manager(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.on("method_manager")
+async def contact_manager(callback: CallbackQuery, state: FSMContext, session: Session) -> None:
     """Связь с менеджером."""
     await safe_answer_callback(callback)
 
@@ -87,7 +65,8 @@ async def contact_manager(callback: CallbackQuery, state: FSMContext) -> None:
     # Очищаем состояние только если мы в процессе выбора способа связи
     current_state = await state.get_state()
     if current_state == CalculationStates.choosing_contact_method:
-        await state.clear()
+        session.reset()
+        await state.set_state(None)
 
     chat_logger.log_message(
         user_id=callback.from_user.id,
@@ -97,25 +76,25 @@ async def contact_manager(callback: CallbackQuery, state: FSMContext) -> None:
     )
 
 
-@router.callback_query(CalculationStates.choosing_contact_method, F.data == "method_bot")
-async def start_bot_calculation(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.on("method_bot", states=[CalculationStates.choosing_contact_method])
+async def start_bot_calculation(
+    callback: CallbackQuery, state: FSMContext, session: Session
+) -> None:
     """Начало автоматического расчёта — переход к вопросу о площади."""
     await safe_answer_callback(callback)
-    await ask_area(callback.message, state, callback.from_user.id)
+    await ask_step(callback.message, state, session, callback.from_user.id, AREA)
 
 
 @router.message(Command("edit"))
-async def cmd_edit(message: Message, state: FSMContext) -> None:
+async def cmd_edit(message: Message, session: Session) -> None:
     """Обработчик команды /edit — редактирование параметров."""
-    data = await state.get_data()
-    
     username = get_user_display_name(message.from_user)
     chat_logger.log_message(
         user_id=message.from_user.id, username=username, message="/edit", is_bot=False
     )
     
     # Проверяем наличие активного расчёта
-    if not data.get("area"):
+    if not session.area:
         await message.answer(NO_CALCULATION_MESSAGE, parse_mode=ParseMode.HTML)
         chat_logger.log_message(
             user_id=message.from_user.id, username="БОТ", message=NO_CALCULATION_MESSAGE, is_bot=True
@@ -124,7 +103,7 @@ async def cmd_edit(message: Message, state: FSMContext) -> None:
     
     await message.answer(
         EDIT_PARAMS_MESSAGE,
-        reply_markup=get_edit_params_keyboard(data),
+        reply_markup=stamp(get_edit_params_keyboard(session), session.keyboard_generation),
         parse_mode=ParseMode.HTML
     )
     chat_logger.log_message(
@@ -0,0 +1,111 @@
+"""Поколения клавиатур: кнопки предыдущих расчётов отклоняются без обработки.
+
+Каждый новый расчёт (показ приветствия) начинает следующее поколение
+пользователя, и callback_data кнопок, отправленных в его рамках, несёт
+номер поколения: ``g:3:wall_yes``. Текущее поколение хранится в сессии
+(Session.keyboard_generation), поэтому сохраняется и вытесняется вместе с
+ней, а его копия — в ограниченной таблице в памяти: нажатие сверяется по
+ней без чтения хранилища, и сессия читается, только если пользователя в
+таблице нет. Если записи о поколении нет и в сессии (сессия вытеснена или
+бот перезапущен с хранилищем в памяти), любое поколение считается текущим.
+"""
+
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from app.bot.keyboards.inline import is_prebuilt, register_prebuilt
+
+# Номера идут по кругу: кнопка снова совпадёт с текущим поколением через
+# столько новых расчётов. Больше — реже такое совпадение, но больше вариантов
+# постоянных клавиатур в _stamped (до числа постоянных клавиатур × GENERATIONS)
+GENERATIONS = 64
+
+# Сколько пользователей помнит таблица поколений; вытесняются давно не начинавшие расчёт
+MAX_TRACKED_USERS = 100_000
+
+# Кнопки, которые работают и на клавиатурах старых расчётов
+UNVERSIONED = frozenset({"start_calculation", "method_manager"})
+
+
+class Press(CallbackData, prefix="g"):
+    """callback_data кнопки с номером поколения."""
+
+    generation: int
+    action: str
+
+
+# Постоянные клавиатуры с номером поколения: (id клавиатуры, поколение) -> клавиатура
+_stamped: dict[tuple[int, int], InlineKeyboardMarkup] = {}
+
+# Текущее поколение пользователя в порядке начала расчёта: user_id -> поколение
+_current: dict[int, int] = {}
+
+
+def next_generation(current: int | None) -> int:
+    """Номер следующего поколения: кнопки прошлых расчётов устаревают."""
+    return 0 if current is None else (current + 1) % GENERATIONS
+
+
+def remember_generation(user_id: int, generation: int) -> None:
+    """Запоминает текущее поколение пользователя, вытесняя самую старую запись."""
+    _current.pop(user_id, None)
+    _current[user_id] = generation
+    if len(_current) > MAX_TRACKED_USERS:
+        del _current[next(iter(_current))]
+
+
+def known_generation(user_id: int) -> int | None:
+    """Текущее поколение из таблицы в памяти; None — пользователя в таблице нет."""
+    return _current.get(user_id)
+
+
+def is_current(generation: int, current: int | None) -> bool:
+    """Кнопка из текущего поколения; без записи о поколении — любая."""
+    return current is None or generation == current
+
+
+def parse_press(data: str) -> tuple[int, str] | None:
+    """Разбирает строку Press.pack() без валидации pydantic.
+
+    Returns:
+        (поколение, исходная callback_data) или None для кнопки без поколения
+    """
+    prefix, _, rest = data.partition(Press.__separator__)
+    generation, separator, action = rest.partition(Press.__separator__)
+    if prefix != Press.__prefix__ or not separator or not generation.isdigit():
+        return None
+    return int(generation), action
+
+
+def _with_generation(markup: InlineKeyboardMarkup, generation: int) -> InlineKeyboardMarkup:
+    """Копия клавиатуры, в которой callback_data кнопок несёт номер поколения."""
+
+    def stamp_button(button: InlineKeyboardButton) -> InlineKeyboardButton:
+        action = button.callback_data
+        if action is None or action in UNVERSIONED:
+            return button
+        packed = Press(generation=generation, action=action).pack()
+        return button.model_copy(update={"callback_data": packed})
+
+    return InlineKeyboardMarkup(
+        inline_keyboard=[[stamp_button(b) for b in row] for row in markup.inline_keyboard]
+    )
+
+
+def stamp(markup: InlineKeyboardMarkup, generation: int | None) -> InlineKeyboardMarkup:
+    """Клавиатура с поколением из сессии (без поколения — как есть).
+
+    Варианты постоянных клавиатур собираются один раз на поколение и
+    тоже попадают в реестр постоянных (их JSON кэширует BotSession).
+    """
+    if generation is None:
+        return markup
+    if not is_prebuilt(markup):
+        return _with_generation(markup, generation)
+
+    key = (id(markup), generation)
+    stamped = _stamped.get(key)
+    if stamped is None:
+        stamped = _stamped[key] = _with_generation(markup, generation)
+        register_prebuilt(stamped)
+    return stamped
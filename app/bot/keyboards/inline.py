@@ -1,8 +1,18 @@
-"""Inline клавиатуры для выбора параметров."""
+"""Inline клавиатуры для выбора параметров.
+
+Постоянные клавиатуры собираются один раз, а для мультивыбора заранее
+собраны все варианты отметок — на каждый апдейт остаётся только поиск.
+"""
+
+from functools import cache
+from itertools import chain, combinations
 
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
+from app.schemas.session import Session
 
+
+@cache
 def get_back_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура только с кнопкой 'Назад' для текстовых вопросов."""
     return InlineKeyboardMarkup(
@@ -12,6 +22,7 @@ def get_back_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+@cache
 def get_skip_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура с кнопками 'Пропустить' и 'Назад'."""
     return InlineKeyboardMarkup(
@@ -22,6 +33,7 @@ def get_skip_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+@cache
 def get_skip_row_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура с кнопками 'Назад' и 'Пропустить' в один ряд."""
     return InlineKeyboardMarkup(
@@ -48,6 +60,7 @@ def add_back_button(keyboard: InlineKeyboardMarkup) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=new_rows)
 
 
+@cache
 def get_contact_method_keyboard() -> InlineKeyboardMarkup:
     """Выбор способа связи."""
     return InlineKeyboardMarkup(
@@ -66,6 +79,7 @@ def get_contact_method_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+@cache
 def get_profile_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора профиля."""
     keyboard = InlineKeyboardMarkup(
@@ -82,6 +96,7 @@ def get_profile_keyboard() -> InlineKeyboardMarkup:
     return add_back_button(keyboard)
 
 
+@cache
 def get_cornice_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора карниза."""
     return InlineKeyboardMarkup(
@@ -105,87 +120,95 @@ def get_cornice_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+LIGHTING_OPTIONS: tuple[tuple[str, str], ...] = (
+    ("spotlights", "Точечные светильники"),
+    ("tracks", "Трековые линии"),
+    ("light_lines", "Световые линии"),
+    ("chandeliers", "Люстры"),
+)
+SPOTLIGHT_OPTIONS: tuple[tuple[str, str], ...] = (
+    ("builtin", "Встроенные"),
+    ("surface", "Накладные"),
+    ("pendant", "Подвесные"),
+)
+TRACK_OPTIONS: tuple[tuple[str, str], ...] = (
+    ("surface", "Накладные"),
+    ("builtin", "Встроенные"),
+)
+
+
+def _build_toggle_keyboard(
+    options: tuple[tuple[str, str], ...],
+    selected: frozenset[str],
+    toggle_prefix: str,
+    skip_data: str,
+    done_data: str,
+) -> InlineKeyboardMarkup:
+    """Собирает клавиатуру мультивыбора с отметками выбранных вариантов."""
+    rows = [
+        [
+            InlineKeyboardButton(
+                text=f"✅ {label}" if key in selected else label,
+                callback_data=f"{toggle_prefix}{key}",
+            )
+        ]
+        for key, label in options
+    ]
+    rows.append(
+        [
+            InlineKeyboardButton(text="⬅️ Назад", callback_data="go_back"),
+            InlineKeyboardButton(text="Пропустить ➡️", callback_data=skip_data),
+        ]
+    )
+    rows.append([InlineKeyboardButton(text="Готово ✅", callback_data=done_data)])
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def _build_toggle_variants(
+    options: tuple[tuple[str, str], ...], toggle_prefix: str, skip_data: str, done_data: str
+) -> dict[frozenset[str], InlineKeyboardMarkup]:
+    """Заранее собирает клавиатуру для каждого из 2^n состояний мультивыбора."""
+    keys = [key for key, _ in options]
+    subsets = chain.from_iterable(combinations(keys, size) for size in range(len(keys) + 1))
+    return {
+        frozenset(subset): _build_toggle_keyboard(
+            options, frozenset(subset), toggle_prefix, skip_data, done_data
+        )
+        for subset in subsets
+    }
+
+
+_LIGHTING_KEYBOARDS = _build_toggle_variants(
+    LIGHTING_OPTIONS, "toggle_", "lighting_skip", "lighting_done"
+)
+_SPOTLIGHT_KEYBOARDS = _build_toggle_variants(
+    SPOTLIGHT_OPTIONS, "toggle_spot_", "spotlights_skip", "spotlights_done"
+)
+_TRACK_KEYBOARDS = _build_toggle_variants(
+    TRACK_OPTIONS, "toggle_track_", "tracks_skip", "tracks_done"
+)
+
+
 def get_lighting_types_keyboard(selected: set[str]) -> InlineKeyboardMarkup:
     """Клавиатура множественного выбора типов освещения.
     
     Args:
         selected: Множество выбранных типов ('spotlights', 'tracks', 'light_lines', 'chandeliers')
     """
-    def mark(key: str, label: str) -> str:
-        return f"✅ {label}" if key in selected else label
-    
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text=mark("spotlights", "Точечные светильники"),
-                    callback_data="toggle_spotlights"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text=mark("tracks", "Трековые линии"),
-                    callback_data="toggle_tracks"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text=mark("light_lines", "Световые линии"),
-                    callback_data="toggle_light_lines"
-                ),
-            ],
-            [
-                InlineKeyboardButton(
-                    text=mark("chandeliers", "Люстры"),
-                    callback_data="toggle_chandeliers"
-                ),
-            ],
-            [
-                InlineKeyboardButton(text="⬅️ Назад", callback_data="go_back"),
-                InlineKeyboardButton(text="Пропустить ➡️", callback_data="lighting_skip"),
-            ],
-            [InlineKeyboardButton(text="Готово ✅", callback_data="lighting_done")],
-        ]
-    )
+    return _LIGHTING_KEYBOARDS[frozenset(selected)]
 
 
 def get_spotlight_types_keyboard(selected: set[str]) -> InlineKeyboardMarkup:
     """Клавиатура мультивыбора типов светильников."""
-    def mark(key: str, label: str) -> str:
-        return f"✅ {label}" if key in selected else label
-    
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=mark("builtin", "Встроенные"), callback_data="toggle_spot_builtin")],
-            [InlineKeyboardButton(text=mark("surface", "Накладные"), callback_data="toggle_spot_surface")],
-            [InlineKeyboardButton(text=mark("pendant", "Подвесные"), callback_data="toggle_spot_pendant")],
-            [
-                InlineKeyboardButton(text="⬅️ Назад", callback_data="go_back"),
-                InlineKeyboardButton(text="Пропустить ➡️", callback_data="spotlights_skip"),
-            ],
-            [InlineKeyboardButton(text="Готово ✅", callback_data="spotlights_done")],
-        ]
-    )
+    return _SPOTLIGHT_KEYBOARDS[frozenset(selected)]
 
 
 def get_track_types_keyboard(selected: set[str]) -> InlineKeyboardMarkup:
     """Клавиатура мультивыбора типов треков."""
-    def mark(key: str, label: str) -> str:
-        return f"✅ {label}" if key in selected else label
-    
-    return InlineKeyboardMarkup(
-        inline_keyboard=[
-            [InlineKeyboardButton(text=mark("surface", "Накладные"), callback_data="toggle_track_surface")],
-            [InlineKeyboardButton(text=mark("builtin", "Встроенные"), callback_data="toggle_track_builtin")],
-            [
-                InlineKeyboardButton(text="⬅️ Назад", callback_data="go_back"),
-                InlineKeyboardButton(text="Пропустить ➡️", callback_data="tracks_skip"),
-            ],
-            [InlineKeyboardButton(text="Готово ✅", callback_data="tracks_done")],
-        ]
-    )
+    return _TRACK_KEYBOARDS[frozenset(selected)]
 
 
+@cache
 def get_wall_finish_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура выбора чистовых работ стен."""
     keyboard = InlineKeyboardMarkup(
@@ -199,6 +222,7 @@ def get_wall_finish_keyboard() -> InlineKeyboardMarkup:
     return add_back_button(keyboard)
 
 
+@cache
 def get_result_keyboard() -> InlineKeyboardMarkup:
     """Клавиатура после результата."""
     return InlineKeyboardMarkup(
@@ -227,27 +251,24 @@ def get_result_keyboard() -> InlineKeyboardMarkup:
     )
 
 
-def get_edit_params_keyboard(data: dict) -> InlineKeyboardMarkup:
+def get_edit_params_keyboard(session: Session) -> InlineKeyboardMarkup:
     """Клавиатура выбора параметра для редактирования."""
-    area = data.get("area", "—")
-    profile = data.get("profile_type", "—")
-    cornice = data.get("cornice_type")
-    cornice_length = data.get("cornice_length", 0)
+    area = "—" if session.area is None else session.area
+    profile = session.profile_type or "—"
+    cornice = session.cornice_type
+    cornice_length = session.cornice_length or 0
     
     # Светильники по типам
-    spots_builtin = data.get("spotlights_builtin", 0)
-    spots_surface = data.get("spotlights_surface", 0)
-    spots_pendant = data.get("spotlights_pendant", 0)
-    spots_total = spots_builtin + spots_surface + spots_pendant
+    spots_total = (
+        session.spotlights_builtin + session.spotlights_surface + session.spotlights_pendant
+    )
     
     # Треки по типам
-    track_surface = data.get("track_surface_length", 0)
-    track_builtin = data.get("track_builtin_length", 0)
-    track_total = track_surface + track_builtin
+    track_total = session.track_surface_length + session.track_builtin_length
     
-    light_lines = data.get("light_lines", 0)
-    chandeliers = data.get("chandeliers", 0)
-    wall_finish = data.get("wall_finish")
+    light_lines = session.light_lines
+    chandeliers = session.chandeliers
+    wall_finish = session.wall_finish
     
     profile_names = {"insert": "Со вставкой", "shadow": "Теневой", "floating": "Парящий"}
     profile_display = profile_names.get(profile, profile)
@@ -273,3 +294,38 @@ def get_edit_params_keyboard(data: dict) -> InlineKeyboardMarkup:
             [InlineKeyboardButton(text="⬅️ Назад к результату", callback_data="back_to_result")],
         ]
     )
+
+
+_PREBUILT_MARKUP_IDS = set(
+    id(markup)
+    for markup in (
+        get_back_keyboard(),
+        get_skip_keyboard(),
+        get_skip_row_keyboard(),
+        get_contact_method_keyboard(),
+        get_profile_keyboard(),
+        get_cornice_keyboard(),
+        get_wall_finish_keyboard(),
+        get_result_keyboard(),
+        *_LIGHTING_KEYBOARDS.values(),
+        *_SPOTLIGHT_KEYBOARDS.values(),
+        *_TRACK_KEYBOARDS.values(),
+    )
+)
+
+
+def register_prebuilt(markup: InlineKeyboardMarkup) -> None:
+    """Добавляет в реестр клавиатуру, которая тоже не меняется между апдейтами."""
+    _PREBUILT_MARKUP_IDS.add(id(markup))
+
+
+def is_prebuilt(markup: object) -> bool:
+    """Проверяет, что клавиатура взята из реестра и не меняется между апдейтами.
+
+    Args:
+        markup: Клавиатура из параметра reply_markup
+
+    Returns:
+        True для постоянных клавиатур и заранее собранных вариантов мультивыбора
+    """
+    return id(markup) in _PREBUILT_MARKUP_IDS
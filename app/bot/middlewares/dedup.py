@@ -0,0 +1,64 @@
+"""Middleware защиты от повторного нажатия кнопки."""
+
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, TelegramObject
+
+from app.core.config import settings
+from app.utils.callback import safe_answer_callback
+
+# Нажатие: чат, сообщение, его версия (edit_date) и callback_data
+PressKey = tuple[int, int, int | None, str]
+
+
+class DuplicateCallbackMiddleware(BaseMiddleware):
+    """Повтор нажатия той же кнопки того же сообщения подтверждается, но не обрабатывается.
+
+    Нажатие считается повтором, если с прошлого прошло меньше
+    CALLBACK_DEDUP_WINDOW секунд и сообщение с тех пор не менялось:
+    в режиме одного сообщения следующий шаг редактирует сообщение, и
+    та же кнопка на нём — уже новое нажатие. Регистрируется внешним
+    middleware: повтор отсекается до фильтров и хендлеров.
+    """
+
+    def __init__(self, window: float | None = None) -> None:
+        self.window = settings.callback_dedup_window if window is None else window
+        # Нажатия в порядке поступления: старые удаляются с начала
+        self.presses: dict[PressKey, float] = {}
+
+    def _evict(self, now: float) -> None:
+        """Удаляет нажатия старше окна."""
+        while self.presses:
+            key, pressed_at = next(iter(self.presses.items()))
+            if now - pressed_at < self.window:
+                break
+            del self.presses[key]
+
+    def is_duplicate(self, callback: CallbackQuery) -> bool:
+        """Запоминает нажатие и сообщает, было ли такое же в пределах окна."""
+        message = callback.message
+        if message is None or callback.data is None:
+            return False
+        edit_date = getattr(message, "edit_date", None)
+        key = (message.chat.id, message.message_id, edit_date, callback.data)
+
+        now = time.monotonic()
+        self._evict(now)
+        if key in self.presses:
+            return True
+        self.presses[key] = now
+        return False
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Пропускает в хендлер только первое из повторных нажатий."""
+        if self.window > 0 and isinstance(event, CallbackQuery) and self.is_duplicate(event):
+            await safe_answer_callback(event)
+            return None
+        return await handler(event, data)
@@ -0,0 +1,46 @@
+"""Middleware контекста логов: к записям во время апдейта добавляются его поля."""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.core.logging import log_context
+from app.monitoring.tracing import current_span
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: ставит user_id, chat_id, update_id и state.
+
+    Регистрируется после middleware aiogram, которые определяют
+    пользователя и состояние FSM, и после корня трейса: при записи
+    трейса в контекст попадает и trace_id.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Обрабатывает апдейт с контекстом логов."""
+        context: dict[str, Any] = {}
+        if isinstance(event, Update):
+            context["update_id"] = event.update_id
+        user = data.get("event_from_user")
+        if user is not None:
+            context["user_id"] = user.id
+        chat = data.get("event_chat")
+        if chat is not None and (user is None or chat.id != user.id):
+            context["chat_id"] = chat.id
+        if data.get("raw_state"):
+            context["state"] = data["raw_state"]
+        span = current_span()
+        if span is not None:
+            context["trace_id"] = span.trace_id
+
+        token = log_context.set(context)
+        try:
+            return await handler(event, data)
+        finally:
+            log_context.reset(token)
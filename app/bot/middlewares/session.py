@@ -0,0 +1,44 @@
+"""Middleware загрузки и сохранения типизированной сессии."""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import TelegramObject
+
+from app.monitoring.tracing import span
+from app.schemas.session import Session
+
+
+class SessionMiddleware(BaseMiddleware):
+    """Передаёт хендлеру `session: Session` и сохраняет её после обработки.
+
+    Данные FSM читаются один раз на апдейт; запись в хранилище происходит,
+    только если хендлер изменил сессию.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Загружает сессию до хендлера и сохраняет изменения после него."""
+        state: FSMContext | None = data.get("state")
+        if state is None:
+            return await handler(event, data)
+
+        # Нажатие кнопки с поколением уже прочитало данные (StaleButtonMiddleware)
+        loaded = data.pop("session_data", None)
+        if loaded is None:
+            with span("fsm.get_data"):
+                loaded = await state.get_data()
+        session = Session.from_data(loaded)
+        data["session"] = session
+        try:
+            return await handler(event, data)
+        finally:
+            saved = session.to_data()
+            if saved != loaded:
+                with span("fsm.set_data"):
+                    await state.set_data(saved)
@@ -0,0 +1,61 @@
+"""Middleware отклонения кнопок из предыдущих расчётов."""
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, TelegramObject
+
+from app.bot.keyboards.generation import (
+    is_current,
+    known_generation,
+    parse_press,
+    remember_generation,
+)
+from app.monitoring.tracing import span
+from app.templates.messages.texts import STALE_BUTTON_MESSAGE
+from app.utils.callback import safe_answer_callback
+
+
+class StaleButtonMiddleware(BaseMiddleware):
+    """Сверяет поколение кнопки с текущим поколением пользователя.
+
+    Текущее поколение берётся из таблицы в памяти (см.
+    app.bot.keyboards.generation), так что нажатие проверяется без чтения
+    хранилища. Только если пользователя в таблице нет (перезапуск или
+    вытеснение), поколение читается из сессии и запоминается; прочитанные
+    данные FSM тогда кладутся в ``data["session_data"]``, и
+    SessionMiddleware не читает их второй раз.
+
+    Устаревшее нажатие получает короткий ответ и дальше не идёт: ни
+    фильтров, ни хендлера. У актуального нажатия номер поколения
+    снимается, и хендлеры видят исходную callback_data. Кнопки без
+    поколения пропускаются как есть.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Отклоняет устаревшее нажатие или передаёт его хендлерам без поколения."""
+        if not isinstance(event, CallbackQuery) or not event.data:
+            return await handler(event, data)
+        press = parse_press(event.data)
+        if press is None:
+            return await handler(event, data)
+
+        generation, action = press
+        current = known_generation(event.from_user.id)
+        state: FSMContext | None = data.get("state")
+        if current is None and state is not None:
+            with span("fsm.get_data"):
+                data["session_data"] = await state.get_data()
+            current = data["session_data"].get("keyboard_generation")
+            if current is not None:
+                remember_generation(event.from_user.id, current)
+        if not is_current(generation, current):
+            await safe_answer_callback(event, STALE_BUTTON_MESSAGE)
+            return None
+        return await handler(event.model_copy(update={"data": action}), data)
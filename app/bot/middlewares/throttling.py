@@ -0,0 +1,109 @@
+"""Middleware защиты от флуда: token bucket на пользователя."""
+
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.enums import ParseMode
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+
+from app.bot.flow.graph import ADDRESS, WALL_FINISH
+from app.core.config import settings
+from app.templates.messages.texts import THROTTLED_MESSAGE
+from app.utils.callback import safe_answer_callback
+from app.utils.token_bucket import Bucket, TokenBuckets
+
+logger = logging.getLogger(__name__)
+
+# Кнопки, после которых загружаются картинки или показывается результат
+EXPENSIVE_ACTIONS = frozenset({"start_calculation", "back_to_result"})
+
+# Ответ в этих состояниях завершает расчёт или заказ замера: результат и уведомление менеджерам
+EXPENSIVE_STATES = frozenset({WALL_FINISH.state.state, ADDRESS.state.state})
+
+
+def is_expensive(event: TelegramObject, raw_state: str | None) -> bool:
+    """Вызовет ли апдейт загрузку картинок, результат или уведомление менеджерам."""
+    if raw_state in EXPENSIVE_STATES:
+        return True
+    if isinstance(event, CallbackQuery):
+        return event.data in EXPENSIVE_ACTIONS
+    return isinstance(event, Message) and (event.text or "").startswith("/start")
+
+
+async def raw_state(data: Dict[str, Any]) -> str | None:
+    """Состояние пользователя прямо из хранилища FSM, без блокировки изоляции."""
+    dispatcher = data.get("dispatcher")
+    context = dispatcher.fsm.resolve_event_context(data["bot"], data) if dispatcher else None
+    return await context.get_state() if context else None
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Ограничивает частоту апдейтов одного пользователя.
+
+    Каждый апдейт забирает токен из общего ведра пользователя (throttle_rate
+    в секунду, запас throttle_burst), дорогой — ещё и из отдельного, более
+    строгого ведра. Лишнее нажатие получает только ответ на callback,
+    лишнее сообщение — одно предупреждение на серию. Регистрируется внешним
+    middleware апдейтов до ShutdownCoordinator.setup, то есть снаружи FSM:
+    отброшенный апдейт не ждёт блокировку пользователя, не загружает сессию
+    и не пишет лог. Состояние для проверки дорогих шагов читается из
+    хранилища без блокировки и только у апдейтов, прошедших общее ведро.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: int | None = None,
+        expensive_rate: float | None = None,
+        expensive_burst: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        rate = settings.throttle_rate if rate is None else rate
+        if expensive_rate is None:
+            expensive_rate = settings.throttle_expensive_rate
+        self.enabled = rate > 0
+        self.updates = TokenBuckets(rate, burst or settings.throttle_burst)
+        self.expensive = TokenBuckets(
+            expensive_rate, expensive_burst or settings.throttle_expensive_burst
+        )
+        self.clock = clock
+
+    async def throttle(
+        self, event: TelegramObject, user_id: int, data: Dict[str, Any]
+    ) -> Bucket | None:
+        """Ведро, исчерпавшее лимит, или None, если апдейт можно обрабатывать."""
+        now = self.clock()
+        exhausted = self.updates.take(user_id, now)
+        if exhausted is None and self.expensive.rate > 0:
+            if is_expensive(event, None) or is_expensive(event, await raw_state(data)):
+                exhausted = self.expensive.take(user_id, now)
+        return exhausted
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Отбрасывает апдейт пользователя, превысившего лимит."""
+        user = data.get("event_from_user")
+        message = event.event if isinstance(event, Update) else event
+        if not self.enabled or user is None or not isinstance(message, (Message, CallbackQuery)):
+            return await handler(event, data)
+
+        exhausted = await self.throttle(message, user.id, data)
+        if exhausted is None:
+            return await handler(event, data)
+
+        if isinstance(message, CallbackQuery):
+            await safe_answer_callback(message, THROTTLED_MESSAGE)
+        elif not exhausted.warned:
+            exhausted.warned = True
+            logger.warning(f"Флуд от пользователя {user.id}, апдейты отбрасываются")
+            try:
+                await message.answer(THROTTLED_MESSAGE, parse_mode=ParseMode.HTML)
+            except Exception as e:
+                logger.error(f"Ошибка отправки предупреждения о флуде: {e}")
+        return None
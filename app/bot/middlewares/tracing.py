@@ -0,0 +1,127 @@
+"""Middleware трейсов: корень трейса апдейта, спаны middleware, хендлера и Bot API."""
+
+import random
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from app.core.config import settings
+from app.monitoring.tracing import (
+    KIND_CLIENT,
+    TraceExporter,
+    current_span,
+    span,
+    start_trace,
+    tracing_enabled,
+)
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+
+
+class TracingMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: начинает трейс и решает, записать ли его.
+
+    Записывается доля TRACE_SAMPLE_RATE апдейтов и, если задан
+    TRACE_SLOW_THRESHOLD, все апдейты дольше порога: для этого спаны
+    собираются у каждого апдейта, а в файл попадают только медленные.
+
+    Args:
+        exporter: Куда писать трейсы (по умолчанию файл TRACE_FILE)
+        sample_rate: Доля записываемых апдейтов
+        slow_threshold: Длительность апдейта (сек), после которой он записывается всегда
+    """
+
+    def __init__(
+        self,
+        exporter: TraceExporter | None = None,
+        sample_rate: float | None = None,
+        slow_threshold: float | None = None,
+    ) -> None:
+        self.exporter = exporter or TraceExporter()
+        self.sample_rate = settings.trace_sample_rate if sample_rate is None else sample_rate
+        self.slow_threshold = (
+            settings.trace_slow_threshold if slow_threshold is None else slow_threshold
+        )
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        """Обрабатывает апдейт внутри корневого спана."""
+        sampled = random.random() < self.sample_rate
+        if not sampled and self.slow_threshold <= 0:
+            return await handler(event, data)
+
+        attributes: dict[str, Any] = {}
+        if isinstance(event, Update):
+            attributes["telegram.update_type"] = event.event_type
+        user = data.get("event_from_user")
+        if user is not None:
+            attributes["enduser.id"] = user.id
+
+        root = None
+        try:
+            with start_trace("update", attributes) as root:
+                return await handler(event, data)
+        finally:
+            if root is not None and (sampled or root.duration >= self.slow_threshold):
+                self.exporter.export(root.spans)
+
+
+class TracedMiddleware(BaseMiddleware):
+    """Обёртка, которая выполняет middleware внутри спана с его именем."""
+
+    def __init__(self, middleware: BaseMiddleware) -> None:
+        self.middleware = middleware
+        self.name = f"middleware {type(middleware).__name__}"
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        """Вызывает обёрнутый middleware."""
+        if current_span() is None:
+            return await self.middleware(handler, event, data)
+        with span(self.name):
+            return await self.middleware(handler, event, data)
+
+
+def traced_middleware(middleware: BaseMiddleware) -> BaseMiddleware:
+    """Оборачивает middleware в спан, если трейсы включены, иначе возвращает его же."""
+    return TracedMiddleware(middleware) if tracing_enabled() else middleware
+
+
+class HandlerSpanMiddleware(BaseMiddleware):
+    """Внутренний middleware: спан хендлера, выбранного фильтрами.
+
+    Для нажатий, найденных по таблице маршрутов, в имени спана —
+    хендлер из таблицы, а не общий диспетчер.
+    """
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        """Вызывает хендлер внутри спана."""
+        if current_span() is None:
+            return await handler(event, data)
+        target = data.get("route") or data["handler"].callback
+        with span(f"handler {target.__qualname__}"):
+            return await handler(event, data)
+
+
+class TelegramSpanMiddleware(BaseRequestMiddleware):
+    """Middleware запросов: спан на каждый вызов Bot API, включая ожидание лимитов."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        """Выполняет запрос внутри спана с методом и чатом."""
+        if current_span() is None:
+            return await make_request(bot, method)
+        attributes: dict[str, Any] = {"telegram.method": method.__api_method__}
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None:
+            attributes["telegram.chat_id"] = chat_id
+        with span(f"telegram {method.__api_method__}", KIND_CLIENT, attributes):
+            return await make_request(bot, method)
@@ -0,0 +1,225 @@
+"""Планировщик исходящих запросов к Bot API: лимиты Telegram и повтор после 429.
+
+Все запросы с chat_id (отправка и редактирование сообщений) проходят
+через общее ведро на весь бот и ведро чата. Ответы на callback, getUpdates
+и служебные методы не ограничиваются. Когда общее ведро пусто, первыми
+получают токен ответы пользователям, а уведомления менеджерам, отправленные
+в контексте background_priority(), ждут. Фоновые отправки ставятся в
+background_sends: хендлер не ждёт их и не держит блокировку пользователя.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import Coroutine, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+from app.core.config import settings
+from app.monitoring.tracing import detached
+from app.utils.token_bucket import TokenBuckets
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Приоритет исходящего запроса: меньше — раньше."""
+
+    USER = 0
+    BACKGROUND = 1
+
+
+outbound_priority: ContextVar[Priority] = ContextVar("outbound_priority", default=Priority.USER)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Запросы внутри блока пропускают вперёд ответы пользователям."""
+    token = outbound_priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        outbound_priority.reset(token)
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    """Запрос в очереди общего ведра."""
+
+    priority: int
+    order: int
+    wake: asyncio.Future[None] | None = field(default=None, compare=False)
+
+
+class OutboundLimiter(BaseRequestMiddleware):
+    """Request middleware сессии бота: темп отправки и повтор после TelegramRetryAfter.
+
+    Общее ведро (OUTBOUND_RATE в секунду, без запаса: за любую секунду уходит
+    не больше OUTBOUND_RATE + 1 запросов) — очередь с приоритетами, ведро
+    чата (OUTBOUND_CHAT_RATE, для групп OUTBOUND_GROUP_RATE) выдаёт токены
+    в долг и возвращает время ожидания. Ответ 429 останавливает все
+    отправки на retry_after секунд, после чего запрос повторяется не больше
+    OUTBOUND_MAX_RETRIES раз.
+    """
+
+    def __init__(self) -> None:
+        self.rate = settings.outbound_rate
+        self.tokens = 1.0
+        self.updated = 0.0
+        self.paused_until = 0.0
+        self.waiters: list[_Waiter] = []
+        self._order = itertools.count()
+        burst = settings.outbound_chat_burst
+        self.chats = TokenBuckets(settings.outbound_chat_rate, burst)
+        self.groups = TokenBuckets(settings.outbound_group_rate, burst)
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(1.0, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def _acquire(self, priority: Priority) -> None:
+        """Ждёт токен общего ведра, пропуская вперёд запросы с меньшим приоритетом.
+
+        Токена ждёт только первый в очереди, остальные спят до своей очереди.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, next(self._order))
+        heapq.heappush(self.waiters, waiter)
+        try:
+            while True:
+                if self.waiters[0] is not waiter:
+                    waiter.wake = loop.create_future()
+                    await waiter.wake
+                    continue
+                now = loop.time()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    heapq.heappop(self.waiters)
+                    self.tokens -= 1
+                    self._wake_first()
+                    return
+                await asyncio.sleep(max(self.paused_until - now, (1 - self.tokens) / self.rate))
+        except BaseException:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+                heapq.heapify(self.waiters)
+                self._wake_first()
+            raise
+
+    def _wake_first(self) -> None:
+        """Будит запрос, ставший первым в очереди."""
+        if self.waiters:
+            wake = self.waiters[0].wake
+            if wake is not None and not wake.done():
+                wake.set_result(None)
+
+    async def _pace_chat(self, chat_id: int | str) -> TokenBuckets | None:
+        """Ждёт своей очереди в ведре чата; при отмене возвращает взятый токен.
+
+        Returns:
+            Вёдра, из которых взят токен (None — чат не ограничивается)
+        """
+        if not isinstance(chat_id, int):
+            return None
+        buckets = self.groups if chat_id < 0 else self.chats
+        if buckets.rate <= 0:
+            return None
+        delay = buckets.reserve(chat_id, asyncio.get_running_loop().time())
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                buckets.refund(chat_id)
+                raise
+        return buckets
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        """Отправляет запрос в пределах лимитов, повторяя его после 429."""
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+
+        buckets = await self._pace_chat(chat_id)
+        priority = outbound_priority.get()
+        retries = 0
+        while True:
+            try:
+                await self._acquire(priority)
+            except asyncio.CancelledError:
+                # Запрос отменён до первой отправки: токен чата не израсходован
+                if buckets is not None and not retries:
+                    buckets.refund(chat_id)
+                raise
+            try:
+                return await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                if retries >= settings.outbound_max_retries:
+                    raise
+                retries += 1
+                logger.warning(
+                    f"Лимит Telegram для {method.__api_method__} в чат {chat_id}, "
+                    f"повтор через {e.retry_after} с"
+                )
+                loop = asyncio.get_running_loop()
+                self.paused_until = max(self.paused_until, loop.time() + e.retry_after)
+
+
+class BackgroundSends:
+    """Фоновые отправки: хендлер ставит их в работу и не ждёт.
+
+    Задача создаётся с приоритетом BACKGROUND и вне трейса апдейта, поэтому
+    не держит блокировку изоляции пользователя и пропускает вперёд ответы
+    пользователям. На остановке незавершённые отправки дожидаются в drain().
+    """
+
+    def __init__(self) -> None:
+        self.tasks: set[asyncio.Task[None]] = set()
+
+    def submit(self, send: Coroutine[Any, Any, None], name: str) -> asyncio.Task[None]:
+        """Запускает отправку в фоне."""
+        with background_priority(), detached():
+            task = asyncio.create_task(self._run(send, name), name=name)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def _run(self, send: Coroutine[Any, Any, None], name: str) -> None:
+        try:
+            await send
+        except Exception as e:
+            logger.error(f"Ошибка фоновой отправки «{name}»: {e}")
+
+    async def drain(self, timeout: float | None = None) -> int:
+        """Ждёт фоновые отправки; не завершившиеся за timeout отменяются.
+
+        Returns:
+            Сколько отправок отменено
+        """
+        if not self.tasks:
+            return 0
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+        return len(pending)
+
+
+background_sends = BackgroundSends()
@@ -0,0 +1,103 @@
+"""Таблица маршрутов нажатий кнопок.
+
+Вместо последовательной проверки фильтров каждого хендлера callback_data
+разбирается один раз, а хендлер находится поиском в словаре по
+(состояние FSM, callback_data) или (состояние FSM, действие), где
+действие — часть callback_data до первого "_": ``profile_shadow`` ->
+``profile``. Не больше четырёх поисков на нажатие при любом числе кнопок.
+"""
+
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any
+
+from aiogram import Router
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+from app.schemas.session import Session
+
+CallbackHandler = Callable[[CallbackQuery, FSMContext, Session], Awaitable[Any]]
+
+# Ключ состояния для кнопок, которые работают в любом состоянии
+ANY_STATE = "*"
+
+RouteKey = tuple[str | None, str]
+
+
+def _state_keys(states: Iterable[State | None]) -> list[str | None]:
+    return [state.state if isinstance(state, State) else state for state in states]
+
+
+class CallbackRoutes:
+    """Маршруты нажатий: точные значения callback_data и действия с аргументом."""
+
+    def __init__(self) -> None:
+        self.exact: dict[RouteKey, CallbackHandler] = {}
+        self.actions: dict[RouteKey, CallbackHandler] = {}
+
+    @staticmethod
+    def _add(
+        table: dict[RouteKey, CallbackHandler], keys: Iterable[RouteKey], handler: CallbackHandler
+    ) -> None:
+        for key in keys:
+            if key in table:
+                raise ValueError(f"Маршрут {key} уже занят хендлером {table[key].__name__}")
+            table[key] = handler
+
+    def on(
+        self, *data: str, states: Iterable[State | None] = (ANY_STATE,)
+    ) -> Callable[[CallbackHandler], CallbackHandler]:
+        """Регистрирует хендлер для точных значений callback_data.
+
+        Args:
+            data: Значения callback_data
+            states: Состояния FSM, в которых кнопка работает (по умолчанию — в любом)
+        """
+
+        def register(handler: CallbackHandler) -> CallbackHandler:
+            keys = [(state, value) for state in _state_keys(states) for value in data]
+            self._add(self.exact, keys, handler)
+            return handler
+
+        return register
+
+    def on_action(
+        self, action: str, states: Iterable[State | None] = (ANY_STATE,)
+    ) -> Callable[[CallbackHandler], CallbackHandler]:
+        """Регистрирует хендлер для callback_data вида ``<action>_<аргумент>``."""
+
+        def register(handler: CallbackHandler) -> CallbackHandler:
+            self._add(self.actions, [(state, action) for state in _state_keys(states)], handler)
+            return handler
+
+        return register
+
+    def resolve(self, state: str | None, data: str) -> CallbackHandler | None:
+        """Хендлер нажатия: сначала точное значение, затем действие; сначала для состояния."""
+        exact = self.exact
+        handler = exact.get((state, data)) or exact.get((ANY_STATE, data))
+        if handler is None:
+            action = data.partition("_")[0]
+            handler = self.actions.get((state, action)) or self.actions.get((ANY_STATE, action))
+        return handler
+
+    def match(self, callback: CallbackQuery, raw_state: str | None = None) -> dict[str, Any] | bool:
+        """Фильтр aiogram: находит хендлер и передаёт его в route."""
+        handler = self.resolve(raw_state, callback.data or "")
+        return False if handler is None else {"route": handler}
+
+    def build_router(self) -> Router:
+        """Роутер с одним хендлером, который вызывает найденный по таблице."""
+        router = Router(name="callbacks")
+        router.callback_query.register(_dispatch, self.match)
+        return router
+
+
+async def _dispatch(
+    callback: CallbackQuery, state: FSMContext, session: Session, route: CallbackHandler
+) -> None:
+    await route(callback, state, session)
+
+
+callbacks = CallbackRoutes()
@@ -0,0 +1,98 @@
+"""HTTP-сессия бота для запросов к Telegram Bot API."""
+
+from typing import Any, TypeVar
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiohttp import FormData
+
+from app.bot.keyboards.inline import is_prebuilt
+from app.bot.middlewares.tracing import TelegramSpanMiddleware
+from app.bot.outbound import OutboundLimiter
+from app.core.config import settings
+from app.monitoring.tracing import tracing_enabled
+
+T = TypeVar("T")
+
+# Методы с загрузкой файлов: им нужен больший таймаут
+UPLOAD_METHODS = frozenset(
+    {"sendPhoto", "sendDocument", "sendMediaGroup", "editMessageMedia", "sendVideo"}
+)
+
+
+class BotSession(AiohttpSession):
+    """Aiohttp-сессия, которая сериализует постоянные клавиатуры один раз.
+
+    Клавиатуры из реестра `app.bot.keyboards.inline` не меняются между
+    апдейтами, поэтому их JSON кэшируется по идентификатору объекта.
+    Отправка идёт через планировщик OutboundLimiter (лимиты Telegram и
+    повтор после 429); при включённых трейсах каждый запрос — спан.
+
+    Args:
+        keepalive_timeout: Сколько секунд держать простаивающее соединение открытым
+        dns_ttl: Сколько секунд кэшировать адрес api.telegram.org
+        upload_timeout: Таймаут запросов с загрузкой файлов (по умолчанию общий)
+        kwargs: Параметры AiohttpSession: limit (размер пула), timeout, api
+    """
+
+    def __init__(
+        self,
+        keepalive_timeout: float = 15.0,
+        dns_ttl: int = 3600,
+        upload_timeout: float | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self._connector_init.update(keepalive_timeout=keepalive_timeout, ttl_dns_cache=dns_ttl)
+        self.upload_timeout = upload_timeout
+        self._markup_json: dict[int, str] = {}
+        # Спан запроса включает ожидание в планировщике и повторы после 429
+        if tracing_enabled():
+            self.middleware(TelegramSpanMiddleware())
+        if settings.outbound_rate > 0:
+            self.middleware(OutboundLimiter())
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[T], timeout: int | None = None
+    ) -> T:
+        """Отправляет запрос; загрузкам файлов даёт отдельный таймаут."""
+        if timeout is None and method.__api_method__ in UPLOAD_METHODS:
+            timeout = self.upload_timeout
+        return await super().make_request(bot, method, timeout)
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod[Any]) -> FormData:
+        """Собирает тело запроса, подставляя готовый JSON постоянной клавиатуры."""
+        markup = getattr(method, "reply_markup", None)
+        if not is_prebuilt(markup):
+            return super().build_form_data(bot, method)
+
+        form = FormData(quote_fields=False)
+        files: dict[str, Any] = {}
+        for key, value in method.model_dump(warnings=False, exclude={"reply_markup"}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if value:
+                form.add_field(key, value)
+        form.add_field("reply_markup", self._prepared_markup(bot, markup))
+        for key, input_file in files.items():
+            form.add_field(key, input_file.read(bot), filename=input_file.filename or key)
+        return form
+
+    def _prepared_markup(self, bot: Bot, markup: Any) -> str:
+        """Возвращает JSON клавиатуры, сериализуя её только при первом обращении."""
+        cached = self._markup_json.get(id(markup))
+        if cached is None:
+            cached = self.prepare_value(markup, bot=bot, files={})
+            self._markup_json[id(markup)] = cached
+        return cached
+
+
+def create_bot_session() -> BotSession:
+    """Сессия бота с пулом соединений и таймаутами из настроек HTTP_*."""
+    return BotSession(
+        limit=settings.http_pool_size,
+        timeout=settings.http_timeout,
+        keepalive_timeout=settings.http_keepalive,
+        dns_ttl=settings.http_dns_ttl,
+        upload_timeout=settings.http_upload_timeout,
+    )
@@ -0,0 +1,126 @@
+"""Плавная остановка: дождаться апдейтов в обработке и сбросить буферы.
+
+При SIGTERM aiogram останавливает polling и вызывает хендлеры shutdown,
+а затем закрывает HTTP-сессию. Апдейты, которые в этот момент ещё
+обрабатываются (например, отправка заявки менеджерам), при этом обрывались.
+ShutdownCoordinator отслеживает апдейты в обработке, на остановке ждёт их
+не дольше SHUTDOWN_TIMEOUT секунд и только потом сбрасывает логи и
+закрывает хранилище FSM.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Dict
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.fsm.middleware import FSMContextMiddleware
+from aiogram.types import TelegramObject
+
+from app.bot.middlewares.tracing import traced_middleware
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Flush = Callable[[], Awaitable[Any] | None]
+
+
+class InFlightMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: запоминает задачи, которые их обрабатывают."""
+
+    def __init__(self) -> None:
+        self.tasks: set[asyncio.Task[Any]] = set()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Держит задачу апдейта в наборе, пока он обрабатывается."""
+        task = asyncio.current_task()
+        if task is None:
+            return await handler(event, data)
+        self.tasks.add(task)
+        try:
+            return await handler(event, data)
+        finally:
+            self.tasks.discard(task)
+
+
+class ShutdownCoordinator:
+    """Порядок остановки: апдейты в обработке, затем зарегистрированные сбросы.
+
+    Args:
+        timeout: Сколько секунд ждать апдейты в обработке (по умолчанию SHUTDOWN_TIMEOUT)
+    """
+
+    def __init__(self, timeout: float | None = None) -> None:
+        self.timeout = settings.shutdown_timeout if timeout is None else timeout
+        self.in_flight = InFlightMiddleware()
+        self.flushes: list[tuple[str, Flush]] = []
+        self.fsm: FSMContextMiddleware | None = None
+
+    def setup(self, dp: Dispatcher) -> None:
+        """Подключает отслеживание апдейтов, FSM и остановку.
+
+        Диспетчер создаётся с disable_fsm=True и своим dp.fsm: закрытие FSM,
+        которое aiogram регистрирует первым хендлером dp.shutdown, тогда
+        относится к пустому FSM по умолчанию, а хранилище закрывает координатор
+        после апдейтов в обработке и сбросов. Отслеживание стоит снаружи FSM,
+        поэтому учитываются и апдейты, ждущие блокировку изоляции пользователя;
+        при включённых трейсах это ожидание и загрузка состояния — спан FSM.
+        """
+        self.fsm = dp.fsm
+        dp.update.outer_middleware(self.in_flight)
+        dp.update.outer_middleware(traced_middleware(self.fsm))
+        dp.shutdown.register(self.shutdown)
+
+    def on_flush(self, name: str, flush: Flush) -> None:
+        """Регистрирует сброс буфера, который выполняется после апдейтов в обработке."""
+        self.flushes.append((name, flush))
+
+    async def drain(self) -> int:
+        """Ждёт апдейты в обработке не дольше timeout.
+
+        Returns:
+            Сколько апдейтов так и не завершилось
+        """
+        pending = self.in_flight.tasks - {asyncio.current_task()}
+        if not pending:
+            return 0
+        logger.info(f"Ожидание апдейтов в обработке: {len(pending)}")
+        _, unfinished = await asyncio.wait(pending, timeout=self.timeout)
+        return len(unfinished)
+
+    async def shutdown(self) -> None:
+        """Хендлер dp.shutdown: дожидается апдейтов, выполняет сбросы и закрывает FSM."""
+        started = time.perf_counter()
+        unfinished = await self.drain()
+        drained = time.perf_counter() - started
+        if unfinished:
+            logger.error(f"Не дождались {unfinished} апдейтов за {self.timeout} с")
+        else:
+            logger.info(f"Апдейты в обработке завершены за {drained:.2f} с")
+
+        flushes = list(self.flushes)
+        if self.fsm is not None:
+            flushes.append(("хранилище FSM", self.fsm.close))
+        for name, flush in flushes:
+            flush_started = time.perf_counter()
+            try:
+                result = flush()
+                if result is not None:
+                    await result
+            except Exception as e:
+                logger.error(f"Ошибка сброса «{name}» при остановке: {e}")
+                continue
+            logger.info(f"Сброс «{name}»: {time.perf_counter() - flush_started:.3f} с")
+        logger.info(f"Остановка заняла {time.perf_counter() - started:.2f} с")
+
+
+def flush_log_handlers() -> None:
+    """Сбрасывает буферы обработчиков корневого логгера."""
+    for handler in logging.getLogger().handlers:
+        handler.flush()
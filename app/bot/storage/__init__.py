@@ -0,0 +1 @@
+"""Хранилища FSM."""
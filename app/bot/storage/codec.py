@@ -0,0 +1,188 @@
+"""Компактный версионированный бинарный формат данных сессии FSM.
+
+Известные поля кодируются по схеме: числа — фиксированной ширины,
+множества вариантов — битовой маской, строки — длиной и UTF-8, состояние
+FSM — номером в таблице состояний. Поля вне схемы дописываются в конец
+как JSON. Первый байт — версия схемы; данные старых версий при чтении
+проходят через цепочку миграций до текущей.
+"""
+
+import json
+import struct
+from collections.abc import Callable
+from typing import Any
+
+SCHEMA_VERSION = 3
+
+# Таблица состояний только дополняется в конец: номер — часть формата
+STATE_NAMES: tuple[str, ...] = tuple(
+    f"CalculationStates:{name}"
+    for name in (
+        "choosing_contact_method",
+        "waiting_for_area",
+        "choosing_profile",
+        "entering_cornice_length",
+        "choosing_cornice_type",
+        "choosing_lighting_types",
+        "choosing_spotlight_types",
+        "entering_spotlights_builtin",
+        "entering_spotlights_surface",
+        "entering_spotlights_pendant",
+        "choosing_track_types",
+        "entering_track_surface_length",
+        "entering_track_builtin_length",
+        "entering_light_lines",
+        "entering_chandeliers",
+        "choosing_wall_finish",
+        "showing_result",
+        "entering_name",
+        "entering_phone",
+        "entering_address",
+    )
+)
+STATE_IDS = {name: index for index, name in enumerate(STATE_NAMES)}
+NO_STATE = 0xFF
+
+LIGHTING_OPTIONS = ("spotlights", "tracks", "light_lines", "chandeliers")
+SPOTLIGHT_OPTIONS = ("builtin", "surface", "pendant")
+TRACK_OPTIONS = ("surface", "builtin")
+
+Kind = str | tuple[str, ...]
+
+# Схема версии 1: (ключ, вид). Вид — формат struct или кортеж вариантов множества
+FIELDS_V1: tuple[tuple[str, Kind], ...] = (
+    ("area", "d"),
+    ("profile_type", "s"),
+    ("cornice_type", "s"),
+    ("cornice_length", "d"),
+    ("selected_lighting", LIGHTING_OPTIONS),
+    ("selected_spotlight_types", SPOTLIGHT_OPTIONS),
+    ("spotlights_builtin", "i"),
+    ("spotlights_surface", "i"),
+    ("spotlights_pendant", "i"),
+    ("selected_track_types", TRACK_OPTIONS),
+    ("track_surface_length", "d"),
+    ("track_builtin_length", "d"),
+    ("light_lines", "d"),
+    ("chandeliers", "i"),
+    ("wall_finish", "?"),
+    ("editing_mode", "?"),
+    ("customer_name", "s"),
+    ("phone", "s"),
+    ("address", "s"),
+    ("live_message_id", "q"),
+    ("live_message_image", "s"),
+)
+
+# Версия 2: счётчики 64-битные — 32-битный "i" падал на больших введённых числах
+_WIDENED = {"spotlights_builtin", "spotlights_surface", "spotlights_pendant", "chandeliers"}
+FIELDS_V2: tuple[tuple[str, Kind], ...] = tuple(
+    (name, "q" if name in _WIDENED else kind) for name, kind in FIELDS_V1
+)
+
+# Версия 3: поколение клавиатур переехало в сессию
+FIELDS_V3: tuple[tuple[str, Kind], ...] = (*FIELDS_V2, ("keyboard_generation", "q"))
+
+# Схемы всех версий: старые нужны, чтобы прочитать ранее сохранённые данные
+SCHEMAS: dict[int, tuple[tuple[str, Kind], ...]] = {1: FIELDS_V1, 2: FIELDS_V2, 3: FIELDS_V3}
+FIELDS = SCHEMAS[SCHEMA_VERSION]
+_FIELD_NAMES = frozenset(name for name, _ in FIELDS)
+
+# Заголовок: версия, номер состояния, маска присутствующих полей, маска None
+_HEADER = struct.Struct("<BBII")
+_LENGTH = struct.Struct("<H")
+_NUMBERS = {kind: struct.Struct(f"<{kind}") for kind in "dqi?"}
+
+# Миграции: версия -> функция, переводящая данные этой версии в следующую
+MIGRATIONS: dict[int, Callable[[dict[str, Any]], dict[str, Any]]] = {
+    # Поля и значения те же, изменилась только ширина чисел в записи
+    1: lambda data: data,
+    # Новое поле необязательное: без него любое поколение кнопок считается текущим
+    2: lambda data: data,
+}
+
+
+def state_id(state: str | None) -> int:
+    """Номер состояния FSM в заголовке записи.
+
+    Raises:
+        KeyError: Состояния нет в таблице STATE_NAMES
+    """
+    return NO_STATE if state is None else STATE_IDS[state]
+
+
+def state_name(state_id: int) -> str | None:
+    """Имя состояния FSM по номеру из заголовка записи."""
+    return None if state_id == NO_STATE else STATE_NAMES[state_id]
+
+
+def _encode_value(kind: Kind, value: Any) -> bytes:
+    if isinstance(kind, tuple):
+        mask = 0
+        for option in value:
+            mask |= 1 << kind.index(option)
+        return bytes((mask,))
+    if kind == "s":
+        raw = value.encode()
+        return _LENGTH.pack(len(raw)) + raw
+    return _NUMBERS[kind].pack(value)
+
+
+def _decode_value(kind: Kind, buffer: bytes, offset: int) -> tuple[Any, int]:
+    if isinstance(kind, tuple):
+        mask = buffer[offset]
+        return {option for bit, option in enumerate(kind) if mask >> bit & 1}, offset + 1
+    if kind == "s":
+        (length,) = _LENGTH.unpack_from(buffer, offset)
+        start = offset + _LENGTH.size
+        return buffer[start : start + length].decode(), start + length
+    number = _NUMBERS[kind]
+    return number.unpack_from(buffer, offset)[0], offset + number.size
+
+
+def encode(state: str | None, data: dict[str, Any]) -> bytes:
+    """Кодирует состояние и данные сессии.
+
+    Raises:
+        ValueError: Значение не подходит под схему или не сериализуется
+    """
+    present = nulls = 0
+    body = bytearray()
+    try:
+        for bit, (name, kind) in enumerate(FIELDS):
+            if name not in data:
+                continue
+            present |= 1 << bit
+            if data[name] is None:
+                nulls |= 1 << bit
+            else:
+                body += _encode_value(kind, data[name])
+        extra = {key: value for key, value in data.items() if key not in _FIELD_NAMES}
+        if extra:
+            body += json.dumps(extra, ensure_ascii=False, separators=(",", ":")).encode()
+        state_number = state_id(state)
+    except (struct.error, TypeError, ValueError, AttributeError, KeyError) as e:
+        raise ValueError(f"Данные сессии не соответствуют схеме: {e}") from e
+
+    return _HEADER.pack(SCHEMA_VERSION, state_number, present, nulls) + bytes(body)
+
+
+def decode(buffer: bytes) -> tuple[str | None, dict[str, Any]]:
+    """Декодирует состояние и данные сессии, применяя миграции."""
+    version, state_number, present, nulls = _HEADER.unpack_from(buffer)
+    offset = _HEADER.size
+    data: dict[str, Any] = {}
+    for bit, (name, kind) in enumerate(SCHEMAS[version]):
+        if not present >> bit & 1:
+            continue
+        if nulls >> bit & 1:
+            data[name] = None
+        else:
+            data[name], offset = _decode_value(kind, buffer, offset)
+    if offset < len(buffer):
+        data.update(json.loads(buffer[offset:]))
+
+    while version < SCHEMA_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    return state_name(state_number), data
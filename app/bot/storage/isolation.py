@@ -0,0 +1,39 @@
+"""Последовательная обработка апдейтов одного пользователя."""
+
+import asyncio
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
+from aiogram.fsm.storage.base import BaseEventIsolation, StorageKey
+
+
+class UserEventIsolation(BaseEventIsolation):
+    """Блокировка на ключ FSM: апдейты одного пользователя идут по очереди.
+
+    В отличие от SimpleEventIsolation, блокировка удаляется из таблицы,
+    как только её никто не держит и не ждёт, поэтому таблица не растёт
+    с числом пользователей, когда-либо писавших боту.
+    """
+
+    def __init__(self) -> None:
+        # Ключ -> (блокировка, сколько апдейтов держат или ждут её)
+        self.locks: dict[StorageKey, tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        """Держит блокировку ключа на время обработки апдейта."""
+        lock, users = self.locks.get(key) or (asyncio.Lock(), 0)
+        self.locks[key] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self.locks[key]
+            if users == 1:
+                del self.locks[key]
+            else:
+                self.locks[key] = (lock, users - 1)
+
+    async def close(self) -> None:
+        """Очищает таблицу блокировок."""
+        self.locks.clear()
@@ -0,0 +1,57 @@
+"""Хранилище FSM в памяти, которое держит сессии в компактном бинарном виде."""
+
+from collections.abc import Mapping
+from typing import Any
+
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from app.bot.storage import codec
+
+_EMPTY = codec.encode(None, {})
+
+
+class CompactMemoryStorage(BaseStorage):
+    """Как MemoryStorage, но каждая сессия хранится одной строкой байт.
+
+    get_data каждый раз возвращает новые объекты, поэтому изменяемые
+    значения (множества) не разделяются между апдейтами. Пустые сессии
+    (после state.clear()) удаляются, а не копятся в словаре.
+    """
+
+    def __init__(self) -> None:
+        self.records: dict[StorageKey, bytes] = {}
+
+    async def close(self) -> None:
+        """Закрывать нечего."""
+
+    def _store(self, key: StorageKey, record: bytes) -> None:
+        if record == _EMPTY:
+            self.records.pop(key, None)
+        else:
+            self.records[key] = record
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        """Меняет только байт состояния в заголовке записи."""
+        name = state.state if isinstance(state, State) else state
+        record = bytearray(self.records.get(key, _EMPTY))
+        record[1] = codec.state_id(name)
+        self._store(key, bytes(record))
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        """Возвращает состояние из заголовка записи."""
+        record = self.records.get(key)
+        return None if record is None else codec.state_name(record[1])
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        """Кодирует данные вместе с текущим состоянием."""
+        if not isinstance(data, dict):
+            msg = f"Data must be a dict or dict-like object, got {type(data).__name__}"
+            raise DataNotDictLikeError(msg)
+        self._store(key, codec.encode(await self.get_state(key), data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        """Декодирует данные сессии."""
+        record = self.records.get(key)
+        return {} if record is None else codec.decode(record)[1]
@@ -0,0 +1 @@
+"""Консольные утилиты для обслуживания данных бота."""
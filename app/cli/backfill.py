@@ -0,0 +1,162 @@
+"""Загрузка архива логов чатов в поисковый индекс.
+
+Разбирает ``user_*.txt`` (плоская раскладка и корзины, включая сжатые
+сегменты .gz/.zst) в пуле процессов: файлы читаются построчно, строки без
+заголовка ``[время] отправитель:`` считаются продолжением многострочного
+сообщения. Один пользователь — одна задача и одна транзакция вместе с
+отметкой в таблице backfill_users, поэтому прерванный запуск
+продолжается с того же места. Загружаются только сообщения до момента,
+с которого индекс пополняет сам бот (meta.live_since), — без дублей.
+
+Запуск: ``python -m app.cli.backfill [--workers N] [--restart]``.
+"""
+
+import argparse
+import gzip
+import io
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import TextIO
+
+from app.core.config import settings
+from app.services.search import INSERT, LIVE_SINCE, SCHEMA, IndexRow, connect, index_row
+
+LINE = re.compile(r"\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] \S+ ([^:\n]*): (.*)")
+PROGRESS_INTERVAL = 2.0
+
+UserTask = tuple[int, list[str], int]
+
+
+def _open(path: str) -> TextIO:
+    """Построчное чтение сегмента, в том числе сжатого."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".zst"):
+        import zstandard
+
+        raw = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+        return io.TextIOWrapper(raw, encoding="utf-8", errors="replace")
+    return open(path, encoding="utf-8", errors="replace")
+
+
+def parse_user(task: UserTask) -> tuple[int, list[IndexRow]]:
+    """Разбирает сегменты пользователя в строки индекса (выполняется в процессе пула)."""
+    user_id, paths, cutoff = task
+    rows: list[IndexRow] = []
+    header: tuple[float, str] | None = None
+    body: list[str] = []
+    for path in paths:
+        with _open(path) as lines:
+            for line in lines:
+                match = LINE.match(line)
+                if match is None:
+                    body.append(line.rstrip("\n"))
+                    continue
+                if header is not None and header[0] < cutoff:
+                    rows.append(index_row(user_id, *header, "\n".join(body)))
+                header = (datetime.fromisoformat(match[1]).timestamp(), match[2])
+                body = [match[3].rstrip("\n")]
+    if header is not None and header[0] < cutoff:
+        rows.append(index_row(user_id, *header, "\n".join(body)))
+    return user_id, rows
+
+
+def _segment_order(path: str) -> tuple[int, str]:
+    """Закрытые сегменты по времени закрытия, текущий — последним."""
+    name = os.path.basename(path)
+    parts = name.split(".")
+    return (0, parts[1]) if len(parts) > 2 else (1, "")
+
+
+def discover(logs_dir: str) -> dict[int, list[str]]:
+    """Сегменты логов по пользователям: плоская раскладка и корзины."""
+    users: dict[int, list[str]] = {}
+    directories = [logs_dir] + [e.path for e in os.scandir(logs_dir) if e.is_dir()]
+    for directory in directories:
+        for entry in os.scandir(directory):
+            if entry.name.startswith("user_") and entry.is_file():
+                user_id = int(entry.name[5:].split(".", 1)[0])
+                users.setdefault(user_id, []).append(entry.path)
+    for paths in users.values():
+        paths.sort(key=_segment_order)
+    return users
+
+
+def backfill(
+    logs_dir: str, index_path: str, workers: int, restart: bool = False, out: TextIO = sys.stdout
+) -> int:
+    """Загружает архив в индекс.
+
+    Returns:
+        Сколько сообщений загружено
+    """
+    conn = connect(index_path)
+    with conn:
+        conn.executescript(SCHEMA)
+        conn.execute("CREATE TABLE IF NOT EXISTS backfill_users (user_id INTEGER PRIMARY KEY)")
+        conn.execute(LIVE_SINCE, (time.time(),))
+    live_since = conn.execute("SELECT value FROM meta WHERE key = 'live_since'").fetchone()[0]
+    # В логе время с точностью до секунды: секунду запуска бота целиком оставляем ему
+    cutoff = int(live_since)
+    if restart:
+        with conn:
+            conn.execute("DELETE FROM messages WHERE ts < ?", (cutoff,))
+            conn.execute("DELETE FROM backfill_users")
+
+    done = {row[0] for row in conn.execute("SELECT user_id FROM backfill_users")}
+    users = discover(logs_dir)
+    tasks = [(uid, paths, cutoff) for uid, paths in users.items() if uid not in done]
+    print(f"Пользователей: {len(users)}, уже загружено: {len(users) - len(tasks)}", file=out)
+
+    loaded = finished = 0
+    started = reported = time.monotonic()
+    with ProcessPoolExecutor(workers) as pool:
+        pending: set[Future[tuple[int, list[IndexRow]]]] = set()
+        queue = iter(tasks)
+        while True:
+            # Не больше двух задач на процесс в полёте: память не растёт с размером архива
+            while len(pending) < workers * 2 and (task := next(queue, None)):
+                pending.add(pool.submit(parse_user, task))
+            if not pending:
+                break
+            completed, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                user_id, rows = future.result()
+                with conn:
+                    conn.executemany(INSERT, rows)
+                    conn.execute("INSERT INTO backfill_users VALUES (?)", (user_id,))
+                loaded += len(rows)
+                finished += 1
+            now = time.monotonic()
+            if now - reported >= PROGRESS_INTERVAL or not pending:
+                reported = now
+                rate = finished / (now - started or 1e-9)
+                eta = (len(tasks) - finished) / rate if rate else 0
+                print(
+                    f"{finished}/{len(tasks)} пользователей, {loaded} сообщений, "
+                    f"{rate:.0f} польз/с, осталось ~{eta:.0f} с",
+                    file=out,
+                )
+    conn.close()
+    return loaded
+
+
+def main() -> None:
+    """Разбирает аргументы и запускает загрузку."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logs-dir", default=settings.chat_logs_dir)
+    parser.add_argument("--index", default=settings.search_index_path)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--restart", action="store_true", help="Загрузить архив заново")
+    args = parser.parse_args()
+    if not args.index:
+        parser.error("не задан SEARCH_INDEX_PATH (или --index)")
+    backfill(args.logs_dir, args.index, args.workers, args.restart)
+
+
+if __name__ == "__main__":
+    main()
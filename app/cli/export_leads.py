@@ -0,0 +1,36 @@
+"""Выгрузка заявок (расчёты и заказы замера) в CSV или Parquet.
+
+Запуск: ``python -m app.cli.export_leads [--since ГГГГ-ММ-ДД] [--until ГГГГ-ММ-ДД]
+[--format csv|parquet] [--output файл]``. Даты включительно.
+"""
+
+import argparse
+from datetime import date
+from pathlib import Path
+
+from app.core.config import settings
+from app.services.lead_export import FORMATS, export_leads
+from app.services.leads import LeadStore
+
+
+def main() -> None:
+    """Разбирает аргументы и пишет выгрузку."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--leads-dir", default=settings.leads_dir)
+    parser.add_argument("--since", type=date.fromisoformat)
+    parser.add_argument("--until", type=date.fromisoformat)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--output", type=Path, help="По умолчанию leads.<формат>")
+    args = parser.parse_args()
+
+    output = args.output or Path(f"leads.{args.format}")
+    records = LeadStore(args.leads_dir).read(args.since, args.until)
+    try:
+        count = export_leads(records, output, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Выгружено заявок: {count} → {output}")
+
+
+if __name__ == "__main__":
+    main()
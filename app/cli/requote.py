@@ -0,0 +1,120 @@
+"""Пересчёт сохранённых расчётов по прайсу-кандидату.
+
+Строки хранилища заявок (LEADS_DIR) читаются потоком и пересчитываются
+пачками по текущему прайсу и кандидату. По умолчанию всё идёт в одном
+процессе: пересчёт пачки — проход по колонкам, и передача строк в пул и
+результатов обратно стоит больше, чем он экономит. ``--workers N`` раздаёт
+разбор и пересчёт пачек пулу процессов (имеет смысл на многоядерной
+машине при очень большом архиве); в полёте не больше двух пачек на
+процесс. Строки изменений пишутся в CSV в исходном порядке, поэтому
+память не зависит от числа расчётов.
+
+Запуск: ``python -m app.cli.requote --candidate prices.json [--since ГГГГ-ММ-ДД]
+[--until ГГГГ-ММ-ДД] [--output deltas.csv] [--workers N]``.
+Файл кандидата — JSON с изменёнными полями, например ``{"ceiling_base_price": 950}``.
+"""
+
+import argparse
+import csv
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, TextIO
+
+from app.core.config import settings
+from app.services.calculator import Catalog, current_catalog
+from app.services.leads import LeadStore
+from app.services.requote import RequoteStats, load_catalog, requote_lines
+
+BATCH_SIZE = 20_000
+HEADER = ("user_id", "time", "stored_total", "current_total", "candidate_total", "delta")
+
+
+def chunks(lines: Iterable[str], size: int = BATCH_SIZE) -> Iterator[list[str]]:
+    """Строки хранилища пачками по size."""
+    lines = iter(lines)
+    while chunk := list(islice(lines, size)):
+        yield chunk
+
+
+def _format(row: tuple[Any, ...]) -> tuple[Any, ...]:
+    """Строка CSV: время ISO-строкой, суммы с точностью до копейки."""
+    user_id, ts, *totals = row
+    stamp = datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="seconds")
+    return (user_id, stamp, *(round(total, 2) for total in totals))
+
+
+def requote(
+    store: LeadStore,
+    candidate: Catalog,
+    workers: int,
+    output: TextIO | None = None,
+    since: date | None = None,
+    until: date | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> RequoteStats:
+    """Пересчитывает расчёты за период и пишет изменения в CSV.
+
+    При workers больше 1 пачки считает пул процессов, иначе текущий процесс.
+    """
+    current = current_catalog()
+    stats = RequoteStats()
+    writer = csv.writer(output) if output else None
+    if writer:
+        writer.writerow(HEADER)
+
+    def collect(result: tuple[list[tuple[Any, ...]], RequoteStats]) -> None:
+        rows, batch_stats = result
+        stats.merge(batch_stats)
+        if writer:
+            writer.writerows(_format(row) for row in rows)
+
+    batches = chunks(store.lines(since, until), batch_size)
+    if workers <= 1:
+        for chunk in batches:
+            collect(requote_lines(chunk, since, until, current, candidate))
+        return stats
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending: deque[Future[tuple[list[tuple[Any, ...]], RequoteStats]]] = deque()
+        for chunk in batches:
+            task = pool.submit(requote_lines, chunk, since, until, current, candidate)
+            pending.append(task)
+            # Не больше двух пачек на процесс; результаты забираются по порядку
+            if len(pending) >= workers * 2:
+                collect(pending.popleft().result())
+        while pending:
+            collect(pending.popleft().result())
+    return stats
+
+
+def main() -> None:
+    """Разбирает аргументы, пересчитывает и печатает сводку."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidate", type=Path, required=True, help="JSON с новыми ценами")
+    parser.add_argument("--leads-dir", default=settings.leads_dir)
+    parser.add_argument("--since", type=date.fromisoformat)
+    parser.add_argument("--until", type=date.fromisoformat)
+    parser.add_argument("--output", type=Path, help="CSV изменений по каждому расчёту")
+    parser.add_argument("--workers", type=int, default=1, help="процессов пересчёта")
+    args = parser.parse_args()
+
+    try:
+        candidate = load_catalog(args.candidate)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    store = LeadStore(args.leads_dir)
+    period = {"since": args.since, "until": args.until}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8-sig", newline="") as f:
+            stats = requote(store, candidate, args.workers, f, **period)
+    else:
+        stats = requote(store, candidate, args.workers, **period)
+    print(stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -19,6 +19,78 @@ class Settings(BaseSettings):
 
     # Application
     log_level: str = "INFO"
+    # Формат логов: json (одна запись — строка JSON) или text
+    log_format: str = "json"
+    # Не больше LOG_REPEAT_BURST предупреждений из одного места кода за LOG_REPEAT_WINDOW сек;
+    # 0 в любом из них — без ограничения
+    log_repeat_window: float = 60.0
+    log_repeat_burst: int = 5
+
+    # Режим одного сообщения: шаги редактируют одно сообщение вместо отправки новых
+    live_message: bool = False
+
+    # Хранить сессии FSM в памяти в компактном бинарном виде (CompactMemoryStorage)
+    compact_storage: bool = False
+
+    # Окно (сек), в котором повторное нажатие той же кнопки не обрабатывается; 0 — выключено
+    callback_dedup_window: float = 1.0
+
+    # Защита от флуда: апдейтов пользователя в секунду и запас; 0 — выключено
+    throttle_rate: float = 2.0
+    throttle_burst: int = 10
+    # Отдельный лимит на дорогие действия: /start, результат, уведомление менеджерам
+    throttle_expensive_rate: float = 0.2
+    throttle_expensive_burst: int = 3
+
+    # Исходящие запросы: сообщений в секунду на весь бот (0 — без планировщика),
+    # в секунду на личный чат и на группу (20 в минуту; 0 — без ограничения на чат),
+    # запас чата и повторы после 429
+    outbound_rate: float = 30.0
+    outbound_chat_rate: float = 1.0
+    outbound_group_rate: float = 0.33
+    outbound_chat_burst: int = 5
+    outbound_max_retries: int = 3
+
+    # HTTP-клиент Bot API: размер пула, keep-alive и кэш DNS (сек), таймауты запросов (сек)
+    http_pool_size: int = 100
+    http_keepalive: float = 75.0
+    http_dns_ttl: int = 3600
+    http_timeout: float = 60.0
+    http_upload_timeout: float = 180.0
+
+    # Цикл событий uvloop (нужен установленный uvloop: poetry install -E speed)
+    use_uvloop: bool = False
+
+    # Сколько секунд при остановке ждать апдейты, которые ещё обрабатываются
+    shutdown_timeout: float = 25.0
+
+    # Задержка цикла событий (сек), после которой в лог пишется стек блокирующего кода;
+    # 0 — сторож выключен
+    loop_lag_threshold: float = 0.1
+    # Порт HTTP-эндпоинта /metrics (формат Prometheus); 0 — выключено
+    metrics_port: int = 0
+    # Адрес, на котором слушает /metrics; 0.0.0.0 — открыть наружу
+    metrics_host: str = "127.0.0.1"
+
+    # Логи чатов: каталог, размер (байт) и возраст (дней) сегмента до закрытия,
+    # сжатие закрытых сегментов (gzip, zstd, none) и срок их хранения (дней, 0 — бессрочно)
+    chat_logs_dir: str = "chat_logs"
+    chat_log_max_bytes: int = 1024 * 1024
+    chat_log_max_age_days: float = 30.0
+    chat_log_compression: str = "gzip"
+    chat_log_retention_days: float = 365.0
+    # Поисковый индекс по диалогам для /find (SQLite FTS5); пустая строка — выключен
+    search_index_path: str = "chat_logs/index.sqlite3"
+    # Заявки (расчёты и заказы замера) для выгрузки: помесячные JSONL-файлы
+    leads_dir: str = "leads"
+
+    # Трейсы апдейтов в JSONL (OTLP): доля записываемых апдейтов (0 — выключено) и
+    # длительность апдейта (сек), после которой он записывается всегда (0 — не учитывать)
+    trace_sample_rate: float = 0.0
+    trace_slow_threshold: float = 0.0
+    trace_file: str = "traces/traces.jsonl"
+    trace_max_bytes: int = 10 * 1024 * 1024
+    trace_backups: int = 5
 
     # Contact info
     contact_phone: str = Field(..., description="Контактный телефон менеджера")
@@ -57,6 +129,8 @@ class Settings(BaseSettings):
 
     # Валидация
     max_cornice_length: float = 100.0
+    # Длина треков и световых линий, пог.м
+    max_line_length: float = 100.0
     max_count: int = 100
 
     # Пути к изображениям
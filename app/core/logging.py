@@ -0,0 +1,139 @@
+"""Логирование приложения через очередь: запись не блокирует цикл событий.
+
+Корневой логгер пишет в QueueHandler: в цикле событий запись только
+получает готовый текст сообщения, контекст апдейта и попадает в очередь.
+Форматирование в JSON и вывод в stderr выполняет поток QueueListener.
+Повторяющиеся предупреждения из одного места кода ограничиваются:
+не больше LOG_REPEAT_BURST за LOG_REPEAT_WINDOW секунд, следующая
+пропущенная запись сообщает, сколько похожих было пропущено.
+"""
+
+import copy
+import json
+import logging
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from typing import Any, TextIO
+
+from app.core.config import settings
+from app.utils.token_bucket import TokenBuckets
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Контекст апдейта (user_id, chat_id, update_id, state), его ставит middleware
+log_context: ContextVar[dict[str, Any]] = ContextVar("log_context", default={})
+
+
+class RepeatFilter(logging.Filter):
+    """Ограничивает повторы предупреждений и ошибок из одного места кода.
+
+    Args:
+        window: За сколько секунд восполняется запас записей; 0 — без ограничения
+        burst: Сколько записей из одного места пропускается подряд; 0 — без ограничения
+    """
+
+    def __init__(self, window: float, burst: int) -> None:
+        super().__init__()
+        self.enabled = window > 0 and burst > 0
+        self.buckets = TokenBuckets(burst / window if self.enabled else 0, burst, 10_000)
+        self.suppressed: dict[int, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Пропускает запись, если место вызова не исчерпало запас."""
+        if not self.enabled or record.levelno < logging.WARNING:
+            return True
+        key = hash((record.pathname, record.lineno))
+        if self.buckets.take(key, time.monotonic()) is not None:
+            self.suppressed[key] = self.suppressed.get(key, 0) + 1
+            return False
+        record.suppressed = self.suppressed.pop(key, 0)
+        return True
+
+
+class ContextQueueHandler(QueueHandler):
+    """QueueHandler, который добавляет к записи контекст апдейта.
+
+    В отличие от стандартного, не склеивает traceback с сообщением:
+    исключение уходит в очередь отдельным полем exc_text.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Готовит запись к передаче в другой поток."""
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        record.context = log_context.get()
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — одна строка JSON с контекстом апдейта."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Сериализует запись."""
+        data: dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **getattr(record, "context", {}),
+        }
+        if getattr(record, "suppressed", 0):
+            data["suppressed"] = record.suppressed
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Текстовый формат с контекстом апдейта в конце строки."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Форматирует запись и добавляет контекст."""
+        context = dict(getattr(record, "context", {}))
+        if getattr(record, "suppressed", 0):
+            context["suppressed"] = record.suppressed
+        line = super().format(record)
+        if not context:
+            return line
+        head, _, tail = line.partition("\n")
+        fields = " ".join(f"{key}={value}" for key, value in context.items())
+        return f"{head} [{fields}]" + (f"\n{tail}" if tail else "")
+
+
+def setup_logging(stream: TextIO | None = None) -> QueueListener:
+    """Направляет корневой логгер в очередь и запускает поток вывода.
+
+    Args:
+        stream: Куда писать (по умолчанию stderr)
+
+    Returns:
+        Запущенный QueueListener; stop() дописывает оставшиеся записи
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    if settings.log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(TextFormatter(TEXT_FORMAT))
+
+    log_queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    handler.addFilter(RepeatFilter(settings.log_repeat_window, settings.log_repeat_burst))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(getattr(logging, settings.log_level))
+
+    listener = QueueListener(log_queue, output)
+    listener.start()
+    return listener
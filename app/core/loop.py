@@ -0,0 +1,25 @@
+"""Выбор реализации цикла событий asyncio."""
+
+import asyncio
+import logging
+from collections.abc import Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def event_loop_factory() -> Callable[[], asyncio.AbstractEventLoop] | None:
+    """Фабрика цикла uvloop, если он включён в USE_UVLOOP и установлен.
+
+    Returns:
+        uvloop.new_event_loop или None для стандартного цикла asyncio
+    """
+    if not settings.use_uvloop:
+        return None
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("USE_UVLOOP=true, но uvloop не установлен: используется цикл asyncio")
+        return None
+    return uvloop.new_event_loop
@@ -1,57 +1,133 @@
 """Точка входа для запуска бота."""
 
 import asyncio
+import atexit
 import logging
 from pathlib import Path
 
 from aiogram import Bot, Dispatcher
 from aiogram.exceptions import TelegramConflictError
+from aiogram.fsm.middleware import FSMContextMiddleware
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import BotCommand
 from dotenv import load_dotenv
 
 from app.core.config import settings
-from app.bot.handlers import start, calculation
+from app.core.logging import setup_logging
+from app.core.loop import event_loop_factory
+from app.services.chat_logger import chat_logger
+from app.monitoring.loop_lag import LoopLagMonitor
+from app.monitoring.metrics import start_metrics_server
+from app.monitoring.tracing import tracing_enabled
+
+# Модули хендлеров кнопок регистрируют их в таблице callbacks при импорте
+from app.bot.handlers import admin, start, calculation, edit, lighting  # noqa: F401
+from app.bot.middlewares.dedup import DuplicateCallbackMiddleware
+from app.bot.middlewares.log_context import LogContextMiddleware
 from app.bot.middlewares.logging import ChatLoggingMiddleware
+from app.bot.middlewares.session import SessionMiddleware
+from app.bot.middlewares.stale import StaleButtonMiddleware
+from app.bot.middlewares.throttling import ThrottlingMiddleware
+from app.bot.middlewares.tracing import (
+    HandlerSpanMiddleware,
+    TracingMiddleware,
+    traced_middleware,
+)
+from app.bot.outbound import background_sends
+from app.bot.routing import callbacks
+from app.bot.session import create_bot_session
+from app.bot.shutdown import ShutdownCoordinator, flush_log_handlers
+from app.bot.storage.isolation import UserEventIsolation
+from app.bot.storage.memory import CompactMemoryStorage
 
 
 # Загрузка .env
 load_dotenv()
 
 
+def create_dispatcher() -> Dispatcher:
+    """Создаёт диспетчер с хранилищем, middleware и роутерами бота.
+
+    Returns:
+        Настроенный диспетчер
+    """
+    storage = CompactMemoryStorage() if settings.compact_storage else MemoryStorage()
+    # FSM подключает и закрывает ShutdownCoordinator, см. ShutdownCoordinator.setup
+    dp = Dispatcher(disable_fsm=True)
+    dp.fsm = FSMContextMiddleware(storage=storage, events_isolation=UserEventIsolation())
+    # Корень трейса снаружи FSM: в трейс попадают ожидание блокировки и загрузка состояния
+    tracing = TracingMiddleware() if tracing_enabled() else None
+    if tracing:
+        dp.update.outer_middleware(tracing)
+    # Флуд отбрасывается до блокировки пользователя и загрузки сессии
+    dp.update.outer_middleware(traced_middleware(ThrottlingMiddleware()))
+    # Остановка ждёт апдейты в обработке; модули добавляют сбросы через dp["shutdown"]
+    coordinator = ShutdownCoordinator()
+    coordinator.setup(dp)
+    dp["shutdown"] = coordinator
+
+    dp.update.outer_middleware(LogContextMiddleware())
+
+    dp.callback_query.outer_middleware(traced_middleware(StaleButtonMiddleware()))
+    dp.callback_query.outer_middleware(traced_middleware(DuplicateCallbackMiddleware()))
+
+    dp.message.middleware(traced_middleware(ChatLoggingMiddleware()))
+    dp.callback_query.middleware(traced_middleware(ChatLoggingMiddleware()))
+    dp.message.middleware(traced_middleware(SessionMiddleware()))
+    dp.callback_query.middleware(traced_middleware(SessionMiddleware()))
+    if tracing:
+        dp.message.middleware(HandlerSpanMiddleware())
+        dp.callback_query.middleware(HandlerSpanMiddleware())
+
+    dp.include_router(admin.router)
+    dp.include_router(start.router)
+    dp.include_router(calculation.router)
+    dp.include_router(callbacks.build_router())
+
+    coordinator.on_flush(
+        "уведомления менеджерам", lambda: background_sends.drain(coordinator.timeout)
+    )
+    coordinator.on_flush("логи", flush_log_handlers)
+    if tracing:
+        coordinator.on_flush("трейсы", tracing.exporter.close)
+    return dp
+
+
 async def main() -> None:
     """Запуск бота."""
-    # Настройка логирования
-    logging.basicConfig(
-        level=getattr(logging, settings.log_level),
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    )
+    # Логи пишет отдельный поток; при выходе он дописывает оставшиеся записи
+    listener = setup_logging()
+    atexit.register(listener.stop)
     logger = logging.getLogger(__name__)
 
     logger.info("Starting Ceiling Calculator Bot...")
 
     # Проверка обязательных директорий
-    Path("chat_logs").mkdir(exist_ok=True)
+    Path(settings.chat_logs_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.profiles_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.cornices_dir).mkdir(parents=True, exist_ok=True)
 
     # Инициализация бота
     try:
-        bot = Bot(token=settings.bot_token)
+        bot = Bot(token=settings.bot_token, session=create_bot_session())
     except Exception as e:
         logger.error(f"Ошибка инициализации бота: {e}")
         raise
 
-    # Диспетчер с MemoryStorage
-    dp = Dispatcher(storage=MemoryStorage())
-
-    # Подключение middleware
-    dp.message.middleware(ChatLoggingMiddleware())
-    dp.callback_query.middleware(ChatLoggingMiddleware())
-
-    # Подключение роутеров
-    dp.include_router(start.router)
-    dp.include_router(calculation.router)
+    dp = create_dispatcher()
+    shutdown = dp["shutdown"]
+
+    # Наблюдение за циклом событий и эндпоинт метрик
+    if settings.loop_lag_threshold > 0:
+        monitor = LoopLagMonitor()
+        monitor.start()
+        shutdown.on_flush("сторож цикла событий", monitor.stop)
+    # Сжатие закрытых сегментов и срок хранения логов чатов
+    chat_logger.start()
+    shutdown.on_flush("логи чатов", chat_logger.stop)
+    if settings.metrics_port:
+        metrics_runner = await start_metrics_server(settings.metrics_port)
+        shutdown.on_flush("эндпоинт метрик", metrics_runner.cleanup)
 
     # Удаление webhook перед запуском polling
     await bot.delete_webhook(drop_pending_updates=True)
@@ -123,6 +199,7 @@ async def main() -> None:
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        with asyncio.Runner(loop_factory=event_loop_factory()) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         print("Bot stopped!")
@@ -0,0 +1 @@
+"""Метрики и наблюдение за работой бота."""
@@ -0,0 +1,110 @@
+"""Сторож цикла событий: задержка цикла и стек кода, который его блокирует.
+
+Задача в цикле каждые interval секунд засыпает и меряет, насколько позже
+проснулась, — это задержка цикла, она идёт в гистограмму. Отдельный поток
+следит за отметкой, которую задача ставит перед сном: если цикл не
+возвращается дольше threshold, поток снимает стек главного потока через
+sys._current_frames(), пока блокирующий код ещё выполняется. Когда цикл
+оживает, задержка и снятый стек пишутся в лог и в метрики.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass
+
+from app.core.config import settings
+from app.monitoring.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних кадров стека сохранять для зависания
+STACK_DEPTH = 12
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+@dataclass(slots=True)
+class Stall:
+    """Зависание цикла: когда закончилось, сколько длилось и где стоял цикл."""
+
+    at: float
+    lag: float
+    stack: str
+
+
+class LoopLagMonitor:
+    """Меряет задержку цикла событий и ловит стек блокирующего кода.
+
+    Args:
+        interval: Период замера, сек
+        threshold: Задержка, начиная с которой снимается стек и пишется предупреждение
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float | None = None) -> None:
+        self.interval = interval
+        self.threshold = settings.loop_lag_threshold if threshold is None else threshold
+        self.lag = registry.histogram(
+            "bot_event_loop_lag_seconds", "Задержка цикла событий", LAG_BUCKETS
+        )
+        self.stall_count = registry.counter(
+            "bot_event_loop_stalls_total", "Зависания цикла дольше порога"
+        )
+        self.stalls: deque[Stall] = deque(maxlen=20)
+        self._heartbeat = time.monotonic()
+        self._stack: str | None = None
+        self._loop_thread = 0
+        self._task: asyncio.Task[None] | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    def start(self) -> None:
+        """Запускает замеры в текущем цикле и поток-сторож."""
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._sample(), name="loop-lag-monitor")
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Останавливает замеры и поток-сторож."""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - started - self.interval, 0.0)
+            self.lag.observe(lag)
+            if lag >= self.threshold:
+                self._report(lag)
+
+    def _report(self, lag: float) -> None:
+        """Записывает зависание со стеком, который снял сторож."""
+        stack, self._stack = self._stack, None
+        self.stall_count.inc()
+        self.stalls.append(Stall(at=time.time(), lag=lag, stack=stack or ""))
+        if stack:
+            logger.warning(f"Цикл событий был заблокирован {lag * 1000:.0f} мс:\n{stack}")
+        else:
+            logger.warning(f"Цикл событий был заблокирован {lag * 1000:.0f} мс (стек не снят)")
+
+    def _watch(self) -> None:
+        """Поток-сторож: снимает стек главного потока, пока цикл стоит."""
+        while not self._stop.wait(self.threshold / 2):
+            blocked = time.monotonic() - self._heartbeat - self.interval
+            if blocked < self.threshold or self._stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._stack = "".join(traceback.format_stack(frame)[-STACK_DEPTH:])
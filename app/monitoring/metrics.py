@@ -0,0 +1,139 @@
+"""Метрики в текстовом формате Prometheus и необязательный HTTP-эндпоинт /metrics.
+
+Своя минимальная реализация без prometheus_client: счётчики и гистограммы
+регистрируются в общем реестре, эндпоинт поднимается на aiohttp, который
+уже есть в зависимостях aiogram.
+"""
+
+import bisect
+import logging
+from typing import TypeVar
+
+from aiohttp import web
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Counter:
+    """Монотонный счётчик."""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Увеличивает счётчик на amount."""
+        self.value += amount
+
+    def render(self) -> list[str]:
+        """Строки счётчика в текстовом формате Prometheus."""
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+            f"{self.name} {self.value}",
+        ]
+
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин."""
+
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # Наблюдения по корзинам, последняя — больше всех границ (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Учитывает одно наблюдение."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает квантиль q."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def render(self) -> list[str]:
+        """Строки гистограммы (накопленные корзины, сумма и число) в формате Prometheus."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {self.count}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {self.count}")
+        return lines
+
+
+M = TypeVar("M", Counter, Histogram)
+
+
+class Registry:
+    """Набор метрик, которые отдаёт /metrics."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Counter | Histogram] = {}
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Регистрирует счётчик; повторная регистрация возвращает уже существующий."""
+        return self._add(Counter(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: tuple[float, ...]) -> Histogram:
+        """Регистрирует гистограмму; повторная регистрация возвращает уже существующую."""
+        return self._add(Histogram(name, help_text, buckets))
+
+    def _add(self, metric: M) -> M:
+        existing = self.metrics.get(metric.name)
+        if existing is not None:
+            if not isinstance(existing, type(metric)):
+                raise TypeError(f"Метрика {metric.name} уже зарегистрирована другого типа")
+            return existing
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Все метрики реестра в текстовом формате Prometheus."""
+        lines = [line for metric in self.metrics.values() for line in metric.render()]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+async def start_metrics_server(port: int, host: str | None = None) -> web.AppRunner:
+    """Поднимает HTTP-эндпоинт /metrics.
+
+    Args:
+        port: Порт
+        host: Адрес (по умолчанию METRICS_HOST, то есть только локально)
+
+    Returns:
+        Runner сервера: остановка — ``await runner.cleanup()``
+    """
+
+    async def metrics(_: web.Request) -> web.Response:
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    host = host or settings.metrics_host
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+    return runner
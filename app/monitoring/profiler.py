@@ -0,0 +1,123 @@
+"""Профилирование работающего бота: сэмплы стека и снимки tracemalloc.
+
+Сэмплирующий профилировщик из отдельного потока раз в interval снимает
+стек потока цикла событий через sys._current_frames() и считает
+одинаковые стеки. Результат — collapsed stacks (``a;b;c 42`` в строке),
+формат flamegraph.pl и speedscope. Бот при этом не останавливается и
+не замедляется заметно: работа идёт в потоке сэмплера.
+
+Снимки памяти сравниваются с предыдущим: первый вызов включает
+tracemalloc и запоминает точку отсчёта, следующие показывают прирост по
+строкам кода.
+"""
+
+import gzip
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+
+# Кадры самого сэмплера и tracemalloc в снимках не нужны
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+def _short_path(filename: str) -> str:
+    """Путь без префикса site-packages и каталога проекта."""
+    for marker in ("site-packages/", f"{Path.cwd()}/"):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    return filename
+
+
+def _collapse(frame: FrameType | None) -> str:
+    """Стек от корня к листу в одну строку: ``модуль.функция;...``."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{Path(code.co_filename).stem}.{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def sample_stacks(thread_id: int, duration: float, interval: float = 0.005) -> Counter[str]:
+    """Сэмплирует стек потока thread_id в течение duration секунд.
+
+    Вызывается из отдельного потока (asyncio.to_thread), иначе стек
+    цикла событий будет стоять на самом сэмплере.
+    """
+    stacks: Counter[str] = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is not None:
+            stacks[_collapse(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def render_profile(stacks: Counter[str], top: int = 5) -> tuple[bytes, str]:
+    """Сжатый файл collapsed stacks и краткая сводка по самым частым функциям.
+
+    Returns:
+        (содержимое .txt.gz, сводка для подписи)
+    """
+    body = "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    leaves: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    total = sum(stacks.values()) or 1
+    summary = "\n".join(
+        f"{count * 100 / total:5.1f}% {name}" for name, count in leaves.most_common(top)
+    )
+    return gzip.compress(body.encode()), summary
+
+
+class MemorySnapshots:
+    """Снимки tracemalloc, каждый сравнивается с предыдущим."""
+
+    def __init__(self, frames: int = 10) -> None:
+        self.frames = frames
+        self.previous: tracemalloc.Snapshot | None = None
+        self.lock = threading.Lock()
+
+    def take(self, top: int = 200) -> tuple[bytes, str] | None:
+        """Снимок и его разница с предыдущим.
+
+        Returns:
+            (содержимое .txt.gz, сводка) или None, если это первый снимок
+            и tracemalloc только что включён
+        """
+        with self.lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+            previous, self.previous = self.previous, snapshot
+        if previous is None:
+            return None
+
+        stats = snapshot.compare_to(previous, "lineno")[:top]
+        lines = [
+            f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8d} блоков  "
+            f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}"
+            for stat in stats
+        ]
+        current, peak = tracemalloc.get_traced_memory()
+        growth = sum(stat.size_diff for stat in stats) / 1024
+        summary = (
+            f"Сейчас {current / 2**20:.1f} МиБ, пик {peak / 2**20:.1f} МиБ, "
+            f"прирост по топ-{top}: {growth:+.1f} КиБ\n" + "\n".join(lines[:5])
+        )
+        return gzip.compress("\n".join(lines).encode()), summary
+
+    def stop(self) -> None:
+        """Выключает tracemalloc и забывает точку отсчёта."""
+        with self.lock:
+            tracemalloc.stop()
+            self.previous = None
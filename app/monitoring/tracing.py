@@ -0,0 +1,247 @@
+"""Трейсы апдейтов: вложенные спаны и запись в JSONL в формате OTLP.
+
+Трейс начинается во внешнем middleware апдейта (start_trace), спаны
+открываются через span() и декоратор traced() и цепляются к текущему
+спану через ContextVar. Если трейс не записывается, span() ничего не
+делает, кроме чтения ContextVar, поэтому инструментированный код стоит
+почти ноль при выключенной выборке.
+
+Каждая строка файла — один трейс в JSON-кодировке OTLP (resourceSpans →
+scopeSpans → spans), как у file exporter OpenTelemetry Collector: файл
+можно загрузить в Jaeger/Tempo через otelcol или разобрать
+``python -m scripts.trace_view``.
+"""
+
+import json
+import logging
+import random
+import time
+from collections.abc import Callable, Iterator
+from contextlib import AbstractContextManager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from inspect import iscoroutinefunction
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+SERVICE_NAME = "ceiling-calculator-bot"
+
+# Значения SpanKind и StatusCode из OTLP
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+def _attributes(values: dict[str, Any]) -> list[dict[str, Any]]:
+    """Атрибуты в виде списка KeyValue из OTLP."""
+    result = []
+    for key, value in values.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+@dataclass(slots=True)
+class Span:
+    """Спан трейса; spans — общий для всего трейса список завершённых спанов."""
+
+    name: str
+    trace_id: str
+    parent_id: str
+    kind: int
+    attributes: dict[str, Any]
+    spans: list["Span"]
+    span_id: str = field(default_factory=lambda: _new_id(64))
+    start: int = field(default_factory=time.time_ns)
+    end: int = 0
+    error: str | None = None
+
+    @property
+    def duration(self) -> float:
+        """Длительность, сек."""
+        return (self.end - self.start) / 1e9
+
+    def to_otlp(self) -> dict[str, Any]:
+        """Спан в JSON-кодировке OTLP."""
+        data = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start),
+            "endTimeUnixNano": str(self.end),
+            "attributes": _attributes(self.attributes),
+        }
+        if self.error:
+            data["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return data
+
+
+_current: ContextVar[Span | None] = ContextVar("trace_span", default=None)
+
+
+def tracing_enabled() -> bool:
+    """Включена ли запись трейсов (TRACE_SAMPLE_RATE или TRACE_SLOW_THRESHOLD)."""
+    return settings.trace_sample_rate > 0 or settings.trace_slow_threshold > 0
+
+
+def current_span() -> Span | None:
+    """Текущий спан или None, если апдейт не трейсится."""
+    return _current.get()
+
+
+@contextmanager
+def _activate(item: Span) -> Iterator[Span]:
+    token = _current.set(item)
+    try:
+        yield item
+    except Exception as e:
+        item.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        item.end = time.time_ns()
+        _current.reset(token)
+        item.spans.append(item)
+
+
+def start_trace(
+    name: str, attributes: dict[str, Any] | None = None
+) -> AbstractContextManager[Span]:
+    """Начинает новый трейс с корневым спаном; его spans после выхода — весь трейс."""
+    root = Span(name, _new_id(128), "", KIND_SERVER, attributes or {}, [])
+    return _activate(root)
+
+
+@contextmanager
+def detached() -> Iterator[None]:
+    """Блок вне текущего трейса: задачи, созданные в нём, не пишут спаны в трейс апдейта."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(
+    name: str, kind: int = KIND_INTERNAL, attributes: dict[str, Any] | None = None
+) -> Iterator[Span | None]:
+    """Дочерний спан текущего; вне трейса ничего не записывает и отдаёт None."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(name, parent.trace_id, parent.span_id, kind, attributes or {}, parent.spans)
+    with _activate(child):
+        yield child
+
+
+def traced(name: str | None = None) -> Callable[[F], F]:
+    """Декоратор: вызов функции — спан с её именем (или name)."""
+
+    def decorate(func: F) -> F:
+        span_name = name or func.__qualname__
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if _current.get() is None:
+                    return await func(*args, **kwargs)
+                with span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore[return-value]
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _current.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class OtlpFormatter(logging.Formatter):
+    """Сериализует трейс записи (поле spans) в строку JSON-кодировки OTLP."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Строка трейса; готовая строка сохраняется, повторный вызов её не пересчитывает."""
+        spans = getattr(record, "spans", None)
+        if spans is not None:
+            resource = {"attributes": _attributes({"service.name": SERVICE_NAME})}
+            scope_spans = [{"scope": {"name": "app"}, "spans": [s.to_otlp() for s in spans]}]
+            record.msg = json.dumps(
+                {"resourceSpans": [{"resource": resource, "scopeSpans": scope_spans}]},
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            record.spans = None
+        return record.msg
+
+
+class TraceExporter:
+    """Пишет трейсы строками JSON в файл с ротацией по размеру.
+
+    Как и логи (см. app.core.logging), трейс в цикле событий только
+    попадает в очередь: сериализация, запись и ротация файла выполняются
+    потоком QueueListener, который запускается при первом трейсе.
+
+    Args:
+        path: Файл трейсов (по умолчанию TRACE_FILE)
+        max_bytes: Размер файла, после которого он ротируется
+        backups: Сколько старых файлов хранить
+    """
+
+    def __init__(
+        self, path: str | None = None, max_bytes: int | None = None, backups: int | None = None
+    ) -> None:
+        path = path or settings.trace_file
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.handler = RotatingFileHandler(
+            path,
+            maxBytes=settings.trace_max_bytes if max_bytes is None else max_bytes,
+            backupCount=settings.trace_backups if backups is None else backups,
+            encoding="utf-8",
+            delay=True,
+        )
+        self.handler.setFormatter(OtlpFormatter())
+        self.queue: SimpleQueue[logging.LogRecord] = SimpleQueue()
+        self.listener = QueueListener(self.queue, self.handler)
+        self.running = False
+
+    def export(self, spans: list[Span]) -> None:
+        """Ставит трейс в очередь записи."""
+        if not self.running:
+            self.listener.start()
+            self.running = True
+        self.queue.put_nowait(logging.makeLogRecord({"spans": spans}))
+
+    def close(self) -> None:
+        """Дописывает трейсы из очереди и закрывает файл."""
+        if self.running:
+            self.listener.stop()
+            self.running = False
+        self.handler.close()
@@ -0,0 +1,86 @@
+"""Типизированная модель данных сессии расчёта."""
+
+from collections.abc import Mapping
+from dataclasses import dataclass, field, fields
+from typing import Any
+
+
+@dataclass(slots=True)
+class Session:
+    """Ответы пользователя и служебные флаги диалога.
+
+    Загружается из данных FSM один раз на апдейт (SessionMiddleware) и
+    сохраняется обратно, только если изменилась. В хранилище попадают
+    лишь поля, отличающиеся от значений по умолчанию.
+    """
+
+    # Площадь и профиль: None — ещё не введены
+    area: float | None = None
+    profile_type: str | None = None
+
+    # Карнизы: cornice_length None — шаг ещё не пройден, 0 — без карнизов
+    cornice_type: str | None = None
+    cornice_length: float | None = None
+
+    # Освещение: None — типы ещё не выбраны (режим "Все по шагам")
+    selected_lighting: set[str] | None = None
+
+    # Светильники по типам
+    selected_spotlight_types: set[str] = field(default_factory=set)
+    spotlights_builtin: int = 0
+    spotlights_surface: int = 0
+    spotlights_pendant: int = 0
+
+    # Треки по типам
+    selected_track_types: set[str] = field(default_factory=set)
+    track_surface_length: float = 0
+    track_builtin_length: float = 0
+
+    light_lines: float = 0
+    chandeliers: int = 0
+    wall_finish: bool = False
+
+    # Редактирование одного раздела из меню результата
+    editing_mode: bool = False
+
+    # Заказ замера
+    customer_name: str = ""
+    phone: str = ""
+    address: str = ""
+
+    # Поколение клавиатур текущего расчёта; None — расчёт ещё не начинался
+    keyboard_generation: int | None = None
+
+    # Режим одного сообщения
+    live_message_id: int | None = None
+    live_message_image: str = ""
+
+    @classmethod
+    def from_data(cls, data: Mapping[str, Any]) -> "Session":
+        """Создаёт сессию из данных FSM, пропуская неизвестные ключи."""
+        session = cls()
+        session.update({key: value for key, value in data.items() if key in FIELD_NAMES})
+        return session
+
+    def to_data(self) -> dict[str, Any]:
+        """Данные для FSM: только поля, отличные от значений по умолчанию."""
+        return {
+            name: value
+            for name, default in DEFAULTS.items()
+            if (value := getattr(self, name)) != default
+        }
+
+    def update(self, values: Mapping[str, Any]) -> None:
+        """Присваивает значения полям; множества копируются."""
+        for name, value in values.items():
+            setattr(self, name, set(value) if isinstance(value, set | frozenset | list) else value)
+
+    def reset(self) -> None:
+        """Сбрасывает ответы к значениям по умолчанию; поколение клавиатур остаётся."""
+        generation = self.keyboard_generation
+        self.update(DEFAULTS)
+        self.keyboard_generation = generation
+
+
+DEFAULTS: dict[str, Any] = {f.name: getattr(Session(), f.name) for f in fields(Session)}
+FIELD_NAMES = frozenset(DEFAULTS)
@@ -1,31 +1,56 @@
-"""Сервис расчёта стоимости натяжного потолка."""
+"""Сервис расчёта стоимости натяжного потолка.
+
+Функции расчёта берут цены из прайса (Catalog): по умолчанию это текущие
+настройки, а пересчёт по прайсу-кандидату (app.services.requote) передаёт
+свой.
+"""
 
 from app.core.config import settings
+from app.monitoring.tracing import traced
 from app.schemas.calculation import CalculationData
+from app.schemas.session import Session
+
+# Прайс: цены и коэффициенты по именам полей настроек
+Catalog = dict[str, float]
+CATALOG_FIELDS = tuple(
+    name
+    for name in type(settings).model_fields
+    if name.endswith("_price") or name in ("min_area_for_calculation", "perimeter_coefficient")
+)
+
+
+def current_catalog() -> Catalog:
+    """Прайс из текущих настроек."""
+    return {name: getattr(settings, name) for name in CATALOG_FIELDS}
 
 
-def calculate_area_cost(area: float) -> tuple[float, float]:
+def calculate_area_cost(area: float, catalog: Catalog | None = None) -> tuple[float, float]:
     """Рассчитывает стоимость потолка по площади.
 
     Args:
         area: Площадь помещения в м²
+        catalog: Прайс (по умолчанию текущие настройки)
 
     Returns:
         (area_for_calculation, ceiling_cost)
     """
+    c = catalog or current_catalog()
     # Если площадь <= 20м², считаем от 20м²
-    area_for_calculation = max(area, settings.min_area_for_calculation)
-    ceiling_cost = area_for_calculation * settings.ceiling_base_price
+    area_for_calculation = max(area, c["min_area_for_calculation"])
+    ceiling_cost = area_for_calculation * c["ceiling_base_price"]
 
     return area_for_calculation, ceiling_cost
 
 
-def calculate_profile_cost(area: float, profile_type: str) -> float:
+def calculate_profile_cost(
+    area: float, profile_type: str, catalog: Catalog | None = None
+) -> float:
     """Рассчитывает стоимость профиля.
 
     Args:
         area: Площадь помещения в м²
         profile_type: Тип профиля (insert/shadow/floating)
+        catalog: Прайс (по умолчанию текущие настройки)
 
     Returns:
         Стоимость профиля
@@ -33,22 +58,26 @@ def calculate_profile_cost(area: float, profile_type: str) -> float:
     if profile_type == "insert":
         return 0.0
 
-    approximate_perimeter = area * settings.perimeter_coefficient
+    c = catalog or current_catalog()
+    approximate_perimeter = area * c["perimeter_coefficient"]
 
     profile_prices = {
-        "shadow": settings.profile_shadow_price,
-        "floating": settings.profile_floating_price,
+        "shadow": c["profile_shadow_price"],
+        "floating": c["profile_floating_price"],
     }
 
     return approximate_perimeter * profile_prices.get(profile_type, 0)
 
 
-def calculate_cornice_cost(length: float, cornice_type: str | None) -> float:
+def calculate_cornice_cost(
+    length: float, cornice_type: str | None, catalog: Catalog | None = None
+) -> float:
     """Рассчитывает стоимость карнизов.
 
     Args:
         length: Длина карнизов в пог.м
         cornice_type: Тип карниза (pk14/pk5/bp40)
+        catalog: Прайс (по умолчанию текущие настройки)
 
     Returns:
         Стоимость карнизов
@@ -56,77 +85,93 @@ def calculate_cornice_cost(length: float, cornice_type: str | None) -> float:
     if length == 0 or not cornice_type:
         return 0.0
 
+    c = catalog or current_catalog()
     cornice_prices = {
-        "pk5": settings.cornice_pk5_price,
-        "am1": settings.cornice_am1_price,
-        "pk14": settings.cornice_pk14_price,
-        "bpp": settings.cornice_bpp_price,
-        "bp40": settings.cornice_bp40_price,
+        "pk5": c["cornice_pk5_price"],
+        "am1": c["cornice_am1_price"],
+        "pk14": c["cornice_pk14_price"],
+        "bpp": c["cornice_bpp_price"],
+        "bp40": c["cornice_bp40_price"],
     }
 
     return length * cornice_prices.get(cornice_type, 0)
 
 
-def calculate_spotlights_cost(builtin: int, surface: int, pendant: int) -> float:
+def calculate_spotlights_cost(
+    builtin: int, surface: int, pendant: int, catalog: Catalog | None = None
+) -> float:
     """Рассчитывает стоимость светильников по типам."""
+    c = catalog or current_catalog()
     return (
-        builtin * settings.spotlight_builtin_price +
-        surface * settings.spotlight_surface_price +
-        pendant * settings.spotlight_pendant_price
+        builtin * c["spotlight_builtin_price"] +
+        surface * c["spotlight_surface_price"] +
+        pendant * c["spotlight_pendant_price"]
     )
 
 
-def calculate_chandeliers_cost(chandeliers: int) -> float:
+def calculate_chandeliers_cost(chandeliers: int, catalog: Catalog | None = None) -> float:
     """Рассчитывает стоимость люстр."""
-    return chandeliers * settings.chandelier_price
+    c = catalog or current_catalog()
+    return chandeliers * c["chandelier_price"]
 
 
-def calculate_tracks_cost(surface_length: float, builtin_length: float) -> float:
+def calculate_tracks_cost(
+    surface_length: float, builtin_length: float, catalog: Catalog | None = None
+) -> float:
     """Рассчитывает стоимость треков по типам."""
+    c = catalog or current_catalog()
     return (
-        surface_length * settings.track_surface_price +
-        builtin_length * settings.track_built_in_price
+        surface_length * c["track_surface_price"] +
+        builtin_length * c["track_built_in_price"]
     )
 
 
-def calculate_light_lines_cost(length: float) -> float:
+def calculate_light_lines_cost(length: float, catalog: Catalog | None = None) -> float:
     """Рассчитывает стоимость световых линий."""
-    return length * settings.light_lines_price if length > 0 else 0.0
+    if length <= 0:
+        return 0.0
+    c = catalog or current_catalog()
+    return length * c["light_lines_price"]
 
 
-def calculate_total(data: dict) -> CalculationData:
-    """Выполняет полный расчёт стоимости."""
-    area = data.get("area", 0.0)
+@traced()
+def calculate_total(session: Session) -> CalculationData:
+    """Выполняет полный расчёт стоимости по ответам из сессии."""
+    area = session.area or 0.0
     if area <= 0:
         raise ValueError("Площадь помещения не указана или некорректна")
-    
-    area_for_calculation, ceiling_cost = calculate_area_cost(area)
 
-    profile_type = data.get("profile_type", "insert")
-    profile_cost = calculate_profile_cost(area, profile_type)
+    # Прайс читается из настроек один раз на расчёт
+    catalog = current_catalog()
+    area_for_calculation, ceiling_cost = calculate_area_cost(area, catalog)
+
+    profile_type = session.profile_type or "insert"
+    profile_cost = calculate_profile_cost(area, profile_type, catalog)
 
-    cornice_length = data.get("cornice_length", 0)
-    cornice_type = data.get("cornice_type")
-    cornice_cost = calculate_cornice_cost(cornice_length, cornice_type)
+    cornice_length = session.cornice_length or 0
+    cornice_type = session.cornice_type
+    cornice_cost = calculate_cornice_cost(cornice_length, cornice_type, catalog)
 
     # Светильники по типам
-    spotlights_builtin = data.get("spotlights_builtin", 0)
-    spotlights_surface = data.get("spotlights_surface", 0)
-    spotlights_pendant = data.get("spotlights_pendant", 0)
-    spotlights_cost = calculate_spotlights_cost(spotlights_builtin, spotlights_surface, spotlights_pendant)
+    spotlights_builtin = session.spotlights_builtin
+    spotlights_surface = session.spotlights_surface
+    spotlights_pendant = session.spotlights_pendant
+    spotlights_cost = calculate_spotlights_cost(
+        spotlights_builtin, spotlights_surface, spotlights_pendant, catalog
+    )
 
     # Треки по типам
-    track_surface_length = data.get("track_surface_length", 0)
-    track_builtin_length = data.get("track_builtin_length", 0)
-    track_cost = calculate_tracks_cost(track_surface_length, track_builtin_length)
+    track_surface_length = session.track_surface_length
+    track_builtin_length = session.track_builtin_length
+    track_cost = calculate_tracks_cost(track_surface_length, track_builtin_length, catalog)
 
-    light_lines = data.get("light_lines", 0)
-    light_lines_cost = calculate_light_lines_cost(light_lines)
+    light_lines = session.light_lines
+    light_lines_cost = calculate_light_lines_cost(light_lines, catalog)
 
-    chandeliers = data.get("chandeliers", 0)
-    chandeliers_cost = calculate_chandeliers_cost(chandeliers)
+    chandeliers = session.chandeliers
+    chandeliers_cost = calculate_chandeliers_cost(chandeliers, catalog)
 
-    wall_finish = data.get("wall_finish", False)
+    wall_finish = session.wall_finish
 
     total_cost = (
         ceiling_cost + profile_cost + cornice_cost +
@@ -1,30 +1,126 @@
-"""Сервис логирования чатов в текстовые файлы."""
+"""Сервис логирования чатов в текстовые файлы.
 
+Лог пользователя лежит в подкаталоге-корзине (256 корзин по хэшу ID), чтобы
+ни один каталог не разрастался до сотен тысяч файлов:
+``chat_logs/<корзина>/user_<id>.txt`` — текущий сегмент,
+``user_<id>.<время закрытия>.txt.gz`` (или ``.zst``) — закрытые.
+Сегмент закрывается, когда превышает CHAT_LOG_MAX_BYTES или старше
+CHAT_LOG_MAX_AGE_DAYS, и сжимается. Запись, ротация, сжатие, очистка
+истории и обслуживание идут в одном фоновом потоке: цикл событий только
+ставит строки в очередь, поток дописывает их пачками. Обслуживание раз в час удаляет закрытые
+сегменты старше CHAT_LOG_RETENTION_DAYS, закрывает давно не пополнявшиеся
+и переносит логи из старой плоской раскладки.
+После start() сообщения также попадают в поисковый индекс (SEARCH_INDEX_PATH).
+"""
+
+import asyncio
+import gzip
 import logging
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
+from queue import Empty, SimpleQueue
 from typing import Optional
 
+from app.core.config import settings
+from app.services.search import ChatIndex
 
 logger = logging.getLogger(__name__)
 
+BUCKETS = 256
+MAINTENANCE_INTERVAL = 3600
+# Сколько текущих сегментов держать в кэше размеров
+MAX_CACHED_SEGMENTS = 10_000
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+STAMP_FORMAT = "%Y%m%d-%H%M%S-%f"
+DAY = 86400
+
+
+@dataclass(slots=True)
+class Segment:
+    """Текущий сегмент пользователя: размер и время первой записи."""
+
+    size: int
+    started: float
+
+
+def _user_id(name: str) -> int | None:
+    """ID пользователя из имени файла лога (user_<id>...); None — чужой файл."""
+    if not name.startswith("user_"):
+        return None
+    user_id = name[len("user_") :].split(".", 1)[0]
+    return int(user_id) if user_id.isdigit() else None
+
+
+def _compression_method(method: str) -> str:
+    """Способ сжатия из настроек; zstd без установленного zstandard заменяется на gzip."""
+    if method == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            logger.warning("CHAT_LOG_COMPRESSION=zstd, но zstandard не установлен: сжатие gzip")
+            return "gzip"
+    return method
+
+
+def _compress_file(path: Path, method: str) -> None:
+    """Сжимает закрытый сегмент и удаляет исходный файл."""
+    try:
+        if method == "zstd":
+            import zstandard
+
+            target = path.with_name(f"{path.name}.zst")
+            with open(path, "rb") as src, open(target, "wb") as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        else:
+            target = path.with_name(f"{path.name}.gz")
+            with open(path, "rb") as src, gzip.open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        path.unlink()
+    except FileNotFoundError:
+        # Сегмент уже сжат предыдущей задачей
+        pass
+    except Exception as e:
+        logger.error(f"Ошибка сжатия лога чата {path.name}: {e}")
+
 
 class ChatLogger:
     """Логирует сообщения чата в текстовые файлы."""
 
-    def __init__(self, logs_dir: str = "chat_logs"):
+    def __init__(self, logs_dir: str | None = None):
         """Инициализация логгера.
 
         Args:
-            logs_dir: Директория для логов
+            logs_dir: Директория для логов (по умолчанию CHAT_LOGS_DIR)
         """
-        self.logs_dir = Path(logs_dir)
+        self.logs_dir = Path(logs_dir or settings.chat_logs_dir)
         self.logs_dir.mkdir(parents=True, exist_ok=True)
+        self.compression = _compression_method(settings.chat_log_compression)
+        # Кэш сегментов и файлы трогает только поток логов (executor)
+        self.segments: dict[int, Segment] = {}
+        self.queue: SimpleQueue[tuple[int, float, bytes | None]] = SimpleQueue()
+        self._scheduled = False
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chat-log")
+        self._dirs: set[Path] = set()
+        self.index: ChatIndex | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def path(self, user_id: int) -> Path:
+        """Текущий сегмент пользователя."""
+        bucket = zlib.crc32(str(user_id).encode()) % BUCKETS
+        return self.logs_dir / f"{bucket:02x}" / f"user_{user_id}.txt"
 
     def log_message(
         self, user_id: int, username: Optional[str], message: str, is_bot: bool = False
     ) -> None:
-        """Логирует сообщение в файл.
+        """Ставит сообщение в очередь на запись в файл.
+
+        Файлы пишет поток логов: цикл событий только формирует строку.
 
         Args:
             user_id: ID пользователя
@@ -33,28 +129,186 @@ class ChatLogger:
             is_bot: Является ли отправитель ботом
         """
         try:
-            # Убеждаемся, что директория существует
-            self.logs_dir.mkdir(parents=True, exist_ok=True)
-
-            log_file = self.logs_dir / f"user_{user_id}.txt"
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            sender = "🤖 БОТ" if is_bot else f"👤 {username or f'user_{user_id}'}"
-
-            # Запись в файл
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(f"[{timestamp}] {sender}: {message}\n")
+            now = time.time()
+            timestamp = datetime.fromtimestamp(now).strftime(TIME_FORMAT)
+            name = "БОТ" if is_bot else username or f"user_{user_id}"
+            sender = f"🤖 {name}" if is_bot else f"👤 {name}"
+            self._enqueue(user_id, now, f"[{timestamp}] {sender}: {message}\n".encode())
+            if self.index is not None:
+                self.index.add(user_id, now, name, message)
         except Exception as e:
             logger.error(f"Ошибка логирования: {e}")
 
     def clear_chat_history(self, user_id: int) -> None:
-        """Очищает историю чата пользователя (удаляет файл лога).
+        """Очищает историю чата пользователя: все сегменты и сообщения в индексе.
+
+        Сообщения, поставленные в очередь раньше, тоже не попадут в файл.
 
         Args:
             user_id: ID пользователя
         """
-        log_file = self.logs_dir / f"user_{user_id}.txt"
-        if log_file.exists():
-            log_file.unlink()
+        now = time.time()
+        self._enqueue(user_id, now, None)
+        if self.index is not None:
+            self.index.forget(user_id, now)
+
+    def sync(self) -> None:
+        """Ждёт, пока будет записано и сжато всё, что уже поставлено в очередь."""
+        self.executor.submit(self._flush).result()
+
+    def _enqueue(self, user_id: int, now: float, line: bytes | None) -> None:
+        """Добавляет строку (None — очистка) и при необходимости планирует запись."""
+        self.queue.put((user_id, now, line))
+        if not self._scheduled:
+            self._scheduled = True
+            self.executor.submit(self._flush)
+
+    def _flush(self) -> None:
+        """Поток логов: дописывает накопленные строки, открывая файл раз на пользователя."""
+        # Сбрасывается до разбора очереди: строка, добавленная после, запланирует запись сама
+        self._scheduled = False
+        buffers: dict[int, list[bytes]] = {}
+        while True:
+            try:
+                user_id, now, line = self.queue.get_nowait()
+            except Empty:
+                break
+            try:
+                path = self.path(user_id)
+                if line is None:
+                    buffers.pop(user_id, None)
+                    self.segments.pop(user_id, None)
+                    self._delete_segments(user_id, path)
+                    continue
+                segment = self._segment(user_id, path, now)
+                if segment.size and (
+                    segment.size + len(line) > settings.chat_log_max_bytes
+                    or now - segment.started > settings.chat_log_max_age_days * DAY
+                ):
+                    self._append(path, buffers.pop(user_id, []))
+                    self._close_segment(path, now)
+                    segment.size, segment.started = 0, now
+                buffers.setdefault(user_id, []).append(line)
+                segment.size += len(line)
+            except Exception as e:
+                logger.error(f"Ошибка логирования: {e}")
+        for user_id, lines in buffers.items():
+            try:
+                self._append(self.path(user_id), lines)
+            except Exception as e:
+                logger.error(f"Ошибка логирования: {e}")
+
+    def _delete_segments(self, user_id: int, path: Path) -> None:
+        """Удаляет текущий и закрытые сегменты пользователя, в том числе ещё не перенесённые."""
+        for directory in (path.parent, self.logs_dir):
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                if entry.is_file() and _user_id(entry.name) == user_id:
+                    Path(entry.path).unlink(missing_ok=True)
+
+    def _append(self, path: Path, lines: list[bytes]) -> None:
+        """Дописывает строки в текущий сегмент."""
+        if not lines:
+            return
+        if path.parent not in self._dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._dirs.add(path.parent)
+        with open(path, "ab") as f:
+            f.writelines(lines)
+
+    def _segment(self, user_id: int, path: Path, now: float) -> Segment:
+        """Размер и начало текущего сегмента: из кэша или по файлу."""
+        segment = self.segments.pop(user_id, None)
+        if segment is None:
+            segment = Segment(size=0, started=now)
+            try:
+                segment.size = path.stat().st_size
+                with open(path, "rb") as f:
+                    head = f.read(len(TIME_FORMAT) + 8).decode(errors="ignore")
+                segment.started = datetime.strptime(head[1:20], TIME_FORMAT).timestamp()
+            except (OSError, ValueError):
+                pass
+            if len(self.segments) >= MAX_CACHED_SEGMENTS:
+                del self.segments[next(iter(self.segments))]
+        self.segments[user_id] = segment
+        return segment
+
+    def _close_segment(self, path: Path, now: float) -> None:
+        """Переименовывает текущий сегмент в закрытый и сжимает его."""
+        stamp = datetime.fromtimestamp(now).strftime(STAMP_FORMAT)
+        closed = path.with_name(f"{path.stem}.{stamp}.txt")
+        path.rename(closed)
+        if self.compression != "none":
+            _compress_file(closed, self.compression)
+
+    def maintain(self, now: float | None = None) -> None:
+        """Обслуживание: перенос плоских логов, закрытие старых сегментов, удаление.
+
+        Выполняется в потоке логов (как и запись), поэтому не пересекается
+        с дописыванием и ротацией сегментов.
+        """
+        now = time.time() if now is None else now
+        for entry in os.scandir(self.logs_dir):
+            user_id = _user_id(entry.name) if entry.is_file() else None
+            if user_id is not None:
+                target = self.path(user_id)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(entry.path, target.with_name(entry.name))
+        for bucket in os.scandir(self.logs_dir):
+            if bucket.is_dir():
+                self._maintain_bucket(bucket.path, now)
+        if self.index is not None:
+            self.index.purge_cleared()
+            if settings.chat_log_retention_days:
+                self.index.prune(now - settings.chat_log_retention_days * DAY)
+
+    def _maintain_bucket(self, bucket: str, now: float) -> None:
+        retention = settings.chat_log_retention_days * DAY
+        for entry in os.scandir(bucket):
+            _, _, rest = entry.name.partition(".")
+            user_id = _user_id(entry.name)
+            if user_id is None:
+                continue
+            if rest == "txt":
+                if now - entry.stat().st_mtime > settings.chat_log_max_age_days * DAY:
+                    self.segments.pop(user_id, None)
+                    self._close_segment(Path(entry.path), now)
+                continue
+            try:
+                stamp = datetime.strptime(rest.split(".", 1)[0], STAMP_FORMAT).timestamp()
+            except ValueError:
+                continue
+            if retention and now - stamp > retention:
+                os.unlink(entry.path)
+            elif rest.endswith(".txt") and self.compression != "none":
+                # Сегмент, не сжатый до перезапуска
+                _compress_file(Path(entry.path), self.compression)
+
+    def start(self) -> None:
+        """Открывает поисковый индекс и запускает обслуживание в текущем цикле событий."""
+        if settings.search_index_path and self.index is None:
+            self.index = ChatIndex(settings.search_index_path)
+        self._task = asyncio.create_task(self._maintenance(), name="chat-log-maintenance")
+
+    async def stop(self) -> None:
+        """Останавливает обслуживание и дожидается записи очереди и сжатия сегментов."""
+        if self._task is not None:
+            self._task.cancel()
+        await asyncio.to_thread(self.executor.shutdown)
+        if self.index is not None:
+            await asyncio.to_thread(self.index.close)
+
+    async def _maintenance(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(self.executor, self.maintain)
+            except Exception as e:
+                logger.error(f"Ошибка обслуживания логов чатов: {e}")
+            await asyncio.sleep(MAINTENANCE_INTERVAL)
 
 
 # Глобальный экземпляр
@@ -0,0 +1,97 @@
+"""Потоковая выгрузка заявок в CSV или Parquet.
+
+Заявки читаются из LeadStore построчно и пишутся пачками по CHUNK_SIZE,
+поэтому память не зависит от длины периода. Parquet требует pyarrow
+(``poetry install -E parquet``); без него доступен только CSV.
+"""
+
+import csv
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any
+
+from app.schemas.calculation import CalculationData
+from app.services.leads import COLUMNS
+
+CHUNK_SIZE = 10_000
+FORMATS = ("csv", "parquet")
+
+
+def parquet_available() -> bool:
+    """Установлен ли pyarrow."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _chunks(records: Iterable[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+    """Пачки строк выгрузки; время — ISO-строкой в местном часовом поясе."""
+    rows = iter(records)
+    while chunk := list(islice(rows, CHUNK_SIZE)):
+        for row in chunk:
+            row["ts"] = datetime.fromtimestamp(row["ts"]).isoformat(sep=" ", timespec="seconds")
+        yield chunk
+
+
+def write_csv(records: Iterable[dict[str, Any]], path: Path) -> int:
+    """Пишет CSV (UTF-8 с BOM, чтобы Excel распознал кодировку).
+
+    Returns:
+        Сколько заявок выгружено
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for chunk in _chunks(records):
+            writer.writerows(chunk)
+            count += len(chunk)
+    return count
+
+
+def _parquet_schema() -> Any:
+    """Схема Parquet по типам колонок: пустые в первой пачке колонки не теряют тип."""
+    import pyarrow as pa
+
+    types = {bool: pa.bool_(), int: pa.int64(), float: pa.float64()}
+    fields = {"user_id": pa.int64(), "is_update": pa.bool_()}
+    for name, field in CalculationData.model_fields.items():
+        fields[name] = types.get(field.annotation, pa.string())
+    return pa.schema([(column, fields.get(column, pa.string())) for column in COLUMNS])
+
+
+def write_parquet(records: Iterable[dict[str, Any]], path: Path) -> int:
+    """Пишет Parquet: одна группа строк на пачку.
+
+    Returns:
+        Сколько заявок выгружено
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema()
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(records):
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def export_leads(records: Iterable[dict[str, Any]], path: Path, fmt: str = "csv") -> int:
+    """Выгружает заявки в файл выбранного формата.
+
+    Raises:
+        ValueError: Неизвестный формат или Parquet без pyarrow
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+    if fmt == "parquet":
+        if not parquet_available():
+            raise ValueError("Для Parquet нужен pyarrow: poetry install -E parquet")
+        return write_parquet(records, path)
+    return write_csv(records, path)
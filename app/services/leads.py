@@ -0,0 +1,132 @@
+"""Хранилище заявок: расчёты и заказы замера в JSONL.
+
+Каждая заявка — одна строка JSON, дописываемая в файл месяца
+``leads/leads-ГГГГ-ММ.jsonl``; файлы только пополняются. Запись плоская:
+время, вид (``quote`` — расчёт, ``measurement`` — заказ замера),
+пользователь, контакты и поля CalculationData, поэтому выгрузка
+(app.services.lead_export) читает её построчно без разбора вложенных
+структур.
+"""
+
+import json
+import logging
+import time
+from collections.abc import Iterator
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+from app.schemas.calculation import CalculationData
+from app.utils.validation import normalize_phone, phone_with_country_code
+
+logger = logging.getLogger(__name__)
+
+# Колонки выгрузки в порядке следования
+COLUMNS = (
+    "ts",
+    "kind",
+    "user_id",
+    "full_name",
+    "is_update",
+    "name",
+    "phone",
+    "address",
+    *CalculationData.model_fields,
+)
+
+
+class LeadStore:
+    """Дописывает заявки в помесячные JSONL-файлы и читает их за период.
+
+    Args:
+        leads_dir: Каталог файлов (по умолчанию LEADS_DIR)
+    """
+
+    def __init__(self, leads_dir: str | None = None) -> None:
+        self.leads_dir = Path(leads_dir or settings.leads_dir)
+
+    def path(self, day: date) -> Path:
+        """Файл месяца, в который попадает день."""
+        return self.leads_dir / f"leads-{day:%Y-%m}.jsonl"
+
+    def add_quote(
+        self,
+        user_id: int,
+        full_name: str,
+        calculation: CalculationData,
+        is_update: bool = False,
+    ) -> None:
+        """Сохраняет расчёт, отправленный менеджерам."""
+        self._append(
+            {"kind": "quote", "user_id": user_id, "full_name": full_name, "is_update": is_update},
+            calculation,
+        )
+
+    def add_measurement(
+        self,
+        user_id: int,
+        full_name: str,
+        name: str,
+        phone: str,
+        address: str,
+        calculation: CalculationData | None = None,
+    ) -> None:
+        """Сохраняет заказ замера; телефон приводится к виду 7XXXXXXXXXX."""
+        record = {
+            "kind": "measurement",
+            "user_id": user_id,
+            "full_name": full_name,
+            "name": name,
+            "phone": phone_with_country_code(normalize_phone(phone)),
+            "address": address,
+        }
+        self._append(record, calculation)
+
+    def _append(self, record: dict[str, Any], calculation: CalculationData | None) -> None:
+        """Дописывает строку; ошибка записи не прерывает диалог."""
+        now = time.time()
+        line = {"ts": now, **record, **(calculation.model_dump() if calculation else {})}
+        try:
+            path = self.path(datetime.fromtimestamp(now).date())
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.error(f"Ошибка сохранения заявки {record['kind']}: {e}")
+
+    def lines(self, since: date | None = None, until: date | None = None) -> Iterator[str]:
+        """Строки файлов месяцев, пересекающихся с периодом, без разбора."""
+        for path in sorted(self.leads_dir.glob("leads-*.jsonl")):
+            month = path.stem.removeprefix("leads-")
+            if (since and month < f"{since:%Y-%m}") or (until and month > f"{until:%Y-%m}"):
+                continue
+            with open(path, encoding="utf-8") as f:
+                yield from f
+
+    def read(
+        self, since: date | None = None, until: date | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """Заявки за период (обе даты включительно) по порядку, построчно."""
+        for line in self.lines(since, until):
+            record = parse_lead(line, since, until)
+            if record is not None:
+                yield record
+
+
+def parse_lead(
+    line: str, since: date | None = None, until: date | None = None
+) -> dict[str, Any] | None:
+    """Заявка из строки файла; None — строка вне периода или оборвана."""
+    try:
+        record: dict[str, Any] = json.loads(line)
+    except ValueError:
+        # Строка, оборванная при аварийной остановке
+        return None
+    day = datetime.fromtimestamp(record["ts"]).date()
+    if (since and day < since) or (until and day > until):
+        return None
+    return record
+
+
+lead_store = LeadStore()
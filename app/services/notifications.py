@@ -0,0 +1,57 @@
+"""Рассылка уведомлений менеджерам в канал, группу и личные чаты."""
+
+import logging
+
+from aiogram import Bot
+from aiogram.enums import ParseMode
+
+from app.bot.outbound import background_sends
+from app.core.config import settings
+from app.monitoring.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+async def _send_notification(bot: Bot, chat_id: int, report: str) -> None:
+    """Отправляет уведомление в чат (группу или пользователю).
+
+    Args:
+        bot: Экземпляр бота
+        chat_id: ID чата (группы или пользователя)
+        report: Текст отчёта
+    """
+    try:
+        await bot.send_message(chat_id=chat_id, text=report, parse_mode=ParseMode.HTML)
+    except Exception as e:
+        error_msg = str(e).lower()
+        if "chat not found" not in error_msg and "bot was blocked" not in error_msg:
+            logger.warning(f"Не удалось отправить уведомление в чат {chat_id}: {e}")
+
+
+async def _send_report(bot: Bot, report: str) -> None:
+    """Отправляет отчёт по очереди в канал, группу и менеджерам."""
+    # Отправка в канал (если настроен)
+    if settings.channel_chat_id:
+        await _send_notification(bot, int(settings.channel_chat_id), report)
+
+    # Отправка в группу (если настроена)
+    if settings.group_chat_id:
+        await _send_notification(bot, int(settings.group_chat_id), report)
+
+    # Отправка каждому менеджеру (если настроены)
+    for admin_id in settings.admin_ids_list:
+        await _send_notification(bot, admin_id, report)
+
+
+@traced()
+def notify_managers(bot: Bot, report: str) -> None:
+    """Ставит отчёт в канал, группу и/или менеджерам в фоновую отправку.
+
+    Хендлер не ждёт рассылку: она идёт с фоновым приоритетом и при упоре
+    в лимит Telegram пропускает вперёд ответы пользователям.
+
+    Args:
+        bot: Экземпляр бота
+        report: Текст отчёта
+    """
+    background_sends.submit(_send_report(bot, report), name="notify_managers")
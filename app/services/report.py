@@ -0,0 +1,201 @@
+"""Форматирование результата расчёта и отчётов для менеджеров."""
+
+from datetime import datetime
+
+from app.core.config import settings
+from app.monitoring.tracing import traced
+from app.schemas.calculation import CalculationData
+from app.schemas.session import Session
+from app.templates.messages.texts import (
+    ADMIN_REPORT,
+    MEASUREMENT_REPORT,
+    RESULT_MESSAGE,
+    format_ceiling_details,
+    format_chandeliers_details,
+    format_cornice_details,
+    format_light_lines_details,
+    format_profile_details,
+    format_spotlights_details,
+    format_track_details,
+    get_cornice_name,
+    get_profile_name,
+)
+
+
+def _format_lighting_info(calculation: CalculationData) -> str:
+    """Формирует строки об освещении для результата."""
+    lighting_info = ""
+    total_spotlights = (
+        calculation.spotlights_builtin + calculation.spotlights_surface + calculation.spotlights_pendant
+    )
+    if total_spotlights > 0:
+        lighting_info += f"• Точечные светильники: {total_spotlights} шт\n"
+        details = []
+        if calculation.spotlights_builtin > 0:
+            details.append(f"  - Встроенные ({calculation.spotlights_builtin} шт)")
+        if calculation.spotlights_surface > 0:
+            details.append(f"  - Накладные ({calculation.spotlights_surface} шт)")
+        if calculation.spotlights_pendant > 0:
+            details.append(f"  - Подвесные ({calculation.spotlights_pendant} шт)")
+        lighting_info += "\n".join(details) + "\n"
+
+    total_tracks = calculation.track_surface_length + calculation.track_builtin_length
+    if total_tracks > 0:
+        lighting_info += f"• Треки: {total_tracks} пог.м\n"
+        details = []
+        if calculation.track_surface_length > 0:
+            details.append(f"  - Накладные ({calculation.track_surface_length} пог.м)")
+        if calculation.track_builtin_length > 0:
+            details.append(f"  - Встроенные ({calculation.track_builtin_length} пог.м)")
+        lighting_info += "\n".join(details) + "\n"
+
+    if calculation.light_lines > 0:
+        lighting_info += f"• Световые линии: {calculation.light_lines} пог.м\n"
+    if calculation.chandeliers > 0:
+        lighting_info += f"• Люстры: {calculation.chandeliers} шт\n"
+    return lighting_info
+
+
+def format_result_info(calculation: CalculationData) -> tuple[str, str, str]:
+    """Формирует информацию о расчёте для отображения.
+
+    Args:
+        calculation: Данные расчёта
+
+    Returns:
+        (примечание о площади, информация о профиле, информация об освещении)
+    """
+    area_note = ""
+    if calculation.area < settings.min_area_for_calculation:
+        area_note = f"• Расчёт от минимальной площади: {calculation.area_for_calculation} м²\n"
+
+    profile_name = get_profile_name(calculation.profile_type)
+    if calculation.profile_type == "insert":
+        profile_info = f"• Профиль: {profile_name}\n"
+    else:
+        perimeter = calculation.area * settings.perimeter_coefficient
+        profile_info = f"• Профиль: {profile_name} — {perimeter:.1f} пог.м\n"
+
+    return area_note, profile_info, _format_lighting_info(calculation)
+
+
+@traced()
+def format_result_message(calculation: CalculationData) -> str:
+    """Формирует сообщение с результатом расчёта для пользователя."""
+    area_note, profile_info, lighting_info = format_result_info(calculation)
+    return RESULT_MESSAGE.format(
+        area=calculation.area,
+        area_note=area_note,
+        cornice_info=profile_info,
+        lighting_info=lighting_info,
+        total=calculation.total_cost,
+    )
+
+
+def format_admin_details(calculation: CalculationData) -> str:
+    """Форматирует детализацию расчёта для админа.
+
+    Args:
+        calculation: Данные расчёта
+
+    Returns:
+        Отформатированная детализация
+    """
+    details = format_ceiling_details(
+        calculation.area_for_calculation, calculation.ceiling_cost, settings.ceiling_base_price
+    )
+    if calculation.profile_cost > 0:
+        perimeter = calculation.area * settings.perimeter_coefficient
+        profile_name = get_profile_name(calculation.profile_type)
+        details += format_profile_details(profile_name, perimeter, calculation.profile_cost)
+
+    cornice_name = get_cornice_name(calculation.cornice_type)
+    if calculation.cornice_cost > 0 and cornice_name:
+        details += format_cornice_details(
+            cornice_name, calculation.cornice_length, calculation.cornice_cost
+        )
+
+    if calculation.spotlights_cost > 0:
+        details += format_spotlights_details(
+            calculation.spotlights_builtin,
+            calculation.spotlights_surface,
+            calculation.spotlights_pendant,
+            calculation.spotlights_cost,
+            {
+                "builtin": settings.spotlight_builtin_price,
+                "surface": settings.spotlight_surface_price,
+                "pendant": settings.spotlight_pendant_price,
+            },
+        )
+
+    if calculation.track_cost > 0:
+        details += format_track_details(
+            calculation.track_surface_length,
+            calculation.track_builtin_length,
+            calculation.track_cost,
+            {"surface": settings.track_surface_price, "builtin": settings.track_built_in_price},
+        )
+
+    if calculation.light_lines_cost > 0:
+        details += format_light_lines_details(
+            calculation.light_lines, calculation.light_lines_cost, settings.light_lines_price
+        )
+
+    if calculation.chandeliers_cost > 0:
+        details += format_chandeliers_details(
+            calculation.chandeliers, calculation.chandeliers_cost, settings.chandelier_price
+        )
+    return details
+
+
+@traced()
+def format_admin_report(
+    username: str, full_name: str, calculation: CalculationData, is_update: bool = False
+) -> str:
+    """Формирует отчёт о расчёте для менеджеров.
+
+    Args:
+        username: Username пользователя в виде '@name' или 'нет username'
+        full_name: Полное имя пользователя в Telegram
+        calculation: Данные расчёта
+        is_update: Расчёт изменён после редактирования
+
+    Returns:
+        Текст отчёта
+    """
+    area_note, profile_info, lighting_info = format_result_info(calculation)
+    return ADMIN_REPORT.format(
+        title="ИЗМЕНЁННЫЙ РАСЧЁТ ✏️" if is_update else "НОВЫЙ РАСЧЁТ",
+        username=username,
+        full_name=full_name,
+        date=datetime.now().strftime("%d.%m.%Y %H:%M"),
+        area=calculation.area,
+        area_note=area_note,
+        profile_info=profile_info,
+        lighting_info=lighting_info,
+        total=calculation.total_cost,
+        details=format_admin_details(calculation),
+        wall_finish_status="✅" if calculation.wall_finish else "❌",
+    )
+
+
+@traced()
+def format_measurement_report(username: str, full_name: str, session: Session) -> str:
+    """Формирует отчёт о заказе замера для менеджеров.
+
+    Args:
+        username: Username пользователя в виде '@name' или 'нет username'
+        full_name: Полное имя пользователя в Telegram
+        session: Сессия с customer_name, phone и address
+
+    Returns:
+        Текст отчёта
+    """
+    return MEASUREMENT_REPORT.format(
+        username=username,
+        full_name=full_name,
+        customer_name=session.customer_name,
+        phone=session.phone,
+        address=session.address,
+        date=datetime.now().strftime("%d.%m.%Y %H:%M"),
+    )
@@ -0,0 +1,202 @@
+"""Пересчёт сохранённых расчётов по другому прайсу.
+
+Прайс (Catalog) — цены и коэффициенты из настроек; кандидат задаётся
+JSON-файлом с изменёнными значениями. Расчёты обрабатываются пачками по
+колонкам: каждая статья сметы считается проходом по своим колонкам с
+ценами, выбранными из прайса один раз на пачку, по тем же формулам, что
+функции калькулятора (app.services.calculator); совпадение с
+calculate_total проверяет scripts.requote_check. Распределение
+изменений копится гистограммой с шагом 0,01 %, поэтому процентили
+считаются в постоянной памяти и складываются между процессами.
+"""
+
+import json
+import math
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+from app.services.calculator import CATALOG_FIELDS, Catalog, current_catalog
+from app.services.leads import parse_lead
+
+Batch = dict[str, list[Any]]
+# Колонки расчёта, от которых зависит цена
+QUANTITIES = (
+    "area",
+    "profile_type",
+    "cornice_length",
+    "cornice_type",
+    "spotlights_builtin",
+    "spotlights_surface",
+    "spotlights_pendant",
+    "track_surface_length",
+    "track_builtin_length",
+    "light_lines",
+    "chandeliers",
+)
+COLUMNS = ("user_id", "ts", "total_cost", *QUANTITIES)
+# Шаг гистограммы изменений: 0,01 %
+BIN = 0.01
+
+
+def load_catalog(path: Path) -> Catalog:
+    """Текущий прайс с изменениями из JSON-файла.
+
+    Raises:
+        ValueError: В файле неизвестные поля или не числа
+    """
+    changes = json.loads(path.read_text(encoding="utf-8"))
+    unknown = set(changes) - set(CATALOG_FIELDS)
+    if unknown:
+        raise ValueError(f"Неизвестные поля прайса: {', '.join(sorted(unknown))}")
+    return {**current_catalog(), **{name: float(value) for name, value in changes.items()}}
+
+
+def price_batch(columns: Batch, catalog: Catalog) -> list[float]:
+    """Итоговые стоимости пачки расчётов по прайсу, как в calculate_total."""
+    c = catalog
+    area = columns["area"]
+    min_area, base = c["min_area_for_calculation"], c["ceiling_base_price"]
+    perimeter = c["perimeter_coefficient"]
+    profile_prices = {"shadow": c["profile_shadow_price"], "floating": c["profile_floating_price"]}
+    cornice_prices = {
+        "pk5": c["cornice_pk5_price"],
+        "am1": c["cornice_am1_price"],
+        "pk14": c["cornice_pk14_price"],
+        "bpp": c["cornice_bpp_price"],
+        "bp40": c["cornice_bp40_price"],
+    }
+    builtin_price, surface_price, pendant_price = (
+        c["spotlight_builtin_price"],
+        c["spotlight_surface_price"],
+        c["spotlight_pendant_price"],
+    )
+    track_surface_price, track_builtin_price = c["track_surface_price"], c["track_built_in_price"]
+    light_lines_price, chandelier_price = c["light_lines_price"], c["chandelier_price"]
+
+    ceiling = [max(value, min_area) * base for value in area]
+    profile = [
+        value * perimeter * profile_prices.get(kind, 0)
+        for value, kind in zip(area, columns["profile_type"])
+    ]
+    cornice = [
+        length * cornice_prices.get(kind, 0)
+        for length, kind in zip(columns["cornice_length"], columns["cornice_type"])
+    ]
+    spotlights = [
+        builtin * builtin_price + surface * surface_price + pendant * pendant_price
+        for builtin, surface, pendant in zip(
+            columns["spotlights_builtin"],
+            columns["spotlights_surface"],
+            columns["spotlights_pendant"],
+        )
+    ]
+    tracks = [
+        surface * track_surface_price + builtin * track_builtin_price
+        for surface, builtin in zip(
+            columns["track_surface_length"], columns["track_builtin_length"]
+        )
+    ]
+    lines = [length * light_lines_price if length > 0 else 0.0 for length in columns["light_lines"]]
+    chandeliers = [count * chandelier_price for count in columns["chandeliers"]]
+    # Статьи складываются в том же порядке, что в calculate_total
+    return [
+        sum(costs)
+        for costs in zip(ceiling, profile, cornice, spotlights, tracks, lines, chandeliers)
+    ]
+
+
+@dataclass(slots=True)
+class RequoteStats:
+    """Сводка пересчёта: суммы и гистограмма изменений в процентах."""
+
+    count: int = 0
+    current: float = 0.0
+    candidate: float = 0.0
+    changed: int = 0
+    histogram: Counter[int] = field(default_factory=Counter)
+
+    def add(self, current: float, candidate: float) -> None:
+        """Учитывает один расчёт."""
+        self.count += 1
+        self.current += current
+        self.candidate += candidate
+        self.changed += candidate != current
+        percent = (candidate - current) / current * 100 if current else 0.0
+        self.histogram[round(percent / BIN)] += 1
+
+    def merge(self, other: "RequoteStats") -> None:
+        """Добавляет сводку другой пачки."""
+        self.count += other.count
+        self.current += other.current
+        self.candidate += other.candidate
+        self.changed += other.changed
+        self.histogram.update(other.histogram)
+
+    def percentile(self, q: float) -> float:
+        """Процентиль изменения в процентах (с точностью до шага гистограммы)."""
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for key in sorted(self.histogram):
+            seen += self.histogram[key]
+            if seen >= rank:
+                return key * BIN
+        return 0.0
+
+    def summary(self) -> str:
+        """Отчёт: среднее изменение, процентили и сдвиг выручки."""
+        if not self.count:
+            return "Расчётов нет"
+        shift = self.candidate - self.current
+        share = shift / self.current * 100 if self.current else 0.0
+        percentiles = ", ".join(
+            f"p{q}: {self.percentile(q):+.2f} %" for q in (5, 25, 50, 75, 95, 99)
+        )
+        return (
+            f"Расчётов: {self.count}, изменилось: {self.changed}\n"
+            f"Среднее изменение: {shift / self.count:+,.0f} ₽\n"
+            f"Изменение в процентах — {percentiles}\n"
+            f"Выручка: {self.current:,.0f} → {self.candidate:,.0f} ₽ "
+            f"({shift:+,.0f} ₽, {share:+.2f} %)"
+        )
+
+
+def to_columns(records: Iterable[dict[str, Any]]) -> Batch:
+    """Расчёты по колонкам; заказы замера пропускаются (их расчёт уже сохранён в quote)."""
+    batch: Batch = {name: [] for name in COLUMNS}
+    for record in records:
+        if record["kind"] == "quote":
+            for name in COLUMNS:
+                batch[name].append(record.get(name) or 0)
+    return batch
+
+
+def requote_lines(
+    lines: list[str],
+    since: date | None,
+    until: date | None,
+    current: Catalog,
+    candidate: Catalog,
+) -> tuple[list[tuple[Any, ...]], RequoteStats]:
+    """Разбирает строки хранилища заявок и пересчитывает их по обоим прайсам.
+
+    Выполняется в текущем процессе или в процессе пула: разбор JSON — основная работа.
+
+    Returns:
+        Строки (пользователь, время, сохранённый итог, текущий, кандидат, разница)
+        и сводка пачки
+    """
+    records = (parse_lead(line, since, until) for line in lines)
+    batch = to_columns(record for record in records if record is not None)
+    stats = RequoteStats()
+    rows = []
+    totals = zip(price_batch(batch, current), price_batch(batch, candidate))
+    for user_id, ts, stored, (old, new) in zip(
+        batch["user_id"], batch["ts"], batch["total_cost"], totals
+    ):
+        stats.add(old, new)
+        rows.append((user_id, ts, stored, old, new, new - old))
+    return rows, stats
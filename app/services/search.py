@@ -0,0 +1,227 @@
+"""Полнотекстовый поиск по диалогам для менеджеров (SQLite FTS5).
+
+ChatLogger отдаёт каждое записанное сообщение в индекс; запись идёт
+пачками в отдельном потоке, цикл событий только кладёт строку в очередь.
+Индекс понимает русский текст: токенизатор unicode61 приводит регистр,
+«ё» заменяется на «е», слова запроса ищутся по префиксу («москв» найдёт
+«Москве»). Телефоны из сообщений нормализуются (8 → 7, без скобок и
+дефисов) и индексируются отдельно целиком и последними 10 и 7 цифрами,
+поэтому находятся в любом написании. Очищенная история пользователя
+сразу исчезает из поиска по отметке в таблице cleared, а сами строки
+удаляются при обслуживании одним проходом по таблице.
+"""
+
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from queue import Empty, SimpleQueue
+
+from app.utils.validation import phone_with_country_code
+
+BATCH_SIZE = 1000
+# Маркеры совпадений в сниппете, заменяются на разметку при выводе
+MATCH_START = "\x02"
+MATCH_END = "\x03"
+
+PHONE = re.compile(r"\+?\d[\d\s()\-]{5,}\d")
+WORD = re.compile(r"\w+")
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages USING fts5(
+    text, phones, user_id UNINDEXED, ts UNINDEXED, sender UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS cleared (user_id INTEGER PRIMARY KEY, before REAL NOT NULL);
+"""
+# С какого момента индекс пополняется ботом: архив до него загружает app.cli.backfill
+LIVE_SINCE = """
+INSERT OR IGNORE INTO meta SELECT 'live_since', COALESCE(MIN(ts), ?) FROM messages
+"""
+INSERT = "INSERT INTO messages VALUES (?, ?, ?, ?, ?)"
+# История пользователя до before очищена: её сообщения скрыты и удаляются при обслуживании
+FORGET = """
+INSERT INTO cleared VALUES (?, ?)
+ON CONFLICT (user_id) DO UPDATE SET before = max(before, excluded.before)
+"""
+NOT_CLEARED = """
+NOT EXISTS (
+    SELECT 1 FROM cleared
+    WHERE cleared.user_id = messages.user_id AND messages.ts <= cleared.before
+)
+"""
+
+IndexRow = tuple[str, str, int, float, str]
+SEARCH = f"""
+SELECT user_id, ts, sender, snippet(messages, 0, '{MATCH_START}', '{MATCH_END}', '…', 12)
+FROM messages WHERE messages MATCH ? AND {NOT_CLEARED} ORDER BY rank LIMIT ?
+"""
+
+
+@dataclass(slots=True)
+class Forget:
+    """Элемент очереди записи: очистка истории пользователя до момента before."""
+
+    user_id: int
+    before: float
+
+
+@dataclass(slots=True)
+class Hit:
+    """Найденное сообщение: пользователь, время, отправитель и фрагмент текста."""
+
+    user_id: int
+    ts: float
+    sender: str
+    snippet: str
+
+
+def _fold(text: str) -> str:
+    return text.replace("ё", "е").replace("Ё", "Е")
+
+
+def phone_tokens(text: str) -> str:
+    """Телефоны из текста: полный номер, последние 10 и 7 цифр через пробел."""
+    tokens = []
+    for match in PHONE.finditer(text):
+        digits = phone_with_country_code(re.sub(r"\D", "", match.group()))
+        tokens.append(digits)
+        tokens.extend(digits[-size:] for size in (10, 7) if len(digits) > size)
+    return " ".join(tokens)
+
+
+def index_row(user_id: int, ts: float, sender: str, message: str) -> IndexRow:
+    """Строка таблицы индекса для сообщения."""
+    return (_fold(message), phone_tokens(message), user_id, ts, sender)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """Соединение с индексом: WAL, чтобы поиск не ждал записи."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def match_expression(query: str) -> str:
+    """Запрос FTS5: все слова по префиксу, телефон — по колонке phones."""
+    terms = []
+    digits = re.sub(r"\D", "", query)
+    if len(digits) >= 7:
+        terms.append(f'phones : "{phone_with_country_code(digits)}"*')
+        query = PHONE.sub(" ", query)
+    terms.extend(f'"{word}"*' for word in WORD.findall(_fold(query).lower()))
+    return " ".join(terms)
+
+
+class ChatIndex:
+    """Индекс сообщений в файле SQLite с фоновой записью.
+
+    Args:
+        path: Файл индекса
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        conn = connect(path)
+        with conn:
+            conn.executescript(SCHEMA)
+            conn.execute(LIVE_SINCE, (time.time(),))
+        conn.close()
+        self.queue: SimpleQueue[IndexRow | Forget | threading.Event | None] = SimpleQueue()
+        self._local = threading.local()
+        self._writer = threading.Thread(target=self._write_loop, name="chat-index", daemon=True)
+        self._writer.start()
+
+    def add(self, user_id: int, ts: float, sender: str, message: str) -> None:
+        """Ставит сообщение в очередь на индексацию."""
+        self.queue.put(index_row(user_id, ts, sender, message))
+
+    def forget(self, user_id: int, before: float) -> None:
+        """Ставит в очередь очистку истории пользователя: сообщения до before не ищутся."""
+        self.queue.put(Forget(user_id, before))
+
+    def sync(self) -> None:
+        """Ждёт, пока всё, что уже в очереди, будет записано."""
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait()
+
+    def close(self) -> None:
+        """Дописывает очередь и останавливает поток записи."""
+        self.queue.put(None)
+        self._writer.join()
+
+    def prune(self, before: float) -> int:
+        """Удаляет сообщения старше before (время Unix).
+
+        Returns:
+            Сколько сообщений удалено
+        """
+        conn = connect(self.path)
+        try:
+            with conn:
+                return conn.execute("DELETE FROM messages WHERE ts < ?", (before,)).rowcount
+        finally:
+            conn.close()
+
+    def purge_cleared(self) -> int:
+        """Удаляет сообщения очищенных историй и сами отметки об очистке.
+
+        Returns:
+            Сколько сообщений удалено
+        """
+        conn = connect(self.path)
+        try:
+            with conn:
+                deleted = conn.execute(f"DELETE FROM messages WHERE NOT {NOT_CLEARED}").rowcount
+                conn.execute("DELETE FROM cleared")
+                return deleted
+        finally:
+            conn.close()
+
+    def _write_loop(self) -> None:
+        """Поток записи: забирает из очереди пачку и записывает её одной транзакцией."""
+        conn = connect(self.path)
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except Empty:
+                    break
+            rows = [item for item in batch if isinstance(item, tuple)]
+            forgets = [(item.user_id, item.before) for item in batch if isinstance(item, Forget)]
+            if rows or forgets:
+                with conn:
+                    conn.executemany(INSERT, rows)
+                    conn.executemany(FORGET, forgets)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            running = None not in batch
+        conn.close()
+
+    def search(self, query: str, limit: int = 10) -> list[Hit]:
+        """Самые подходящие сообщения, не больше одного на пользователя.
+
+        Вызывается из потока (asyncio.to_thread): у каждого потока своё соединение.
+        """
+        expression = match_expression(query)
+        if not expression:
+            return []
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = connect(self.path)
+        hits: dict[int, Hit] = {}
+        for user_id, ts, sender, snippet in conn.execute(SEARCH, (expression, limit * 5)):
+            if user_id not in hits:
+                hits[user_id] = Hit(user_id, ts, sender, snippet)
+            if len(hits) == limit:
+                break
+        return list(hits.values())
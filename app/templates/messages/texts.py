@@ -136,6 +136,8 @@ LIGHT_LINES_QUESTION = """Укажите <b>общую длину световы
 
 LIGHT_LINES_ACCEPTED = """✅ <b>Световые линии:</b> {length} пог.м"""
 
+NO_LIGHT_LINES = """✅ <b>Световые линии:</b> не требуются"""
+
 LIGHT_LINES_INVALID_INPUT = "❌ Пожалуйста, укажите <b>число</b>\n\n💡 <i>Например: 3.5</i>"
 
 # Освещение - Люстры
@@ -377,6 +379,41 @@ def get_track_type_name(track_type: str | None) -> str | None:
 # Редактирование параметров
 EDIT_PARAMS_MESSAGE = """✏️ <b>Выберите параметр для изменения:</b>"""
 
+INCOMPLETE_CALCULATION_MESSAGE = (
+    "❌ Ошибка: не все обязательные параметры заполнены. Пожалуйста, начните расчёт заново."
+)
+
 NO_CALCULATION_MESSAGE = """❌ Нет активного расчёта.
 
-Используйте /start чтобы начать новый расчёт."""
\ No newline at end of file
+Используйте /start чтобы начать новый расчёт."""
+
+# Ответ на нажатие кнопки из предыдущего расчёта (всплывающее уведомление)
+STALE_BUTTON_MESSAGE = "Эта кнопка устарела. Продолжите в последнем сообщении или начните /start"
+
+
+# Ответ на слишком частые нажатия и сообщения
+THROTTLED_MESSAGE = "Слишком много действий подряд. Подождите несколько секунд"
+
+
+# Команды администратора (/profile, /memsnap, /find, /leads)
+PROFILE_STARTED = "⏱ Профилирую {seconds} с…"
+PROFILE_BUSY = "Профилирование уже идёт, дождитесь результата"
+PROFILE_DONE = (
+    "Профиль за {seconds} с, {samples} сэмплов (collapsed stacks). "
+    "Самые частые функции:\n{summary}"
+)
+MEMSNAP_STARTED = "tracemalloc включён. Следующий /memsnap покажет прирост памяти с этого момента"
+MEMSNAP_DONE = "Прирост памяти с прошлого снимка:\n{summary}"
+MEMSNAP_STOPPED = "tracemalloc выключен"
+FIND_USAGE = "Использование: /find <телефон, имя или адрес>"
+FIND_DISABLED = "Поиск выключен: не задан SEARCH_INDEX_PATH"
+FIND_NOTHING = "Ничего не найдено ({elapsed:.0f} мс)"
+FIND_RESULTS = "Найдено пользователей: {count} ({elapsed:.0f} мс)\n\n{results}"
+FIND_HIT = '<a href="tg://user?id={user_id}">{user_id}</a> · {time} · {sender}\n{snippet}'
+LEADS_USAGE = "Использование: /leads [с ГГГГ-ММ-ДД] [по ГГГГ-ММ-ДД] [csv|parquet]"
+LEADS_EMPTY = "Заявок за период нет"
+LEADS_DONE = "Заявок: {count} ({period})"
+LEADS_TOO_LARGE = (
+    "Выгрузка {size:.0f} МБ больше лимита Telegram: сузьте период или используйте "
+    "python -m app.cli.export_leads"
+)
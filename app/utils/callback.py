@@ -20,7 +20,7 @@ async def safe_answer_callback(callback: CallbackQuery, text: str | None = None)
     except TelegramBadRequest as e:
         # Игнорируем ошибки устаревших callback queries
         if "query is too old" in str(e) or "query ID is invalid" in str(e):
-            logger.debug(f"Игнорируем устаревший callback query: {e}")
+            logger.debug("Игнорируем устаревший callback query: %s", e)
         else:
             # Логируем другие ошибки
             logger.warning(f"Ошибка при ответе на callback query: {e}")
@@ -7,31 +7,36 @@ from aiogram.types import FSInputFile, Message
 
 logger = logging.getLogger(__name__)
 
+# file_id уже загруженных картинок: повторная отправка не грузит файл заново
+_file_ids: dict[Path, str] = {}
+
+
+def find_image(image_path: Path, fallback_paths: list[str] | None = None) -> Path | None:
+    """Возвращает путь к изображению или к первому существующему fallback.
 
-async def send_image_if_exists(
-    message: Message, image_path: Path, fallback_paths: list[str] | None = None
-) -> None:
-    """Отправляет изображение, если оно существует, иначе пробует fallback.
-    
     Args:
-        message: Сообщение для отправки фото
         image_path: Основной путь к изображению
-        fallback_paths: Список альтернативных путей для поиска
+        fallback_paths: Имена альтернативных файлов в той же папке
+
+    Returns:
+        Путь к существующему файлу или None
     """
     if image_path.exists():
-        try:
-            await message.answer_photo(photo=FSInputFile(image_path))
-        except Exception as e:
-            logger.error(f"Не удалось отправить изображение {image_path}: {e}")
-        return
-
-    if fallback_paths:
-        for fallback_name in fallback_paths:
-            fallback_path = image_path.parent / fallback_name
-            if fallback_path.exists():
-                try:
-                    await message.answer_photo(photo=FSInputFile(fallback_path))
-                except Exception as e:
-                    logger.error(f"Не удалось отправить изображение {fallback_path}: {e}")
-                return
+        return image_path
+    for fallback_name in fallback_paths or []:
+        fallback_path = image_path.parent / fallback_name
+        if fallback_path.exists():
+            return fallback_path
+    return None
+
+
+def photo_input(image_path: Path) -> str | FSInputFile:
+    """Возвращает file_id уже загруженной картинки или файл для загрузки."""
+    return _file_ids.get(image_path) or FSInputFile(image_path)
+
+
+def remember_file_id(image_path: Path, sent: Message | bool) -> None:
+    """Запоминает file_id картинки из отправленного или изменённого сообщения."""
+    if isinstance(sent, Message) and sent.photo:
+        _file_ids[image_path] = sent.photo[-1].file_id
 
@@ -0,0 +1,81 @@
+"""Token bucket на каждый ключ (пользователя, чат) с ограниченной памятью."""
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Bucket:
+    """Ведро пользователя: токены на момент updated и отметка о предупреждении."""
+
+    tokens: float
+    updated: float
+    warned: bool = False
+
+
+class TokenBuckets:
+    """Ведра по ключам: rate токенов в секунду, не больше burst в запасе.
+
+    Ведро, которое успело пополниться полностью, ничем не отличается от
+    нового, поэтому удаляется без потери точности. Сверх этого хранится не
+    больше max_keys вёдер: при переполнении удаляются те, к которым дольше
+    всего не обращались.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = 100_000) -> None:
+        self.rate = rate
+        self.burst = float(burst)
+        self.max_keys = max_keys
+        # Вёдра в порядке последнего обращения: простаивающие — в начале
+        self.buckets: dict[int, Bucket] = {}
+
+    def _evict(self, now: float) -> None:
+        """Удаляет полностью пополнившиеся вёдра и освобождает место под новое."""
+        buckets = self.buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            refilled_at = bucket.updated + (self.burst - bucket.tokens) / self.rate
+            if now < refilled_at and len(buckets) < self.max_keys:
+                break
+            del buckets[key]
+
+    def _refill(self, key: int, now: float) -> Bucket:
+        """Ведро ключа, пополненное на момент now и перенесённое в конец порядка."""
+        self._evict(now)
+        bucket = self.buckets.pop(key, None)
+        if bucket is None:
+            bucket = Bucket(tokens=self.burst, updated=now)
+        else:
+            elapsed = now - bucket.updated
+            bucket.tokens = min(self.burst, bucket.tokens + elapsed * self.rate)
+            bucket.updated = now
+        self.buckets[key] = bucket
+        return bucket
+
+    def take(self, key: int, now: float) -> Bucket | None:
+        """Забирает токен из ведра ключа.
+
+        Returns:
+            None, если токен был; ведро, если ключ исчерпал лимит
+        """
+        bucket = self._refill(key, now)
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            bucket.warned = False
+            return None
+        return bucket
+
+    def reserve(self, key: int, now: float) -> float:
+        """Забирает токен в долг.
+
+        Returns:
+            Сколько секунд подождать, пока токен действительно появится
+        """
+        bucket = self._refill(key, now)
+        bucket.tokens -= 1
+        return -bucket.tokens / self.rate if bucket.tokens < 0 else 0.0
+
+    def refund(self, key: int) -> None:
+        """Возвращает токен, взятый reserve(), если запрос так и не ушёл."""
+        bucket = self.buckets.get(key)
+        if bucket is not None:
+            bucket.tokens = min(self.burst, bucket.tokens + 1)
@@ -14,3 +14,14 @@ def get_user_display_name(user: User) -> str:
     """
     return user.username or user.first_name or "Пользователь"
 
+
+def get_user_mention(user: User) -> str:
+    """Возвращает username для отчётов менеджерам.
+
+    Args:
+        user: Объект пользователя Telegram
+
+    Returns:
+        '@username' или "нет username"
+    """
+    return f"@{user.username}" if user.username else "нет username"
@@ -77,3 +77,16 @@ def normalize_phone(phone: str) -> str:
     """
     return "".join(c for c in phone if c.isdigit())
 
+
+def phone_with_country_code(digits: str) -> str:
+    """Приводит цифры российского номера к коду страны 7 (8XXXXXXXXXX → 7XXXXXXXXXX).
+
+    Args:
+        digits: Цифры номера телефона
+
+    Returns:
+        Цифры номера, начинающиеся с 7 для российских номеров
+    """
+    if len(digits) == 11 and digits[0] == "8":
+        return "7" + digits[1:]
+    return digits
@@ -0,0 +1,20 @@
+"""Скрипты разработчика: проверки бюджетов и бенчмарки.
+
+Настройки бота читаются из окружения при импорте app, поэтому тестовые
+значения выставляются здесь, до импорта любого скрипта.
+"""
+
+import os
+
+os.environ.update(
+    BOT_TOKEN="123456:TEST-harness-token",
+    CONTACT_PHONE="+7 (900) 000-00-00",
+    CONTACT_TELEGRAM="@manager",
+    CHANNEL_CHAT_ID="",
+    GROUP_CHAT_ID="-1001000000000",
+    ADMIN_IDS="",
+    # Сценарии прогоняются быстрее любого человека; флуд проверяет throttle_check
+    THROTTLE_RATE="0",
+    # Бенчмарки HTTP-сессии меряют сеть, а не планировщик отправки
+    OUTBOUND_RATE="0",
+)
@@ -0,0 +1,144 @@
+"""Проверка бюджета исходящих вызовов Bot API по каноническим сценариям.
+
+Каждый сценарий прогоняется в обычном режиме и в режиме одного сообщения
+(сценарии с суффиксом ``[live]``).
+
+Запуск: ``python -m scripts.api_budget`` (``--update`` печатает новые бюджеты).
+Код выхода 1, если число вызовов или загруженных байт разошлось с бюджетом.
+"""
+
+import asyncio
+import sys
+
+from app.core.config import settings
+from scripts.harness import ConversationRunner, PathReport, Step
+
+START: list[Step] = [("text", "/start"), ("press", "method_bot")]
+
+MINIMAL: list[Step] = [
+    *START,
+    ("text", "25"),
+    ("press", "profile_insert"),
+    ("press", "cornice_none"),
+    ("press", "lighting_skip"),
+    ("press", "wall_no"),
+]
+
+ALL_LIGHTING: list[Step] = [
+    *START,
+    ("text", "25"),
+    ("press", "profile_shadow"),
+    ("press", "cornice_pk14"),
+    ("text", "5"),
+    ("press", "toggle_spotlights"),
+    ("press", "toggle_tracks"),
+    ("press", "toggle_light_lines"),
+    ("press", "toggle_chandeliers"),
+    ("press", "lighting_done"),
+    ("press", "toggle_spot_builtin"),
+    ("press", "toggle_spot_surface"),
+    ("press", "toggle_spot_pendant"),
+    ("press", "spotlights_done"),
+    ("text", "4"),
+    ("text", "3"),
+    ("text", "2"),
+    ("press", "toggle_track_surface"),
+    ("press", "toggle_track_builtin"),
+    ("press", "tracks_done"),
+    ("text", "3"),
+    ("text", "2"),
+    ("text", "4"),
+    ("text", "2"),
+    ("press", "wall_yes"),
+    ("press", "order_measurement"),
+    ("text", "Иван Иванов"),
+    ("text", "89991234567"),
+    ("text", "г. Москва, ул. Ленина, д. 10"),
+]
+
+EDIT_ONE_FIELD: list[Step] = [
+    *MINIMAL,
+    ("press", "edit_params"),
+    ("press", "edit_area"),
+    ("text", "30"),
+]
+
+BACK_NAVIGATION: list[Step] = [
+    *START,
+    ("text", "25"),
+    ("press", "profile_insert"),
+    ("press", "go_back"),
+    ("press", "go_back"),
+    ("text", "30"),
+    ("press", "profile_shadow"),
+    ("press", "cornice_pk5"),
+    ("press", "go_back"),
+    ("press", "cornice_none"),
+    ("press", "go_back"),
+    ("press", "cornice_none"),
+    ("press", "lighting_skip"),
+    ("press", "go_back"),
+    ("press", "lighting_skip"),
+    ("press", "wall_no"),
+]
+
+PATHS: dict[str, list[Step]] = {
+    "minimal": MINIMAL,
+    "all_lighting": ALL_LIGHTING,
+    "edit_one_field": EDIT_ONE_FIELD,
+    "back_navigation": BACK_NAVIGATION,
+}
+
+BUDGETS: dict[str, tuple[int, int]] = {
+    "minimal": (18, 8298635),
+    "all_lighting": (63, 12896661),
+    "edit_one_field": (25, 8302336),
+    "back_navigation": (41, 8305926),
+    "minimal[live]": (13, 8299197),
+    "all_lighting[live]": (49, 12897280),
+    "edit_one_field[live]": (19, 8302873),
+    "back_navigation[live]": (32, 8307346),
+}
+
+
+def _format(name: str, report: PathReport) -> str:
+    methods = ", ".join(f"{method}={count}" for method, count in sorted(report.calls.items()))
+    return f"{name}: {report.total_calls} calls, {report.uploaded_bytes} bytes ({methods})"
+
+
+async def run_budgets() -> dict[str, PathReport]:
+    """Прогоняет все канонические сценарии.
+
+    Returns:
+        Отчёты по сценариям
+    """
+    runner = ConversationRunner()
+    reports = {}
+    for live in (False, True):
+        settings.live_message = live
+        for name, steps in PATHS.items():
+            reports[f"{name}[live]" if live else name] = await runner.run(steps)
+    settings.live_message = False
+    return reports
+
+
+def main() -> int:
+    """Сверяет фактические вызовы с бюджетами и печатает отчёт."""
+    reports = asyncio.run(run_budgets())
+    if "--update" in sys.argv:
+        for name, report in reports.items():
+            print(f'    "{name}": ({report.total_calls}, {report.uploaded_bytes}),')
+        return 0
+
+    failed = False
+    for name, report in reports.items():
+        expected_calls, expected_bytes = BUDGETS[name]
+        actual = (report.total_calls, report.uploaded_bytes)
+        status = "OK" if actual == (expected_calls, expected_bytes) else "FAIL"
+        failed |= status == "FAIL"
+        print(f"[{status}] {_format(name, report)}; budget {expected_calls}/{expected_bytes}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Проверка загрузки архива логов чатов в поисковый индекс (app.cli.backfill).
+
+Во временном каталоге создаётся архив: плоские логи, корзины, сжатые
+сегменты и многострочные сообщения. Проверяется, что загружены все
+сообщения и они находятся поиском, повторный запуск ничего не дублирует,
+после добавления пользователя загружается только он, а сообщения, которые
+бот уже записал в индекс сам, не попадают туда второй раз. Печатается
+время загрузки одним процессом и пулом.
+
+Запуск: ``python -m scripts.backfill_check [--users N]``. Код выхода 1 при ошибке.
+"""
+
+import argparse
+import gzip
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.cli.backfill import backfill
+from app.services.search import ChatIndex
+
+MESSAGES_PER_SEGMENT = 20
+DAY = 86400
+
+
+def write_user(logs_dir: Path, user_id: int) -> int:
+    """Архив пользователя: сжатый закрытый сегмент и текущий; возвращает число сообщений."""
+    bucket = logs_dir if user_id % 3 == 0 else logs_dir / f"{user_id % 256:02x}"
+    bucket.mkdir(exist_ok=True)
+    started = time.time() - 10 * DAY
+    segments = []
+    for segment in range(2):
+        lines = []
+        for number in range(MESSAGES_PER_SEGMENT):
+            ts = started + (segment * MESSAGES_PER_SEGMENT + number) * 60
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+            lines.append(f"[{stamp}] 👤 user: заказ {user_id} номер {number}\n")
+            lines.append(f"[{stamp}] 🤖 БОТ: Итог:\nг. Казань\nтел. 8900{user_id:07d}\n")
+        segments.append("".join(lines))
+    closed = bucket / f"user_{user_id}.20240101-000000-000000.txt.gz"
+    closed.write_bytes(gzip.compress(segments[0].encode()))
+    (bucket / f"user_{user_id}.txt").write_text(segments[1], encoding="utf-8")
+    return 4 * MESSAGES_PER_SEGMENT
+
+
+def count(index_path: Path) -> int:
+    """Число сообщений в индексе."""
+    conn = sqlite3.connect(index_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def check(logs_dir: Path, index_path: Path, users: int, workers: int) -> list[str]:
+    """Полная загрузка, повтор, дозагрузка и поиск по загруженному."""
+    errors = []
+    index = ChatIndex(str(index_path))
+    index.add(users + 1, time.time(), "user", "уже в индексе")
+    index.close()
+    expected = sum(write_user(logs_dir, user_id) for user_id in range(1, users + 1))
+
+    started = time.perf_counter()
+    loaded = backfill(str(logs_dir), str(index_path), workers, out=io.StringIO())
+    print(f"{workers} процесс(ов): {loaded} сообщений за {time.perf_counter() - started:.2f} с")
+    if loaded != expected or count(index_path) != expected + 1:
+        errors.append(f"загружено {loaded}, в индексе {count(index_path)}, ожидалось {expected}")
+    if backfill(str(logs_dir), str(index_path), workers, out=io.StringIO()):
+        errors.append("повторный запуск загрузил сообщения ещё раз")
+
+    expected += write_user(logs_dir, users + 1)
+    if backfill(str(logs_dir), str(index_path), workers, out=io.StringIO()) != 80:
+        errors.append("после добавления пользователя загружен не только он")
+    if count(index_path) != expected + 1:
+        errors.append(f"в индексе {count(index_path)} сообщений, ожидалось {expected + 1}")
+
+    index = ChatIndex(str(index_path))
+    hits = index.search("89000000007 Казань")
+    index.close()
+    if not hits or hits[0].user_id != 7 or "\n" not in hits[0].snippet:
+        errors.append(f"многострочное сообщение не найдено: {hits}")
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверку одним процессом и пулом и печатает отчёт."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    args = parser.parse_args()
+
+    errors = []
+    for workers in sorted({1, max(2, os.cpu_count() or 1)}):
+        directory = Path(tempfile.mkdtemp(prefix="backfill_"))
+        (directory / "logs").mkdir()
+        errors += check(directory / "logs", directory / "index.sqlite3", args.users, workers)
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Бенчмарк выбора хендлера нажатия: таблица маршрутов против цепочки фильтров.
+
+Собираются два диспетчера с пустыми хендлерами: в одном кнопки
+зарегистрированы в CallbackRoutes, в другом — прежним способом, фильтрами
+на роутерах в том же порядке. Через оба прогоняются одни и те же нажатия
+в своих состояниях FSM; печатается время обработки апдейта. Заодно
+проверяется, что оба способа выбирают один и тот же хендлер.
+
+Запуск: ``python -m scripts.callback_dispatch_bench``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime
+from typing import Any
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import StateFilter
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from app.bot.flow.graph import EDIT_TARGETS, SELECT_STATES
+from app.bot.routing import CallbackRoutes
+from app.bot.states import CalculationStates as S
+
+USER_ID = 1
+
+# (состояние FSM, callback_data) — от первых зарегистрированных кнопок к последним
+PRESSES: list[tuple[str | None, str]] = [
+    (None, "start_calculation"),
+    (S.choosing_contact_method.state, "method_bot"),
+    (S.choosing_profile.state, "profile_shadow"),
+    (S.choosing_wall_finish.state, "wall_yes"),
+    (S.choosing_lighting_types.state, "toggle_spotlights"),
+    (S.choosing_track_types.state, "tracks_skip"),
+    (S.showing_result.state, "edit_area"),
+    (S.showing_result.state, "order_measurement"),
+]
+
+
+def _legacy_router(hits: list[str]) -> Router:
+    """Кнопки бота на фильтрах aiogram в порядке прежних роутеров."""
+    router = Router()
+
+    def handler(name: str):
+        async def handle(callback: CallbackQuery) -> None:
+            hits.append(name)
+
+        return handle
+
+    register = router.callback_query.register
+    register(handler("start_calculation"), F.data == "start_calculation")
+    register(handler("method_manager"), F.data == "method_manager")
+    register(handler("method_bot"), S.choosing_contact_method, F.data == "method_bot")
+    register(handler("go_back"), F.data == "go_back")
+    register(handler("skip_zero"), F.data == "skip_zero")
+    register(handler("profile"), S.choosing_profile, F.data.startswith("profile_"))
+    register(handler("cornice"), S.choosing_cornice_type, F.data.startswith("cornice_"))
+    register(handler("wall"), S.choosing_wall_finish, F.data.startswith("wall_"))
+    select = StateFilter(*SELECT_STATES)
+    register(handler("toggle"), select, F.data.startswith("toggle_"))
+    register(handler("done"), select, F.data.endswith("_done"))
+    register(handler("skip"), select, F.data.endswith("_skip"))
+    register(handler("edit_params"), F.data == "edit_params")
+    register(handler("back_to_result"), F.data == "back_to_result")
+    register(handler("edit"), F.data.in_(EDIT_TARGETS))
+    register(handler("order_measurement"), F.data == "order_measurement")
+    return router
+
+
+def _table_router(hits: list[str]) -> Router:
+    """Те же кнопки в таблице маршрутов."""
+    routes = CallbackRoutes()
+
+    def handler(name: str):
+        async def handle(callback: CallbackQuery, state: Any, session: Any) -> None:
+            hits.append(name)
+
+        return handle
+
+    routes.on("start_calculation")(handler("start_calculation"))
+    routes.on("method_manager")(handler("method_manager"))
+    routes.on("method_bot", states=[S.choosing_contact_method])(handler("method_bot"))
+    routes.on("go_back")(handler("go_back"))
+    routes.on("skip_zero")(handler("skip_zero"))
+    routes.on_action("profile", states=[S.choosing_profile])(handler("profile"))
+    routes.on_action("cornice", states=[S.choosing_cornice_type])(handler("cornice"))
+    routes.on_action("wall", states=[S.choosing_wall_finish])(handler("wall"))
+    routes.on_action("toggle", states=SELECT_STATES)(handler("toggle"))
+    routes.on("lighting_done", "spotlights_done", "tracks_done", states=SELECT_STATES)(
+        handler("done")
+    )
+    routes.on("lighting_skip", "spotlights_skip", "tracks_skip", states=SELECT_STATES)(
+        handler("skip")
+    )
+    routes.on("edit_params")(handler("edit_params"))
+    routes.on("back_to_result")(handler("back_to_result"))
+    routes.on(*EDIT_TARGETS)(handler("edit"))
+    routes.on("order_measurement")(handler("order_measurement"))
+    return routes.build_router()
+
+
+async def _inject_session(handler, event, data):
+    data["session"] = None
+    return await handler(event, data)
+
+
+def _press(update_id: int, data: str) -> Update:
+    user = User(id=USER_ID, is_bot=False, first_name="Иван")
+    message = Message(
+        message_id=1, date=datetime.now(), chat=Chat(id=USER_ID, type="private"), text="?"
+    )
+    callback = CallbackQuery(
+        id=str(update_id), from_user=user, chat_instance="1", message=message, data=data
+    )
+    return Update(update_id=update_id, callback_query=callback)
+
+
+async def measure(router: Router, hits: list[str], rounds: int) -> tuple[float, list[str]]:
+    """Среднее время апдейта в мкс и хендлеры, выбранные на первом проходе."""
+    dp = Dispatcher()
+    dp.callback_query.middleware(_inject_session)
+    dp.include_router(router)
+    bot = Bot(token="42:TEST")
+    key = StorageKey(bot_id=bot.id, chat_id=USER_ID, user_id=USER_ID)
+    updates = [(state, _press(i, data)) for i, (state, data) in enumerate(PRESSES)]
+
+    elapsed = 0.0
+    for _ in range(rounds):
+        for state, update in updates:
+            await dp.fsm.storage.set_state(key, state)
+            start = time.perf_counter()
+            await dp.feed_update(bot, update)
+            elapsed += time.perf_counter() - start
+    await bot.session.close()
+    return elapsed / (rounds * len(updates)) * 1e6, hits[: len(updates)]
+
+
+async def run(rounds: int = 2000) -> list[str]:
+    """Сравнивает оба способа и печатает отчёт."""
+    legacy_hits: list[str] = []
+    table_hits: list[str] = []
+    legacy, legacy_chosen = await measure(_legacy_router(legacy_hits), legacy_hits, rounds)
+    table, table_chosen = await measure(_table_router(table_hits), table_hits, rounds)
+    print(f"фильтры: {legacy:.1f} мкс на нажатие")
+    print(f"таблица: {table:.1f} мкс на нажатие ({legacy / table:.1f}x)")
+    if legacy_chosen != table_chosen:
+        return [f"хендлеры различаются: {legacy_chosen} != {table_chosen}"]
+    return []
+
+
+def main() -> int:
+    """Прогоняет бенчмарк и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Проверка хранилища логов чатов: корзины, ротация, сжатие и срок хранения.
+
+Во временном каталоге:
+- логи тысяч пользователей распределяются по корзинам равномерно;
+- длинный диалог режется на сегменты по размеру, закрытые сегменты
+  сжимаются в фоне, а вместе с текущим дают все сообщения по порядку;
+- очистка истории удаляет все сегменты пользователя, в том числе сжатые,
+  и его сообщения из поискового индекса, но сохраняет поставленные после неё;
+- обслуживание переносит лог из старой плоской раскладки (пропуская
+  файлы с чужими именами), закрывает давно не пополнявшиеся сегменты и
+  удаляет закрытые старше срока хранения.
+
+Запуск: ``python -m scripts.chat_log_check [--users N]``. Код выхода 1 при ошибке.
+"""
+
+import argparse
+import gzip
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from app.core.config import settings
+from app.services.chat_logger import BUCKETS, DAY, ChatLogger
+from app.services.search import ChatIndex, connect
+
+MAX_BYTES = 4096
+LONG_DIALOG = 500
+
+
+def check_buckets(chat_logs: ChatLogger, users: int) -> list[str]:
+    """Логи пользователей равномерно распределены по корзинам."""
+    started = time.perf_counter()
+    for user_id in range(1, users + 1):
+        chat_logs.log_message(user_id, "user", "25")
+    elapsed = time.perf_counter() - started
+    chat_logs.sync()
+    per_bucket = Counter(path.parent.name for path in chat_logs.logs_dir.glob("*/user_*.txt"))
+    print(
+        f"{users} пользователей: {elapsed * 1e6 / users:.0f} мкс на сообщение, "
+        f"{len(per_bucket)} корзин, файлов в корзине до {max(per_bucket.values())}"
+    )
+    errors = []
+    if sum(per_bucket.values()) != users:
+        errors.append(f"файлов {sum(per_bucket.values())}, пользователей {users}")
+    if max(per_bucket.values()) > 2 * users / BUCKETS + 10:
+        errors.append("пользователи распределены по корзинам неравномерно")
+    return errors
+
+
+def check_rotation(chat_logs: ChatLogger) -> list[str]:
+    """Сегменты по размеру, сжатие и порядок сообщений."""
+    user_id = 10**9
+    for number in range(LONG_DIALOG):
+        chat_logs.log_message(user_id, "user", f"сообщение {number:04d}")
+    chat_logs.sync()
+
+    active = chat_logs.path(user_id)
+    closed = sorted(active.parent.glob(f"user_{user_id}.*.txt.gz"))
+    text = "".join(gzip.decompress(path.read_bytes()).decode() for path in closed)
+    text += active.read_text(encoding="utf-8")
+    numbers = [line.rsplit(" ", 1)[1] for line in text.splitlines()]
+    sizes = [path.stat().st_size for path in closed]
+    print(f"диалог из {LONG_DIALOG} сообщений: {len(closed)} сжатых сегментов, {sum(sizes)} байт")
+
+    errors = []
+    if not closed or list(active.parent.glob(f"user_{user_id}.*.txt")):
+        errors.append("закрытые сегменты не сжаты")
+    if numbers != [f"{number:04d}" for number in range(LONG_DIALOG)]:
+        errors.append("сообщения потеряны или перепутаны при ротации")
+    if active.stat().st_size > MAX_BYTES:
+        errors.append("текущий сегмент больше CHAT_LOG_MAX_BYTES")
+    return errors
+
+
+def check_clear(chat_logs: ChatLogger) -> list[str]:
+    """Очистка истории удаляет все сегменты и сообщения в индексе, последующие сохраняются."""
+    # После check_rotation у пользователя есть сжатые закрытые сегменты
+    user_id = 10**9
+    active = chat_logs.path(user_id)
+    segments = len(list(active.parent.glob(f"user_{user_id}.*")))
+    chat_logs.index = ChatIndex(str(chat_logs.logs_dir / "index.sqlite3"))
+    chat_logs.log_message(user_id, "user", "до очистки")
+    chat_logs.clear_chat_history(user_id)
+    chat_logs.log_message(user_id, "user", "после очистки")
+    chat_logs.sync()
+    chat_logs.index.sync()
+
+    errors = []
+    left = sorted(path.name for path in active.parent.glob(f"user_{user_id}.*"))
+    print(f"очистка истории: сегментов до {segments}, после {len(left)}")
+    if left != [active.name]:
+        errors.append(f"после очистки остались сегменты: {left}")
+    text = active.read_text(encoding="utf-8")
+    if "до очистки" in text or "после очистки" not in text:
+        errors.append(f"очистка истории нарушила порядок записи: {text!r}")
+    if chat_logs.index.search("до очистки") or not chat_logs.index.search("после очистки"):
+        errors.append("поиск находит сообщения очищенной истории")
+
+    chat_logs.index.purge_cleared()
+    conn = connect(chat_logs.index.path)
+    query = "SELECT count(*) FROM messages WHERE user_id = ?"
+    rows = conn.execute(query, (user_id,)).fetchone()[0]
+    conn.close()
+    if rows != 1:
+        errors.append(f"после обслуживания в индексе сообщений пользователя: {rows}")
+    chat_logs.index.close()
+    chat_logs.index = None
+    return errors
+
+
+def check_maintenance(chat_logs: ChatLogger) -> list[str]:
+    """Перенос плоского лога, закрытие старых сегментов и срок хранения."""
+    legacy = chat_logs.logs_dir / "user_7.txt"
+    legacy.write_text("[2024-01-01 10:00:00] 👤 user: старый лог\n", encoding="utf-8")
+    foreign = [chat_logs.logs_dir / name for name in ("user_notes.txt", "user_.txt")]
+    for path in foreign:
+        path.write_text("не лог чата\n", encoding="utf-8")
+    errors = []
+    # Обслуживание вызывается напрямую: поток логов к этому моменту простаивает
+    try:
+        chat_logs.maintain()
+    except ValueError as e:
+        errors.append(f"обслуживание прервано чужим файлом: {e}")
+    if not all(path.exists() for path in foreign):
+        errors.append("обслуживание тронуло файлы с чужими именами")
+    if legacy.exists() or "старый лог" not in chat_logs.path(7).read_text(encoding="utf-8"):
+        errors.append("лог из плоской раскладки не перенесён в корзину")
+
+    later = time.time() + (settings.chat_log_retention_days + 1) * DAY
+    chat_logs.maintain(later)
+    chat_logs.sync()
+    chat_logs.maintain(later + (settings.chat_log_retention_days + 1) * DAY)
+    left = list(chat_logs.logs_dir.glob("*/user_*"))
+    if left:
+        errors.append(f"после срока хранения осталось файлов: {len(left)}")
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20_000)
+    args = parser.parse_args()
+
+    settings.chat_log_max_bytes = MAX_BYTES
+    settings.chat_log_compression = "gzip"
+    settings.chat_log_retention_days = 30
+    chat_logs = ChatLogger(tempfile.mkdtemp(prefix="chat_logs_"))
+
+    errors = check_buckets(chat_logs, args.users)
+    errors += check_rotation(chat_logs)
+    errors += check_clear(chat_logs)
+    errors += check_maintenance(chat_logs)
+    chat_logs.executor.shutdown()
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
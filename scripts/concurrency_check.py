@@ -0,0 +1,106 @@
+"""Проверка очереди апдейтов пользователя и защиты от двойного нажатия.
+
+Двойное нажатие имитируется двумя одинаковыми callback-апдейтами на одном
+сообщении, которые обрабатываются одновременно. Шаг должен выполниться
+один раз: один следующий вопрос, один отчёт менеджерам. Отдельно
+проверяется, что UserEventIsolation не пускает два апдейта одного
+пользователя одновременно и не копит блокировки.
+
+Запуск: ``python -m scripts.concurrency_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+from collections import Counter
+
+from aiogram.fsm.storage.base import StorageKey
+
+from app.bot.storage.isolation import UserEventIsolation
+from app.core.config import settings
+from scripts.api_budget import ALL_LIGHTING, MINIMAL
+from scripts.harness import ConversationRunner, Step
+
+# (сценарий до нажатия, дважды нажимаемая кнопка, ожидаемые вызовы Bot API)
+DOUBLE_PRESSES: dict[str, tuple[list[Step], str, Counter[str]]] = {
+    "wall_yes": (
+        MINIMAL[:-1],
+        "wall_yes",
+        Counter(answerCallbackQuery=2, sendMessage=2),
+    ),
+    "lighting_done": (
+        ALL_LIGHTING[: ALL_LIGHTING.index(("press", "lighting_done"))],
+        "lighting_done",
+        Counter(answerCallbackQuery=2, sendPhoto=1),
+    ),
+    "order_measurement": (
+        MINIMAL,
+        "order_measurement",
+        Counter(answerCallbackQuery=2, sendMessage=1),
+    ),
+}
+
+
+async def check_double_presses() -> list[str]:
+    """Нажимает каждую кнопку дважды одновременно и сверяет вызовы."""
+    runner = ConversationRunner()
+    group_chat_id = int(settings.group_chat_id)
+    errors = []
+    for name, (prefix, data, expected) in DOUBLE_PRESSES.items():
+        await runner.run(prefix)
+        start = len(runner.session.calls)
+        await runner.feed_concurrently([("press", data), ("press", data)])
+        calls = runner.session.calls[start:]
+        # Отчёт менеджерам — sendMessage в группу, считается отдельно
+        reports = sum(call.chat_id == group_chat_id for call in calls)
+        actual = Counter(call.method for call in calls if call.chat_id != group_chat_id)
+        if actual != expected:
+            errors.append(f"{name}: вызовы {dict(actual)}, ожидалось {dict(expected)}")
+        if reports > 1:
+            errors.append(f"{name}: {reports} отчёта менеджерам")
+        print(f"{name}: {dict(actual)}, отчётов менеджерам: {reports}")
+
+    locks = runner.dp.fsm.events_isolation.locks
+    if locks:
+        errors.append(f"после обработки осталось блокировок: {len(locks)}")
+    return errors
+
+
+async def check_isolation(users: int = 1000, updates_per_user: int = 5) -> list[str]:
+    """Апдейты одного пользователя не пересекаются, таблица блокировок очищается."""
+    isolation = UserEventIsolation()
+    inside: Counter[int] = Counter()
+    overlaps = 0
+    peak = 0
+
+    async def handle(user_id: int) -> None:
+        nonlocal overlaps, peak
+        async with isolation.lock(StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)):
+            inside[user_id] += 1
+            overlaps += inside[user_id] > 1
+            peak = max(peak, len(isolation.locks))
+            await asyncio.sleep(0)
+            inside[user_id] -= 1
+
+    await asyncio.gather(
+        *(handle(user_id) for _ in range(updates_per_user) for user_id in range(users))
+    )
+    print(f"isolation: {users} пользователей, пик таблицы {peak}, осталось {len(isolation.locks)}")
+    errors = []
+    if overlaps:
+        errors.append(f"isolation: {overlaps} одновременных апдейтов одного пользователя")
+    if isolation.locks:
+        errors.append(f"isolation: осталось блокировок {len(isolation.locks)}")
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(check_double_presses())
+    errors += asyncio.run(check_isolation())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Прогон реальных роутеров бота против записывающего фейкового Bot API."""
+
+import asyncio
+import os
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.dispatcher.event.bases import UNHANDLED
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.methods import TelegramMethod
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from app.bot.keyboards.generation import parse_press
+from app.bot.outbound import background_sends
+from app.main import create_dispatcher
+from app.services.chat_logger import chat_logger
+from app.services.leads import lead_store
+from app.utils import images
+
+BOT_ID = 123456
+Step = tuple[str, str]
+
+
+@dataclass
+class RecordedCall:
+    """Один вызов Bot API."""
+
+    method: str
+    chat_id: int | str | None
+    uploaded_bytes: int
+    text: str | None = None
+
+
+class RecordingSession(BaseSession):
+    """Сессия, которая не ходит в сеть, а записывает все вызовы Bot API."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: list[RecordedCall] = []
+        self.last_message_id = 0
+        # Последняя клавиатура каждого сообщения: (чат, сообщение) -> клавиатура
+        self.keyboards: dict[tuple[Any, int], Any] = {}
+        # Сколько раз сообщение редактировали: как edit_date у Telegram
+        self.edits: Counter[tuple[Any, int]] = Counter()
+        # Задержка ответа на каждый вызов, сек: как у настоящей сети
+        self.delay = 0.0
+
+    async def close(self) -> None:
+        """Закрывать нечего."""
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[Any], timeout: int | None = None
+    ) -> Any:
+        """Записывает вызов и возвращает правдоподобный ответ."""
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        uploaded = await self._measure_upload(bot, method)
+        chat_id = getattr(method, "chat_id", None)
+        text = getattr(method, "text", None)
+        self.calls.append(RecordedCall(method.__api_method__, chat_id, uploaded, text))
+
+        if "Message" not in str(method.__returning__):
+            return True
+        self.last_message_id += 1
+        edited_id = getattr(method, "message_id", None)
+        if edited_id is not None:
+            self.edits[chat_id, edited_id] += 1
+        markup = getattr(method, "reply_markup", None)
+        if markup is not None and hasattr(markup, "inline_keyboard"):
+            self.keyboards[chat_id, edited_id or self.last_message_id] = markup
+        fields: dict[str, Any] = {
+            "message_id": self.last_message_id,
+            "date": datetime.now(),
+            "chat": {"id": chat_id or 0, "type": "private"},
+            "from": {"id": BOT_ID, "is_bot": True, "first_name": "Bot"},
+            "text": getattr(method, "text", None) or getattr(method, "caption", None),
+        }
+        if hasattr(method, "photo") or hasattr(method, "media"):
+            # Как Telegram: в ответе фото с file_id, которым можно отправить его повторно
+            file_id = f"photo-{self.last_message_id}"
+            fields["photo"] = [
+                {"file_id": file_id, "file_unique_id": file_id, "width": 1, "height": 1}
+            ]
+        return Message.model_validate(fields, context={"bot": bot})
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> Any:
+        """Скачивание файлов в прогоне не используется."""
+        raise NotImplementedError
+
+    async def _measure_upload(self, bot: Bot, method: TelegramMethod[Any]) -> int:
+        """Считает байты полей запроса и загружаемых файлов."""
+        files: dict[str, Any] = {}
+        total = 0
+        for key, value in method.model_dump(warnings=False).items():
+            prepared = self.prepare_value(value, bot=bot, files=files)
+            if prepared:
+                total += len(key) + len(str(prepared).encode())
+        for input_file in files.values():
+            async for chunk in input_file.read(bot):
+                total += len(chunk)
+        return total
+
+
+@dataclass
+class PathReport:
+    """Итог прогона одного сценария."""
+
+    calls: Counter[str]
+    uploaded_bytes: int
+
+    @property
+    def total_calls(self) -> int:
+        """Общее число вызовов Bot API."""
+        return sum(self.calls.values())
+
+
+class ConversationRunner:
+    """Прогоняет сценарии диалога через настоящий диспетчер бота."""
+
+    def __init__(self) -> None:
+        self.session = RecordingSession()
+        self.bot = Bot(token=os.environ["BOT_TOKEN"], session=self.session)
+        self.dp: Dispatcher = create_dispatcher()
+        self._update_id = 0
+        self._user_id = 1000
+        # Логи и заявки сценариев не должны попадать в каталоги репозитория
+        chat_logger.logs_dir = Path(tempfile.mkdtemp(prefix="chat_logs_"))
+        lead_store.leads_dir = Path(tempfile.mkdtemp(prefix="leads_"))
+
+    async def run(self, steps: list[Step]) -> PathReport:
+        """Прогоняет сценарий от лица нового пользователя.
+
+        Args:
+            steps: Пары (вид, значение): ("text", "25") или ("press", "go_back")
+
+        Returns:
+            Число вызовов по методам и объём загруженных байт
+        """
+        self._user_id += 1
+        # Каждый сценарий — как первый после запуска: картинки ещё не загружены
+        images._file_ids.clear()
+        start = len(self.session.calls)
+        for kind, value in steps:
+            if await self.dp.feed_update(self.bot, self._update(kind, value)) is UNHANDLED:
+                raise RuntimeError(f"Шаг не обработан ни одним хендлером: {kind}={value!r}")
+        # Уведомления менеджерам уходят в фоне: отчёт считает и их
+        await background_sends.drain()
+
+        calls = self.session.calls[start:]
+        return PathReport(
+            calls=Counter(call.method for call in calls),
+            uploaded_bytes=sum(call.uploaded_bytes for call in calls),
+        )
+
+    async def feed_concurrently(self, steps: list[Step]) -> list[Any]:
+        """Отправляет шаги текущего пользователя одновременно, как при двойном нажатии.
+
+        Все кнопки нажимаются на одном и том же последнем сообщении бота.
+
+        Returns:
+            Результаты обработки апдейтов (UNHANDLED — апдейт не обработан)
+        """
+        updates = [self._update(kind, value) for kind, value in steps]
+        results = await asyncio.gather(*(self.dp.feed_update(self.bot, u) for u in updates))
+        await background_sends.drain()
+        return results
+
+    def storage_key(self) -> StorageKey:
+        """Ключ FSM текущего пользователя сценария."""
+        return StorageKey(bot_id=self.bot.id, chat_id=self._user_id, user_id=self._user_id)
+
+    def _update(self, kind: str, value: str) -> Update:
+        return self._text(value) if kind == "text" else self._press(value)
+
+    def _next_update_id(self) -> int:
+        self._update_id += 1
+        return self._update_id
+
+    def _user(self) -> User:
+        return User(id=self._user_id, is_bot=False, first_name="Иван", username="ivan")
+
+    def _chat(self) -> Chat:
+        return Chat(id=self._user_id, type="private")
+
+    def _text(self, text: str) -> Update:
+        message = Message(
+            message_id=self._next_update_id(),
+            date=datetime.now(),
+            chat=self._chat(),
+            from_user=self._user(),
+            text=text,
+        )
+        return Update(update_id=self._update_id, message=message)
+
+    def _find_button(self, data: str) -> tuple[int, str]:
+        """Сообщение и callback_data кнопки из последних клавиатур, как нажал бы пользователь.
+
+        Кнопка, которой нет ни в одной клавиатуре, нажимается на последнем сообщении.
+        """
+        keyboards = self.session.keyboards
+        chat_messages = [
+            message_id for chat_id, message_id in keyboards if chat_id == self._user_id
+        ]
+        for message_id in sorted(chat_messages, reverse=True):
+            for row in keyboards[self._user_id, message_id].inline_keyboard:
+                for button in row:
+                    packed = button.callback_data or ""
+                    press = parse_press(packed)
+                    if packed == data or (press is not None and press[1] == data):
+                        return message_id, packed
+        return self.session.last_message_id, data
+
+    def _press(self, data: str) -> Update:
+        message_id, data = self._find_button(data)
+        edits = self.session.edits[self._user_id, message_id]
+        message = Message(
+            message_id=message_id,
+            date=datetime.now(),
+            edit_date=edits or None,
+            chat=self._chat(),
+            from_user=User(id=BOT_ID, is_bot=True, first_name="Bot"),
+            text="…",
+        )
+        callback = CallbackQuery(
+            id=str(self._next_update_id()),
+            from_user=self._user(),
+            chat_instance="harness",
+            message=message,
+            data=data,
+        )
+        return Update(update_id=self._update_id, callback_query=callback)
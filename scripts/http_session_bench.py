@@ -0,0 +1,151 @@
+"""Бенчмарк HTTP-сессии бота против локального фейкового Bot API.
+
+Локальный aiohttp-сервер отвечает на sendMessage как Telegram. Задержка
+сети моделируется сервером: RTT на каждый запрос и установка соединения
+(TCP + TLS, несколько RTT) на первый запрос нового соединения. Нагрузка —
+всплески одновременных сообщений с паузами между ними. Сравниваются:
+
+- без keep-alive — каждое сообщение открывает новое соединение, как после
+  истечения keep-alive;
+- сессия aiogram по умолчанию (keep-alive aiohttp 15 с);
+- create_bot_session() с настройками HTTP_*.
+
+Всплеск каждой сессии идёт сразу за всплеском предыдущей, порядок сессий
+сдвигается от всплеска к всплеску, а пауза общая: сессии видят одинаковые
+простои и одинаково прогретый сервер. По умолчанию пауза 20 с — длиннее
+keep-alive aiohttp, поэтому сессия по умолчанию к следующему всплеску
+закрывает соединения, а HTTP_KEEPALIVE=75 их сохраняет. При паузах короче
+15 с (``--gap 0.5``) две последние сессии настроены одинаково и
+расходятся только в пределах шума. Если установлен uvloop, сравнение
+повторяется на нём.
+
+Запуск: ``python -m scripts.http_session_bench [--bursts N] [--size N] [--gap С]``
+(по умолчанию около минуты).
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Callable
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+
+from app.bot.session import BotSession, create_bot_session
+from app.core.config import settings
+
+RTT = 0.02
+HANDSHAKE_RTTS = 3
+
+MESSAGE = {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"}, "text": "ok"}
+
+
+async def start_fake_api() -> tuple[web.AppRunner, str]:
+    """Поднимает фейковый Bot API на свободном порту."""
+    seen: set[int] = set()
+
+    async def handle(request: web.Request) -> web.Response:
+        transport = id(request.transport)
+        if transport not in seen:
+            seen.add(transport)
+            await asyncio.sleep(RTT * HANDSHAKE_RTTS)
+        await asyncio.sleep(RTT)
+        return web.json_response({"ok": True, "result": MESSAGE})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def no_keepalive() -> AiohttpSession:
+    session = BotSession()
+    session._connector_init["force_close"] = True
+    session._connector_init.pop("keepalive_timeout")
+    return session
+
+
+SESSIONS: dict[str, Callable[[], AiohttpSession]] = {
+    "без keep-alive": no_keepalive,
+    "aiogram по умолчанию": AiohttpSession,
+    "create_bot_session": create_bot_session,
+}
+
+
+def report(latencies: list[float], busy: float) -> str:
+    """Задержки сообщений и пропускная способность одной сессии."""
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    return f"p50 {p50:6.1f} мс, p95 {p95:6.1f} мс, {len(latencies) / busy:6.0f} сообщ/с"
+
+
+async def measure(base: str, args) -> dict[str, str]:
+    """Всплески всех сессий вперемешку против одного фейкового API."""
+    bots = {}
+    for name, make_session in SESSIONS.items():
+        session = make_session()
+        session.api = TelegramAPIServer.from_base(base)
+        bots[name] = Bot(token="123456:TEST-http", session=session)
+    latencies: dict[str, list[float]] = {name: [] for name in bots}
+    busy = dict.fromkeys(bots, 0.0)
+
+    async def send(name: str) -> None:
+        started = time.perf_counter()
+        await bots[name].send_message(chat_id=1, text="x")
+        latencies[name].append(time.perf_counter() - started)
+
+    names = list(bots)
+    for burst in range(args.bursts):
+        if burst:
+            await asyncio.sleep(args.gap)
+        shift = burst % len(names)
+        for name in names[shift:] + names[:shift]:
+            started = time.perf_counter()
+            await asyncio.gather(*(send(name) for _ in range(args.size)))
+            busy[name] += time.perf_counter() - started
+    for bot in bots.values():
+        await bot.session.close()
+    return {name: report(latencies[name], busy[name]) for name in bots}
+
+
+async def run(args) -> None:
+    """Прогоняет все сессии против одного фейкового API."""
+    runner, base = await start_fake_api()
+    print(f"RTT {RTT * 1000:.0f} мс, установка соединения {RTT * HANDSHAKE_RTTS * 1000:.0f} мс")
+    print(f"{args.bursts} всплесков по {args.size} сообщений, пауза {args.gap} с")
+    try:
+        for name, line in (await measure(base, args)).items():
+            print(f"{name:22} {line}")
+    finally:
+        await runner.cleanup()
+
+
+def main() -> None:
+    """Разбирает аргументы и запускает бенчмарк."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bursts", type=int, default=4)
+    parser.add_argument("--size", type=int, default=50)
+    parser.add_argument("--gap", type=float, default=20.0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+    try:
+        import uvloop
+    except ImportError:
+        print("uvloop не установлен (poetry install -E speed): сравнение циклов пропущено")
+        return
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        print(f"uvloop, HTTP_KEEPALIVE={settings.http_keepalive}:")
+        runner.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Проверка хранилища заявок и потоковой выгрузки (CSV и Parquet).
+
+- сценарий с заказом замера сохраняет расчёт и заказ с нормализованным телефоном;
+- выгрузка синтетического архива за полгода фильтруется по датам, а пик
+  памяти не растёт с числом заявок (tracemalloc);
+- администратор получает файл командой /leads, неверные аргументы дают подсказку.
+
+Запуск: ``python -m scripts.lead_export_check [--leads N]``. Код выхода 1 при ошибке.
+Parquet проверяется, если установлен pyarrow.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import TextIO
+
+from app.bot.handlers import admin
+from app.services.lead_export import CHUNK_SIZE, export_leads, parquet_available
+from app.services.leads import LeadStore, lead_store
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner
+
+START = date(2024, 1, 1)
+DAYS = 182
+
+
+async def check_dialog() -> list[str]:
+    """Заявки из сценария (харнесс пишет их во временный каталог) и выгрузка /leads."""
+    runner = ConversationRunner()
+    await runner.run(ALL_LIGHTING)
+    saved = list(lead_store.read())
+    kinds = [record["kind"] for record in saved]
+    errors = []
+    if kinds != ["quote", "measurement"]:
+        errors.append(f"сохранены заявки {kinds}, ожидались расчёт и замер")
+    elif saved[1]["phone"] != "79991234567" or not saved[1]["total_cost"]:
+        errors.append(f"заказ замера сохранён неверно: {saved[1]}")
+
+    admin.ADMIN_IDS = frozenset({runner._user_id + 1})
+    start = len(runner.session.calls)
+    await runner.run([("text", "/leads"), ("text", "/leads вчера")])
+    calls = runner.session.calls[start:]
+    documents = [call for call in calls if call.method == "sendDocument"]
+    if len(documents) != 1 or not documents[0].uploaded_bytes:
+        errors.append(f"/leads не отправил файл: {[call.method for call in calls]}")
+    if "Использование" not in (calls[-1].text or ""):
+        errors.append("/leads с неверной датой не показал подсказку")
+    return errors
+
+
+def fill(store: LeadStore, count: int) -> None:
+    """Синтетические заявки, равномерно распределённые по полугодию."""
+    store.leads_dir.mkdir(parents=True, exist_ok=True)
+    started = datetime.combine(START, datetime.min.time()).timestamp()
+    step = DAYS * 86400 / count
+    files: dict[Path, TextIO] = {}
+    for number in range(count):
+        ts = started + number * step
+        path = store.path(datetime.fromtimestamp(ts).date())
+        if path not in files:
+            files[path] = open(path, "a", encoding="utf-8")
+        record = {"ts": ts, "kind": "quote", "user_id": number, "area": 20 + number % 50}
+        files[path].write(json.dumps(record) + "\n")
+    for f in files.values():
+        f.close()
+
+
+def check_export(store: LeadStore, directory: Path) -> list[str]:
+    """Фильтр по датам, постоянная память и совпадение CSV с Parquet."""
+    errors = []
+    since, until = START + timedelta(days=31), START + timedelta(days=59)
+    for fmt in ("csv", "parquet") if parquet_available() else ("csv",):
+        peaks = []
+        for period in ((None, None), (since, until)):
+            tracemalloc.start()
+            started = time.perf_counter()
+            exported = export_leads(store.read(*period), directory / f"leads.{fmt}", fmt)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            peaks.append(peak)
+            print(
+                f"{fmt} {period[0] or 'всё'}: {exported} заявок за "
+                f"{time.perf_counter() - started:.2f} с, пик памяти {peak / 1024 / 1024:.1f} МБ"
+            )
+        if exported != sum(1 for _ in store.read(since, until)):
+            errors.append(f"{fmt}: фильтр по датам выгрузил {exported} заявок")
+        # Весь архив больше периода в шесть раз, а память почти та же
+        # (пока период не меньше одной пачки, иначе память ещё растёт до её размера)
+        if exported >= CHUNK_SIZE and peaks[0] > peaks[1] * 2:
+            errors.append(f"{fmt}: память растёт с числом заявок: {peaks}")
+
+    with open(directory / "leads.csv", encoding="utf-8-sig", newline="") as f:
+        days = {row["ts"][:10] for row in csv.DictReader(f)}
+    if min(days) != since.isoformat() or max(days) != until.isoformat():
+        errors.append(f"CSV за период {since} — {until} содержит даты {min(days)} — {max(days)}")
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--leads", type=int, default=100_000)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="leads_"))
+    errors = asyncio.run(check_dialog())
+    archive = LeadStore(str(directory / "archive"))
+    fill(archive, args.leads)
+    errors += check_export(archive, directory)
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
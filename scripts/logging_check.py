@@ -0,0 +1,142 @@
+"""Проверка логирования через очередь.
+
+- Запись лога из цикла событий не ждёт вывода: поток вывода нарочно
+  медленный, а время записи в цикле меряется.
+- Каждая строка — JSON с контекстом апдейта (user_id, update_id, state),
+  traceback — отдельным полем.
+- Одинаковые предупреждения из одного места ограничиваются, а следующее
+  пропущенное сообщает, сколько было пропущено; нулевой запас или окно
+  выключают ограничение.
+
+Запуск: ``python -m scripts.logging_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import sys
+import time
+from datetime import datetime
+
+from aiogram.types import Chat, Message, Update, User
+
+from app.bot.middlewares.log_context import LogContextMiddleware
+from app.core.config import settings
+from app.core.logging import RepeatFilter, setup_logging
+
+RECORDS = 200
+OUTPUT_DELAY = 0.001
+REPEAT_WINDOW = 0.5
+REPEAT_BURST = 3
+
+logger = logging.getLogger("logging_check")
+
+
+class SlowStream(io.StringIO):
+    """Вывод, который тратит OUTPUT_DELAY на каждую запись, как медленный диск."""
+
+    def write(self, text: str) -> int:
+        time.sleep(OUTPUT_DELAY)
+        return super().write(text)
+
+
+async def log_in_update() -> None:
+    """Пишет записи из хендлера апдейта, как это делает бот."""
+    user = User(id=42, is_bot=False, first_name="Иван")
+    message = Message(
+        message_id=1, date=datetime.now(), chat=Chat(id=42, type="private"), from_user=user
+    )
+    update = Update(update_id=7, message=message)
+
+    async def handler(event: Update, data: dict) -> None:
+        logger.info("Сообщение обработано")
+        try:
+            raise ValueError("пример")
+        except ValueError:
+            logger.exception("Ошибка в хендлере")
+
+    data = {"event_from_user": user, "event_chat": message.chat, "raw_state": "Calc:area"}
+    await LogContextMiddleware()(handler, update, data)
+
+
+def repeat_warnings(count: int) -> None:
+    """Одно и то же предупреждение из одного места, как при недоступных чатах."""
+    for chat_id in range(count):
+        logger.warning(f"Не удалось отправить уведомление в чат {chat_id}")
+
+
+def check_output(lines: list[str]) -> list[str]:
+    """Контекст апдейта, traceback и счётчик пропущенных повторов."""
+    errors = []
+    records = [json.loads(line) for line in lines]
+    handled = next((r for r in records if r["message"] == "Сообщение обработано"), {})
+    expected = {"user_id": 42, "update_id": 7, "state": "Calc:area"}
+    if any(handled.get(key) != value for key, value in expected.items()):
+        errors.append(f"нет контекста апдейта: {handled}")
+    failed = next((r for r in records if r["message"] == "Ошибка в хендлере"), {})
+    if "ValueError: пример" not in failed.get("exc", ""):
+        errors.append(f"traceback не в поле exc: {failed}")
+
+    warnings = [r for r in records if r["message"].startswith("Не удалось отправить")]
+    print(f"предупреждений: {RECORDS + REPEAT_BURST} записано, {len(warnings)} выведено")
+    if len(warnings) != 2 * REPEAT_BURST:
+        errors.append(f"выведено предупреждений {len(warnings)}, ожидалось {2 * REPEAT_BURST}")
+    elif warnings[REPEAT_BURST].get("suppressed") != RECORDS - REPEAT_BURST:
+        errors.append(f"нет счётчика пропущенных повторов: {warnings[REPEAT_BURST]}")
+    return errors
+
+
+def check_disabled_repeat_filter() -> list[str]:
+    """LOG_REPEAT_BURST=0 или LOG_REPEAT_WINDOW=0 пропускают все записи."""
+    record = logging.makeLogRecord({"levelno": logging.WARNING, "pathname": "x", "lineno": 1})
+    errors = []
+    for window, burst in ((REPEAT_WINDOW, 0), (0, REPEAT_BURST)):
+        repeat_filter = RepeatFilter(window, burst)
+        passed = sum(repeat_filter.filter(record) for _ in range(RECORDS))
+        if passed != RECORDS:
+            errors.append(f"окно {window}, запас {burst}: пропущено {passed} из {RECORDS}")
+    return errors
+
+
+async def run() -> list[str]:
+    """Пишет записи через очередь в медленный вывод."""
+    settings.log_format = "json"
+    settings.log_repeat_window = REPEAT_WINDOW
+    settings.log_repeat_burst = REPEAT_BURST
+    stream = SlowStream()
+    listener = setup_logging(stream)
+
+    started = time.perf_counter()
+    for number in range(RECORDS):
+        logger.info("Запись %d", number)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{RECORDS} записей: {elapsed * 1e6 / RECORDS:.1f} мкс на запись в цикле, "
+        f"вывод тратит {OUTPUT_DELAY * 1e6:.0f} мкс на запись"
+    )
+    errors = []
+    if elapsed > RECORDS * OUTPUT_DELAY / 2:
+        errors.append("запись в лог ждёт вывода")
+
+    await log_in_update()
+    repeat_warnings(RECORDS)
+    # За окно запас восполняется, и первая запись сообщает о пропущенных
+    await asyncio.sleep(REPEAT_WINDOW)
+    repeat_warnings(REPEAT_BURST)
+    listener.stop()
+
+    lines = stream.getvalue().splitlines()
+    return errors + check_output(lines) + check_disabled_repeat_filter()
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""Проверка сторожа цикла событий и замер задержки цикла в сценарии.
+
+С включённым сторожем прогоняется полный сценарий расчёта и печатается
+распределение задержки цикла (синхронная запись логов чатов, сборка
+запросов с картинками). Затем цикл намеренно блокируется синхронным
+sleep: сторож должен записать зависание со стеком, в котором есть
+блокирующая функция, а /metrics — отдать метрики цикла.
+
+Запуск: ``python -m scripts.loop_lag_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+import time
+
+from aiohttp import ClientSession
+
+from app.monitoring.loop_lag import LoopLagMonitor
+from app.monitoring.metrics import start_metrics_server
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner
+
+THRESHOLD = 0.05
+METRICS_PORT = 9187
+
+
+def blocking_io() -> None:
+    """Имитация синхронной работы в цикле событий."""
+    time.sleep(THRESHOLD * 4)
+
+
+async def check_stall(monitor: LoopLagMonitor) -> list[str]:
+    """Блокировка цикла попадает в лог со стеком и в /metrics."""
+    await asyncio.sleep(monitor.interval * 2)
+    blocking_io()
+    await asyncio.sleep(monitor.interval * 2)
+
+    errors = []
+    stall = monitor.stalls[-1] if monitor.stalls else None
+    if stall is None:
+        return ["зависание не записано"]
+    print(f"зависание: {stall.lag * 1000:.0f} мс, стек снят: {'blocking_io' in stall.stack}")
+    if "blocking_io" not in stall.stack:
+        errors.append(f"в стеке нет блокирующей функции:\n{stall.stack}")
+
+    runner = await start_metrics_server(METRICS_PORT, host="127.0.0.1")
+    try:
+        async with ClientSession() as http:
+            async with http.get(f"http://127.0.0.1:{METRICS_PORT}/metrics") as response:
+                body = await response.text()
+    finally:
+        await runner.cleanup()
+    expected = [
+        f"bot_event_loop_stalls_total {len(monitor.stalls)}",
+        "bot_event_loop_lag_seconds_count",
+    ]
+    if not all(line in body for line in expected):
+        errors.append(f"/metrics без метрик цикла:\n{body}")
+    return errors
+
+
+async def measure_scenario(monitor: LoopLagMonitor) -> None:
+    """Распределение задержки цикла во время сценариев расчёта."""
+    lag = monitor.lag
+    runner = ConversationRunner()
+    for _ in range(20):
+        await runner.run(ALL_LIGHTING)
+        await asyncio.sleep(0)
+    print(
+        f"сценарии: {lag.count} замеров, p50 ≤ {lag.quantile(0.5) * 1000:.0f} мс, "
+        f"p99 ≤ {lag.quantile(0.99) * 1000:.0f} мс, максимум {lag.max * 1000:.0f} мс, "
+        f"зависаний {len(monitor.stalls)}"
+    )
+
+
+async def run() -> list[str]:
+    """Прогоняет сценарии и проверку зависания под одним сторожем."""
+    monitor = LoopLagMonitor(interval=0.01, threshold=THRESHOLD)
+    monitor.start()
+    try:
+        await measure_scenario(monitor)
+        errors = await check_stall(monitor)
+    finally:
+        await monitor.stop()
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Проверка планировщика исходящих запросов OutboundLimiter.
+
+Запросы уходят в фейковую сессию, которая записывает время отправки и
+по заказу отвечает 429. Лимиты уменьшены, чтобы проверка шла секунды:
+общий темп не превышается, чат получает не больше запаса сразу (при
+нулевом темпе чата — без ограничения), ответы пользователям обгоняют
+фоновые уведомления, а после 429 запрос повторяется через retry_after и
+не теряется. Отменённая отправка возвращает токен чата, а фоновая
+отправка не задерживает того, кто её поставил.
+
+Запуск: ``python -m scripts.outbound_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+from typing import Any
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage, TelegramMethod
+
+from app.bot.outbound import OutboundLimiter, background_priority, background_sends
+from app.utils.token_bucket import TokenBuckets
+
+RATE = 50.0
+CHAT_RATE, CHAT_BURST = 10.0, 5
+
+
+class PacedSession(BaseSession):
+    """Сессия без сети: запоминает (время, чат, текст) и отвечает 429 по заказу."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sent: list[tuple[float, Any, str]] = []
+        self.flood_waits: dict[str, int] = {}
+
+    async def close(self) -> None:
+        """Закрывать нечего."""
+
+    async def stream_content(self, *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+    async def make_request(
+        self, bot: Bot, method: TelegramMethod[Any], timeout: int | None = None
+    ) -> Any:
+        """Записывает отправку или отвечает 429 на заказанный текст."""
+        retry_after = self.flood_waits.pop(method.text, None)
+        if retry_after is not None:
+            raise TelegramRetryAfter(method, "Too Many Requests", retry_after)
+        self.sent.append((asyncio.get_running_loop().time(), method.chat_id, method.text))
+        return True
+
+
+def make_bot() -> tuple[Bot, PacedSession]:
+    """Бот с фейковой сессией и планировщиком с уменьшенными лимитами."""
+    session = PacedSession()
+    limiter = OutboundLimiter()
+    limiter.rate = RATE
+    limiter.chats = TokenBuckets(CHAT_RATE, CHAT_BURST)
+    session.middleware(limiter)
+    return Bot(token="123456:TEST-outbound", session=session), session
+
+
+async def send(bot: Bot, chat_id: int, text: str, background: bool = False) -> None:
+    if background:
+        with background_priority():
+            await bot(SendMessage(chat_id=chat_id, text=text))
+    else:
+        await bot(SendMessage(chat_id=chat_id, text=text))
+
+
+async def check_rates() -> list[str]:
+    """Общий темп и темп одного чата."""
+    bot, session = make_bot()
+    errors = []
+    await asyncio.gather(*(send(bot, chat_id, "x") for chat_id in range(1, 101)))
+    times = [sent_at for sent_at, _, _ in session.sent]
+    peak = max(sum(t <= start + 1 for t in times[i:]) for i, start in enumerate(times))
+    print(f"100 чатов: {times[-1] - times[0]:.2f} с, пик за секунду {peak} (лимит {RATE:.0f})")
+    if peak > RATE + 1:
+        errors.append(f"общий темп превышен: {peak} за секунду")
+
+    session.sent.clear()
+    await asyncio.gather(*(send(bot, 7, str(i)) for i in range(CHAT_BURST * 2)))
+    times = [sent_at for sent_at, _, _ in session.sent]
+    spread = times[-1] - times[0]
+    expected = CHAT_BURST / CHAT_RATE
+    print(f"{CHAT_BURST * 2} сообщений в один чат: {spread:.2f} с (ожидалось ~{expected:.2f})")
+    if spread < expected * 0.8:
+        errors.append(f"темп чата не соблюдён: {spread:.2f} с")
+
+    # OUTBOUND_CHAT_RATE=0: чат не ограничивается, отправки идут в общем темпе
+    limiter = next(m for m in session.middleware if isinstance(m, OutboundLimiter))
+    limiter.chats = TokenBuckets(0, CHAT_BURST)
+    session.sent.clear()
+    await asyncio.gather(*(send(bot, 8, str(i)) for i in range(CHAT_BURST * 2)))
+    times = [sent_at for sent_at, _, _ in session.sent]
+    print(f"{CHAT_BURST * 2} сообщений в чат без лимита: {times[-1] - times[0]:.2f} с")
+    if times[-1] - times[0] >= expected * 0.8:
+        errors.append(f"нулевой темп чата ограничивает отправку: {times[-1] - times[0]:.2f} с")
+    return errors
+
+
+async def check_priority() -> list[str]:
+    """При пустом общем ведре ответы пользователям уходят раньше уведомлений."""
+    bot, session = make_bot()
+    await asyncio.gather(
+        *(send(bot, -100 - i, "notify", background=True) for i in range(40)),
+        *(send(bot, i, "reply") for i in range(1, 41)),
+    )
+    order = [text for _, _, text in session.sent[1:]]
+    late_replies = order.index("notify") if "notify" in order else len(order)
+    print(f"после исчерпания ведра: сначала {late_replies} ответов, затем уведомления")
+    if "reply" in order[late_replies:]:
+        return ["уведомление ушло раньше ответа пользователю"]
+    return []
+
+
+async def check_retry_after() -> list[str]:
+    """После 429 запрос повторяется через retry_after, остальные ждут вместе с ним."""
+    bot, session = make_bot()
+    session.flood_waits["flooded"] = 1
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await send(bot, 1, "flooded")
+    await send(bot, 2, "after")
+    sent = {text: sent_at - started for sent_at, _, text in session.sent}
+    print(f"429 с retry_after=1: повтор через {sent.get('flooded', -1):.2f} с")
+    if sent.get("flooded", 0) < 1 or sent.get("after", 0) < 1:
+        return [f"retry_after не соблюдён: {sent}"]
+    return []
+
+
+async def check_refund() -> list[str]:
+    """Отменённые в очереди чата отправки возвращают токены: следующая не ждёт за них."""
+    bot, _ = make_bot()
+    tasks = [asyncio.create_task(send(bot, 7, str(i))) for i in range(CHAT_BURST * 2)]
+    await asyncio.sleep(0.1 / CHAT_RATE)
+    for task in tasks[CHAT_BURST:]:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await send(bot, 7, "next")
+    waited = loop.time() - started
+    print(f"после {CHAT_BURST} отменённых отправок: ожидание {waited:.2f} с")
+    if waited > 1.5 / CHAT_RATE:
+        return [f"токены отменённых отправок не возвращены: ожидание {waited:.2f} с"]
+    return []
+
+
+async def check_background() -> list[str]:
+    """Фоновая отправка не задерживает поставившего её и уходит с фоновым приоритетом."""
+    bot, session = make_bot()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for chat_id in range(-200, -200 - CHAT_BURST * 4, -1):
+        background_sends.submit(send(bot, chat_id, "notify"), name="notify")
+    queued = loop.time() - started
+    await asyncio.gather(*(send(bot, i, "reply") for i in range(1, 21)))
+    await background_sends.drain()
+    order = [text for _, _, text in session.sent]
+    print(f"фоновые отправки поставлены за {queued * 1e3:.1f} мс, отправлено {len(order)}")
+    errors = []
+    if queued > 0.01:
+        errors.append(f"постановка фоновых отправок ждала отправки: {queued:.2f} с")
+    if len(order) != CHAT_BURST * 4 + 20 or order[-1] != "notify":
+        errors.append("фоновые отправки потеряны или обогнали ответы пользователям")
+    return errors
+
+
+async def run() -> list[str]:
+    """Прогоняет все проверки."""
+    errors = await check_rates() + await check_priority() + await check_retry_after()
+    return errors + await check_refund() + await check_background()
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Проверка профилировщика и снимков памяти из admin-команд.
+
+Сэмплер снимает стек цикла событий, пока идут сценарии расчёта: в
+collapsed stacks должны быть кадры хендлеров бота, а сжатый файл —
+распаковываться. Снимок tracemalloc после накопления объектов должен
+показать прирост в строке, где они создавались. Затем /profile и /memsnap
+прогоняются через диспетчер: администратор получает файл, остальные —
+нет.
+
+Запуск: ``python -m scripts.profiler_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import gzip
+import sys
+import threading
+
+from app.bot.handlers import admin
+from app.monitoring.profiler import MemorySnapshots, render_profile, sample_stacks
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner
+
+PROFILE_SECONDS = 1.0
+
+
+async def check_profile(runner: ConversationRunner) -> list[str]:
+    """Стек цикла событий во время сценариев содержит хендлеры бота."""
+    loop_thread = threading.get_ident()
+    sampling = asyncio.create_task(
+        asyncio.to_thread(sample_stacks, loop_thread, PROFILE_SECONDS, 0.001)
+    )
+    while not sampling.done():
+        await runner.run(ALL_LIGHTING)
+    content, summary = render_profile(sampling.result())
+    body = gzip.decompress(content).decode()
+    print(f"профиль: {sum(sampling.result().values())} сэмплов, {len(body)} байт\n{summary}")
+
+    errors = []
+    if "routing._dispatch" not in body:
+        errors.append("в профиле нет кадров хендлеров бота (routing._dispatch)")
+    if any(len(line.rsplit(" ", 1)) != 2 for line in body.splitlines()):
+        errors.append("строки профиля не в формате collapsed stacks")
+    return errors
+
+
+def check_memsnap() -> list[str]:
+    """Прирост памяти между снимками указывает на строку, где она выделена."""
+    snapshots = MemorySnapshots()
+    errors = []
+    if snapshots.take() is not None:
+        errors.append("первый снимок должен только включить tracemalloc")
+    leak = [bytearray(1024) for _ in range(2000)]  # noqa: F841
+    result = snapshots.take()
+    snapshots.stop()
+    if result is None:
+        return errors + ["второй снимок не вернул разницу"]
+    content, summary = result
+    print(f"снимок памяти:\n{summary}")
+    if "profiler_check.py" not in gzip.decompress(content).decode().split("\n", 1)[0]:
+        errors.append("наибольший прирост не в строке, где выделялась память")
+    return errors
+
+
+async def check_commands(runner: ConversationRunner) -> list[str]:
+    """Команды отвечают файлом администратору и не видны остальным."""
+    errors = []
+    admin.ADMIN_IDS = frozenset({runner._user_id + 1})
+    report = await runner.run([("text", "/profile 1"), ("text", "/memsnap"), ("text", "/memsnap")])
+    admin._snapshots.stop()
+    if report.calls["sendDocument"] != 2:
+        errors.append(f"администратор получил файлов: {report.calls['sendDocument']}, ожидалось 2")
+
+    try:
+        report = await runner.run([("text", "/profile 1")])
+    except RuntimeError:
+        report = None
+    if report is not None and report.calls["sendDocument"]:
+        errors.append("профиль отправлен пользователю не из ADMIN_IDS")
+    return errors
+
+
+async def run() -> list[str]:
+    """Прогоняет все проверки на одном диспетчере."""
+    runner = ConversationRunner()
+    errors = await check_profile(runner)
+    errors += check_memsnap()
+    errors += await check_commands(runner)
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
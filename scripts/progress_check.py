@@ -0,0 +1,128 @@
+"""Исчерпывающая проверка нумерации шагов в прогресс-баре.
+
+Для каждого типа карниза и каждого набора типов освещения маршрут
+проходится по настоящему графу шагов; номера в заголовках должны идти
+подряд с 1, а последний шаг — совпадать с общим количеством шагов.
+Отдельно проверяется, что заголовок шага выбора освещения не меняется,
+пока пользователь переключает типы освещения.
+
+Запуск: ``python -m scripts.progress_check``. Код выхода 1 при ошибке.
+"""
+
+import sys
+from itertools import combinations
+
+from app.bot.flow.graph import (
+    AREA,
+    CALCULATION,
+    CORNICE_TYPE,
+    LIGHTING_TYPES,
+    SPOTLIGHT_NAMES,
+    TRACK_NAMES,
+)
+from app.bot.flow.progress import (
+    LIGHTING_KEYS,
+    PROGRESS_HEADERS,
+    STEP_POSITIONS,
+    get_progress_header,
+    get_step_position,
+)
+from app.bot.flow.steps import Step
+from app.schemas.session import Session
+from app.templates.messages.texts import TOTAL_STEPS, format_progress
+
+
+def _answer(step: Step, session: Session, cornice: str | None, lighting: set[str]) -> None:
+    """Имитирует ответ пользователя на шаг: заполняет сессию, как хендлеры."""
+    if step is CORNICE_TYPE:
+        session.cornice_type = cornice
+        if cornice is None:
+            session.cornice_length = 0
+    elif step.select is not None:
+        options = {
+            "selected_lighting": lighting,
+            "selected_spotlight_types": set(SPOTLIGHT_NAMES),
+            "selected_track_types": set(TRACK_NAMES),
+        }
+        setattr(session, step.select.field, options[step.select.field])
+
+
+def walk(cornice: str | None, lighting: set[str]) -> list[tuple[str, int, int]]:
+    """Проходит маршрут расчёта и собирает показанные номера шагов.
+
+    Returns:
+        (ключ шага, номер, всего) для каждого шага с прогресс-баром
+    """
+    session = Session()
+    shown = []
+    step: Step | None = AREA
+    while step is not None:
+        session.update(step.on_enter)
+        if step.progress is not None:
+            position = get_step_position(step.progress, session)
+            if get_progress_header(step.progress, session) != format_progress(*position):
+                raise AssertionError(f"Заголовок {step.progress} не совпадает с номером")
+            shown.append((step.progress, *position))
+        _answer(step, session, cornice, lighting)
+        step = CALCULATION.next(step, session)
+    return shown
+
+
+def check_route(cornice: str | None, lighting: set[str]) -> list[str]:
+    """Проверяет маршрут и возвращает список найденных ошибок."""
+    shown = walk(cornice, lighting)
+    numbers = [number for _, number, _ in shown]
+    errors = []
+    if numbers != list(range(1, len(shown) + 1)):
+        errors.append(f"номера не подряд: {numbers}")
+    key, last, total = shown[-1]
+    if key != "wall_finish" or last != total:
+        errors.append(f"последний шаг {key} — {last}/{total}")
+    if any(number > total for _, number, total in shown):
+        errors.append(f"номер больше общего количества: {shown}")
+    return errors
+
+
+def check_toggling(cornice: str | None) -> list[str]:
+    """Заголовок шага освещения один и тот же при любом наборе отмеченных типов."""
+    session = Session(cornice_type=cornice, cornice_length=None if cornice else 0)
+    session.update(LIGHTING_TYPES.on_enter)
+    headers = [get_progress_header("lighting", session)]
+    # Отмечаем типы по одному, затем снимаем в обратном порядке
+    for key in (*LIGHTING_KEYS, *reversed(LIGHTING_KEYS)):
+        session.selected_lighting ^= {key}
+        headers.append(get_progress_header("lighting", session))
+    if len(set(headers)) != 1:
+        return [f"{cornice}: прогресс меняется при выборе освещения: {headers}"]
+    return []
+
+
+def check_tables() -> list[str]:
+    """Проверяет таблицы: номера в пределах, заголовки совпадают с номерами."""
+    errors = []
+    for variant, positions in STEP_POSITIONS.items():
+        for key, (number, total) in positions.items():
+            if not 1 <= number <= total <= TOTAL_STEPS:
+                errors.append(f"{variant} {key}: {number}/{total}")
+            if PROGRESS_HEADERS[variant][key] != format_progress(number, total):
+                errors.append(f"{variant} {key}: заголовок")
+    return errors
+
+
+def main() -> int:
+    """Проверяет все маршруты и таблицы, печатает отчёт."""
+    subsets = [set(c) for size in range(5) for c in combinations(LIGHTING_KEYS, size)]
+    errors = check_tables()
+    for cornice in ("pk14", None):
+        errors += check_toggling(cornice)
+        for lighting in subsets:
+            errors += [f"{cornice} {sorted(lighting)}: {e}" for e in check_route(cornice, lighting)]
+
+    for error in errors:
+        print(f"[FAIL] {error}")
+    print(f"Проверено маршрутов: {2 * len(subsets)}, вариантов таблицы: {len(STEP_POSITIONS)}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
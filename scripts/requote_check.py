@@ -0,0 +1,135 @@
+"""Проверка пересчёта расчётов по прайсу-кандидату (app.cli.requote).
+
+- пересчёт пачкой совпадает с calculate_total для случайных ответов и при
+  текущем прайсе, и при кандидате;
+- синтетический архив пересчитывается одним процессом и пулом: сводки
+  совпадают, CSV изменений содержит все расчёты в исходном порядке, а
+  процентили укладываются в ожидаемый диапазон.
+
+Запуск: ``python -m scripts.requote_check [--quotes N]``. Код выхода 1 при ошибке.
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+from app.cli.requote import requote
+from app.core.config import settings
+from app.schemas.session import Session
+from app.services.calculator import calculate_total, current_catalog
+from app.services.leads import LeadStore
+from app.services.requote import price_batch, to_columns
+
+CANDIDATE = {"ceiling_base_price": settings.ceiling_base_price * 1.1, "cornice_pk14_price": 4000}
+PROFILES = ("insert", "shadow", "floating")
+CORNICES = (None, "pk5", "am1", "pk14", "bpp", "bp40")
+
+
+def random_session(rng: random.Random) -> Session:
+    """Случайные ответы пользователя."""
+    cornice = rng.choice(CORNICES)
+    return Session(
+        area=round(rng.uniform(5, 120), 1),
+        profile_type=rng.choice(PROFILES),
+        cornice_type=cornice,
+        cornice_length=round(rng.uniform(1, 20), 1) if cornice else 0,
+        spotlights_builtin=rng.randint(0, 10),
+        spotlights_surface=rng.randint(0, 5),
+        spotlights_pendant=rng.randint(0, 3),
+        track_surface_length=rng.choice((0, 2.5)),
+        track_builtin_length=rng.choice((0, 4)),
+        light_lines=rng.choice((0, 0, 3)),
+        chandeliers=rng.randint(0, 2),
+    )
+
+
+def check_formula(rng: random.Random) -> list[str]:
+    """Пачка считается так же, как calculate_total, при обоих прайсах."""
+    sessions = [random_session(rng) for _ in range(1000)]
+    records = [
+        {"kind": "quote", "ts": 0, "user_id": 0, **calculate_total(session).model_dump()}
+        for session in sessions
+    ]
+    batch = to_columns(records)
+    current = current_catalog()
+    candidate = {**current, **CANDIDATE}
+    saved = {name: getattr(settings, name) for name in CANDIDATE}
+    try:
+        for name, value in CANDIDATE.items():
+            setattr(settings, name, value)
+        expected = [calculate_total(session).total_cost for session in sessions]
+    finally:
+        for name, value in saved.items():
+            setattr(settings, name, value)
+
+    errors = []
+    if any(abs(a - b) > 1e-6 for a, b in zip(price_batch(batch, current), batch["total_cost"])):
+        errors.append("пересчёт по текущему прайсу расходится с calculate_total")
+    if any(abs(a - b) > 1e-6 for a, b in zip(price_batch(batch, candidate), expected)):
+        errors.append("пересчёт по кандидату расходится с calculate_total")
+    return errors
+
+
+def fill(store: LeadStore, count: int, rng: random.Random) -> None:
+    """Синтетический архив расчётов с растущими временем и номером пользователя."""
+    store.leads_dir.mkdir(parents=True, exist_ok=True)
+    samples = [calculate_total(random_session(rng)).model_dump() for _ in range(500)]
+    with open(store.path(date.today()), "w", encoding="utf-8") as f:
+        for number in range(count):
+            sample = samples[number % len(samples)]
+            record = {"ts": time.time(), "kind": "quote", "user_id": number, **sample}
+            f.write(json.dumps(record) + "\n")
+
+
+def check_bulk(store: LeadStore, count: int, directory: Path) -> list[str]:
+    """Одинаковые сводки одним процессом и пулом, полный CSV по порядку."""
+    candidate = {**current_catalog(), **CANDIDATE}
+    summaries = []
+    for workers in sorted({1, max(2, os.cpu_count() or 1)}):
+        path = directory / f"deltas-{workers}.csv"
+        started = time.perf_counter()
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            stats = requote(store, candidate, workers, f, batch_size=10_000)
+        elapsed = time.perf_counter() - started
+        print(f"{workers} процесс(ов): {count / elapsed:,.0f} расчётов/с")
+        summaries.append(stats.summary())
+    print(summaries[-1])
+
+    errors = []
+    if len(set(summaries)) != 1:
+        errors.append("сводки одним процессом и пулом различаются")
+    with open(path, encoding="utf-8", newline="") as f:
+        users = [int(row["user_id"]) for row in csv.DictReader(f)]
+    if users != list(range(count)):
+        errors.append(f"в CSV {len(users)} строк не по порядку, ожидалось {count}")
+    if stats.count != count or not 0 < stats.percentile(50) <= 10 + 0.01:
+        errors.append(f"неожиданная сводка: {stats.count} расчётов, p50 {stats.percentile(50)}")
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quotes", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rng = random.Random(50)
+    directory = Path(tempfile.mkdtemp(prefix="requote_"))
+    store = LeadStore(str(directory / "leads"))
+    errors = check_formula(rng)
+    fill(store, args.quotes, rng)
+    errors += check_bulk(store, args.quotes, directory)
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Проверка поиска по диалогам: индексация, русский текст, телефоны и /find.
+
+Во временный индекс пишутся синтетические диалоги (имена, адреса и
+телефоны в разном написании), меряются скорость индексации и задержка
+запросов. Затем сценарий с заказом замера прогоняется через диспетчер с
+включённым индексом, и администратор находит его командой /find по
+номеру телефона.
+
+Запуск: ``python -m scripts.search_check [--users N]``. Код выхода 1 при ошибке.
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.bot.handlers import admin
+from app.services.chat_logger import chat_logger
+from app.services.search import ChatIndex
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner
+
+NAMES = ["Иван Иванов", "Пётр Семёнов", "Анна Смирнова", "Ольга Кузнецова"]
+STREETS = ["ул. Ленина", "пр. Мира", "ул. Садовая", "Невский пр."]
+CITIES = ["Москва", "Санкт-Петербург", "Казань"]
+
+# Запрос и пользователь, который должен найтись первым
+QUERIES = [
+    ("+7 (900) 000-00-42", 42),
+    ("89000000042", 42),
+    ("0000042", 42),
+    ("семенов 43", None),
+    ("Ленина 40 Москва", None),
+    ("КАЗАН", None),
+]
+
+
+def fill(index: ChatIndex, users: int) -> float:
+    """Диалоги users пользователей; возвращает время индексации в секундах."""
+    started = time.perf_counter()
+    for user_id in range(users):
+        name = NAMES[user_id % len(NAMES)]
+        index.add(user_id, time.time(), "user", f"{name} {user_id}")
+        index.add(user_id, time.time(), "user", f"8900{user_id:07d}")
+        street = STREETS[user_id % len(STREETS)]
+        address = f"г. {CITIES[user_id % len(CITIES)]}, {street}, д. {user_id % 100}"
+        index.add(user_id, time.time(), "user", address)
+        index.add(user_id, time.time(), "БОТ", "Спасибо! Менеджер свяжется с вами")
+    index.sync()
+    return time.perf_counter() - started
+
+
+def check_queries(index: ChatIndex) -> list[str]:
+    """Телефоны в любом написании, «ё», префиксы и регистр; задержка запросов."""
+    errors = []
+    latencies = []
+    for query, expected in QUERIES:
+        started = time.perf_counter()
+        hits = index.search(query)
+        latencies.append(time.perf_counter() - started)
+        if not hits or (expected is not None and hits[0].user_id != expected):
+            errors.append(f"запрос {query!r}: {[hit.user_id for hit in hits]}")
+    print(
+        f"запросы: медиана {statistics.median(latencies) * 1000:.1f} мс, "
+        f"максимум {max(latencies) * 1000:.1f} мс"
+    )
+    return errors
+
+
+async def check_find_command(path: Path) -> list[str]:
+    """Администратор находит заказ замера по телефону командой /find."""
+    runner = ConversationRunner()
+    chat_logger.index = ChatIndex(str(path))
+    await runner.run(ALL_LIGHTING)
+    customer = runner._user_id
+    chat_logger.index.sync()
+
+    admin.ADMIN_IDS = frozenset({runner._user_id + 1})
+    start = len(runner.session.calls)
+    await runner.run([("text", "/find 8 999 123-45-67")])
+    chat_logger.index.close()
+    replies = [call.text or "" for call in runner.session.calls[start:]]
+    if not any(f"id={customer}" in reply for reply in replies):
+        return [f"/find не нашёл пользователя {customer}: {replies}"]
+    print(f"/find: {replies[-1].splitlines()[0]}")
+    return []
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20_000)
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="chat_index_"))
+    index = ChatIndex(str(directory / "index.sqlite3"))
+    elapsed = fill(index, args.users)
+    print(f"индексация: {args.users * 4} сообщений за {elapsed:.2f} с")
+    errors = check_queries(index)
+    index.close()
+
+    errors += asyncio.run(check_find_command(directory / "dialogs.sqlite3"))
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Бенчмарк компактного формата сессий FSM.
+
+Проверяет, что типичные сессии и граничные значения счётчиков переживают
+кодирование без потерь, а записи прежней версии схемы читаются,
+меряет скорость encode/decode и размер сессии в байтах по сравнению с
+dict в MemoryStorage и pickle. В конце прогоняет полный сценарий с обоими
+хранилищами и сверяет вызовы Bot API.
+
+Запуск: ``python -m scripts.session_codec_bench``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import pickle
+import struct
+import sys
+import timeit
+from typing import Any
+
+from app.bot.storage import codec
+from app.bot.storage.memory import CompactMemoryStorage
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner
+
+SESSIONS: dict[str, tuple[str | None, dict[str, Any]]] = {
+    "area_only": ("CalculationStates:choosing_profile", {"area": 25.0}),
+    "minimal_result": (
+        "CalculationStates:showing_result",
+        {
+            "area": 25.0,
+            "profile_type": "insert",
+            "cornice_type": None,
+            "cornice_length": 0,
+            "selected_lighting": set(),
+            "wall_finish": False,
+            "editing_mode": False,
+        },
+    ),
+    "full_result": (
+        "CalculationStates:showing_result",
+        {
+            "area": 25.0,
+            "profile_type": "shadow",
+            "cornice_type": "pk14",
+            "cornice_length": 5.0,
+            "selected_lighting": {"spotlights", "tracks", "light_lines", "chandeliers"},
+            "selected_spotlight_types": {"builtin", "surface", "pendant"},
+            "spotlights_builtin": 4,
+            "spotlights_surface": 3,
+            "spotlights_pendant": 2,
+            "selected_track_types": {"surface", "builtin"},
+            "track_surface_length": 3.0,
+            "track_builtin_length": 2.0,
+            "light_lines": 4.0,
+            "chandeliers": 2,
+            "wall_finish": True,
+            "customer_name": "Иван Иванов",
+            "phone": "+79991234567",
+            "address": "г. Москва, ул. Ленина, д. 10",
+            "live_message_id": None,
+            "live_message_image": "",
+        },
+    ),
+}
+
+
+def _deep_size(value: Any) -> int:
+    """Размер объекта в памяти вместе с вложенными ключами и значениями."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, set | frozenset | list | tuple):
+        size += sum(_deep_size(item) for item in value)
+    return size
+
+
+def check_round_trip() -> list[str]:
+    """Сверяет данные и состояние после encode/decode."""
+    errors = []
+    for name, (state, data) in SESSIONS.items():
+        if codec.decode(codec.encode(state, data)) != (state, data):
+            errors.append(f"{name}: данные изменились после кодирования")
+    return errors
+
+
+def check_boundaries() -> list[str]:
+    """Граничные значения счётчиков и чтение записи старой версии схемы."""
+    errors = []
+    for value in (0, 2**31, 2**63 - 1):
+        data = {"spotlights_builtin": value, "chandeliers": value}
+        if codec.decode(codec.encode(None, data)) != (None, data):
+            errors.append(f"счётчик {value} изменился после кодирования")
+    bit = [name for name, _ in codec.FIELDS_V1].index("spotlights_builtin")
+    v1 = struct.pack("<BBIIi", 1, codec.NO_STATE, 1 << bit, 0, 7)
+    if codec.decode(v1) != (None, {"spotlights_builtin": 7}):
+        errors.append(f"запись версии 1 прочитана неверно: {codec.decode(v1)}")
+    return errors
+
+
+def bench(number: int = 20000) -> None:
+    """Печатает скорость и размер для каждой сессии."""
+    print(f"{'сессия':<16}{'codec':>7}{'pickle':>8}{'dict':>7}{'encode/s':>12}{'decode/s':>12}")
+    for name, (state, data) in SESSIONS.items():
+        encoded = codec.encode(state, data)
+        encode_time = timeit.timeit(lambda: codec.encode(state, data), number=number)
+        decode_time = timeit.timeit(lambda: codec.decode(encoded), number=number)
+        print(
+            f"{name:<16}{len(encoded):>7}{len(pickle.dumps((state, data))):>8}"
+            f"{_deep_size(data):>7}{number / encode_time:>12,.0f}{number / decode_time:>12,.0f}"
+        )
+
+
+def check_conversation() -> list[str]:
+    """Прогоняет полный сценарий с MemoryStorage и CompactMemoryStorage и сверяет вызовы."""
+    runner = ConversationRunner()
+    plain = asyncio.run(runner.run(ALL_LIGHTING))
+    runner.dp.fsm.storage = CompactMemoryStorage()
+    compact = asyncio.run(runner.run(ALL_LIGHTING))
+    if compact.calls != plain.calls:
+        return [f"all_lighting: {dict(compact.calls)} != {dict(plain.calls)}"]
+    print(f"all_lighting: {compact.total_calls} вызовов, как с MemoryStorage")
+
+    # Огромное число вместо количества светильников отклоняется, а не роняет сохранение
+    steps = ALL_LIGHTING[: ALL_LIGHTING.index(("text", "4"))]
+    start = len(runner.session.calls)
+    asyncio.run(runner.run([*steps, ("text", "99999999999")]))
+    reply = runner.session.calls[-1].text or ""
+    if "Количество должно быть" not in reply or len(runner.session.calls) == start:
+        return [f"большое количество светильников не отклонено: {reply!r}"]
+    return []
+
+
+def main() -> int:
+    """Проверяет кодек, печатает бенчмарк и результат прогона сценария."""
+    errors = check_round_trip()
+    errors += check_boundaries()
+    bench()
+    errors += check_conversation()
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
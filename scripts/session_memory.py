@@ -0,0 +1,164 @@
+"""Память на одну сессию в каждом хранилище FSM и бюджет на неё.
+
+Создаёт N сессий с типичными данными (по умолчанию 10 000) в MemoryStorage
+и CompactMemoryStorage и через tracemalloc меряет байты на сессию, а для
+полной сессии — вклад каждого ключа (ключи добавляются по одному, вклад —
+прирост памяти, включая перераспределение dict). Бюджеты заданы для
+10 000 сессий; превышение больше чем на BUDGET_TOLERANCE — ошибка.
+
+Хранилища вне памяти процесса (Redis и т.п.) бот не использует, поэтому
+здесь не меряются.
+
+Запуск: ``python -m scripts.session_memory [--sessions 100000] [--update]``.
+Код выхода 1, если какая-то сессия вышла за бюджет.
+"""
+
+import asyncio
+import sys
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.bot.storage.memory import CompactMemoryStorage
+from app.schemas.session import Session
+
+BACKENDS: dict[str, Callable[[], BaseStorage]] = {
+    "memory": MemoryStorage,
+    "compact": CompactMemoryStorage,
+}
+
+BUDGET_SESSIONS = 10_000
+BUDGET_TOLERANCE = 0.10
+BREAKDOWN_SESSIONS = 2_000
+
+
+def _in_progress(i: int) -> Session:
+    return Session(area=10.0 + i % 90, profile_type="shadow")
+
+
+def _minimal_result(i: int) -> Session:
+    session = _in_progress(i)
+    session.update({"cornice_length": 0, "selected_lighting": set()})
+    return session
+
+
+def _full_result(i: int) -> Session:
+    return Session(
+        area=10.0 + i % 90,
+        profile_type="floating",
+        cornice_type="pk14",
+        cornice_length=2.5 + i % 10,
+        selected_lighting={"spotlights", "tracks", "light_lines", "chandeliers"},
+        selected_spotlight_types={"builtin", "surface", "pendant"},
+        spotlights_builtin=4 + i % 8,
+        spotlights_surface=2,
+        spotlights_pendant=1,
+        selected_track_types={"surface", "builtin"},
+        track_surface_length=3.0 + i % 5,
+        track_builtin_length=2.0,
+        light_lines=1.5 + i % 4,
+        chandeliers=1 + i % 3,
+        wall_finish=True,
+        customer_name=f"Клиент {i}",
+        phone=f"+7999{i:07d}",
+        address=f"г. Москва, ул. Ленина, д. {i % 200 + 1}",
+    )
+
+
+# Профиль сессии: состояние FSM и ответы пользователя по номеру сессии
+PROFILES: dict[str, tuple[str, Callable[[int], Session]]] = {
+    "in_progress": ("CalculationStates:choosing_cornice_type", _in_progress),
+    "minimal_result": ("CalculationStates:showing_result", _minimal_result),
+    "full_result": ("CalculationStates:showing_result", _full_result),
+}
+
+# Байт на сессию при BUDGET_SESSIONS сессиях: "хранилище/профиль"
+BUDGETS: dict[str, int] = {
+    "memory/in_progress": 485,
+    "memory/minimal_result": 700,
+    "memory/full_result": 1772,
+    "compact/in_progress": 248,
+    "compact/minimal_result": 257,
+    "compact/full_result": 403,
+}
+
+
+async def measure(
+    backend: Callable[[], BaseStorage],
+    state: str,
+    make: Callable[[int], dict[str, Any]],
+    count: int,
+) -> float:
+    """Байт на сессию: прирост памяти после записи count сессий в хранилище."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    storage = backend()
+    for i in range(count):
+        key = StorageKey(bot_id=1, chat_id=i, user_id=i)
+        await storage.set_state(key, state)
+        await storage.set_data(key, make(i))
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del storage
+    return used / count
+
+
+def _prefix(keys: list[str]) -> Callable[[int], dict[str, Any]]:
+    """Данные полной сессии, в которых оставлены только ключи keys."""
+    return lambda i: {key: value for key, value in _full_result(i).to_data().items() if key in keys}
+
+
+async def breakdown(backend: Callable[[], BaseStorage], state: str) -> dict[str, float]:
+    """Вклад каждого ключа полной сессии в байтах на сессию."""
+    keys = list(_full_result(0).to_data())
+    result = {}
+    previous = await measure(backend, state, _prefix([]), BREAKDOWN_SESSIONS)
+    result["(состояние)"] = previous
+    for size in range(1, len(keys) + 1):
+        current = await measure(backend, state, _prefix(keys[:size]), BREAKDOWN_SESSIONS)
+        result[keys[size - 1]] = current - previous
+        previous = current
+    return result
+
+
+async def run(count: int) -> dict[str, float]:
+    """Меряет все хранилища и профили, печатает разбивку по ключам."""
+    results = {}
+    for backend_name, backend in BACKENDS.items():
+        for profile, (state, build) in PROFILES.items():
+            per_session = await measure(backend, state, lambda i: build(i).to_data(), count)
+            results[f"{backend_name}/{profile}"] = per_session
+        state = PROFILES["full_result"][0]
+        print(f"{backend_name}: вклад ключей full_result, байт на сессию")
+        for key, size in (await breakdown(backend, state)).items():
+            print(f"    {key:<26}{size:>8.0f}")
+    return results
+
+
+def main() -> int:
+    """Печатает память на сессию и сверяет её с бюджетами."""
+    count = BUDGET_SESSIONS
+    if "--sessions" in sys.argv:
+        count = int(sys.argv[sys.argv.index("--sessions") + 1])
+    results = asyncio.run(run(count))
+    if "--update" in sys.argv:
+        for name, per_session in results.items():
+            print(f'    "{name}": {per_session:.0f},')
+        return 0
+
+    failed = False
+    for name, per_session in results.items():
+        budget = BUDGETS[name]
+        over = count == BUDGET_SESSIONS and per_session > budget * (1 + BUDGET_TOLERANCE)
+        failed |= over
+        status = "FAIL" if over else "OK"
+        print(f"[{status}] {name}: {per_session:.0f} байт/сессия; budget {budget}")
+    print(f"Сессий в каждом замере: {count}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
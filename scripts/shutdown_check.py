@@ -0,0 +1,99 @@
+"""Проверка плавной остановки.
+
+Последний ответ расчёта (показ результата и заявка менеджерам) ещё
+обрабатывается, когда приходит остановка: ShutdownCoordinator должен
+дождаться его и повторного нажатия, ждущего блокировку пользователя, и
+только потом выполнить сбросы и закрыть хранилище FSM.
+Отдельно проверяется, что ожидание ограничено SHUTDOWN_TIMEOUT.
+
+Запуск: ``python -m scripts.shutdown_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+
+from app.bot.states import CalculationStates
+from app.core.config import settings
+from scripts.api_budget import MINIMAL
+from scripts.harness import ConversationRunner
+
+# Задержка каждого вызова Bot API, сек: обработка апдейта занимает несколько таких
+DELAY = 0.05
+
+
+async def check_drain(runner: ConversationRunner) -> list[str]:
+    """Остановка во время обработки апдейта дожидается его завершения."""
+    coordinator = runner.dp["shutdown"]
+    await runner.run(MINIMAL[:-1])
+
+    group_chat_id = int(settings.group_chat_id)
+    # Сколько заявок менеджерам ушло к моменту сброса
+    reports_at_flush: list[int] = []
+    coordinator.on_flush(
+        "проверка",
+        lambda: reports_at_flush.append(
+            sum(call.chat_id == group_chat_id for call in runner.session.calls)
+        ),
+    )
+    runner.session.delay = DELAY
+    # Повторное нажатие ждёт блокировку изоляции, пока обрабатывается первое
+    update = asyncio.create_task(runner.feed_concurrently([MINIMAL[-1], MINIMAL[-1]]))
+    await asyncio.sleep(DELAY / 2)
+    in_flight = len(coordinator.in_flight.tasks)
+
+    await runner.dp.emit_shutdown(bot=runner.bot, dispatcher=runner.dp)
+    await update
+    state = await runner.dp.fsm.storage.get_state(runner.storage_key())
+    print(
+        f"апдейтов в обработке: {in_flight}, заявок менеджерам к моменту сброса: "
+        f"{reports_at_flush}, состояние: {state}"
+    )
+
+    errors = []
+    if in_flight != 2:
+        errors.append(f"апдейт, ждущий блокировку пользователя, не учтён: {in_flight}")
+    if reports_at_flush != [1]:
+        errors.append(f"сброс выполнен до отправки заявки менеджерам: {reports_at_flush}")
+    if state != CalculationStates.showing_result.state:
+        errors.append(f"сессия не сохранена до закрытия хранилища: {state}")
+    return errors
+
+
+async def check_timeout(runner: ConversationRunner) -> list[str]:
+    """Зависший апдейт не задерживает остановку дольше timeout."""
+    coordinator = runner.dp["shutdown"]
+    coordinator.timeout = DELAY
+    await runner.run(MINIMAL[:-1])
+    runner.session.delay = DELAY * 20
+    update = asyncio.create_task(runner.feed_concurrently([MINIMAL[-1]]))
+    await asyncio.sleep(DELAY / 2)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    unfinished = await coordinator.drain()
+    elapsed = loop.time() - started
+    print(f"зависший апдейт: не дождались {unfinished}, ожидание {elapsed:.2f} с")
+    update.cancel()
+    if unfinished != 1 or elapsed > DELAY * 5:
+        return [f"ожидание не ограничено timeout: {unfinished}, {elapsed:.2f} с"]
+    return []
+
+
+async def run() -> list[str]:
+    """Прогоняет обе проверки на одном диспетчере."""
+    runner = ConversationRunner()
+    errors = await check_drain(runner)
+    runner.session.delay = 0.0
+    return errors + await check_timeout(runner)
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Проверка отклонения кнопок из предыдущих расчётов.
+
+Пользователь доходит до результата, начинает новый расчёт и нажимает
+кнопку на старом результате. Нажатие должно получить только ответ
+«кнопка устарела», не меняя состояние и не читая данные сессии;
+«Начать новый расчёт» на старом сообщении должна по-прежнему работать.
+После перезапуска (пустые хранилище и таблица поколений) кнопка текущего
+вопроса не считается устаревшей. «Пропустить» на шаге без этой кнопки (площадь) ничего не
+меняет. В конце печатается стоимость проверки поколения на одно нажатие.
+
+Запуск: ``python -m scripts.stale_button_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+import timeit
+
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.bot.keyboards import generation
+from app.bot.keyboards.generation import is_current, known_generation, parse_press
+from scripts.api_budget import MINIMAL, START
+from scripts.harness import ConversationRunner
+
+
+async def check_stale_press(runner: ConversationRunner) -> list[str]:
+    """Нажимает кнопки старого результата после начала нового расчёта."""
+    await runner.run(MINIMAL)
+    await runner.feed_concurrently([("text", "/start")])
+    key = runner.storage_key()
+    state_before = await runner.dp.fsm.storage.get_state(key)
+    data_before = await runner.dp.fsm.storage.get_data(key)
+
+    errors = []
+    storage = runner.dp.fsm.storage
+    get_data, reads = storage.get_data, []
+    storage.get_data = lambda key: reads.append(key) or get_data(key)
+    start = len(runner.session.calls)
+    await runner.feed_concurrently([("press", "edit_params")])
+    storage.get_data = get_data
+    methods = [call.method for call in runner.session.calls[start:]]
+    if methods != ["answerCallbackQuery"]:
+        errors.append(f"устаревшая кнопка: вызовы {methods}")
+    if reads:
+        errors.append(f"устаревшая кнопка читала данные сессии: {len(reads)} раз")
+    state_after = await runner.dp.fsm.storage.get_state(key)
+    data_after = await runner.dp.fsm.storage.get_data(key)
+    if (state_after, data_after) != (state_before, data_before):
+        errors.append("устаревшая кнопка изменила состояние или данные сессии")
+    print(f"edit_params на старом результате: {methods}")
+
+    start = len(runner.session.calls)
+    await runner.feed_concurrently([("press", "start_calculation")])
+    methods = [call.method for call in runner.session.calls[start:]]
+    if "sendMessage" not in methods:
+        errors.append(f"start_calculation на старом результате не сработала: {methods}")
+    print(f"start_calculation на старом результате: {methods}")
+    return errors
+
+
+async def check_after_restart(runner: ConversationRunner) -> list[str]:
+    """После перезапуска с пустым хранилищем кнопка текущего вопроса работает."""
+    await runner.run(MINIMAL[:-1])
+    key = runner.storage_key()
+    state = await runner.dp.fsm.storage.get_state(key)
+    runner.dp.fsm.storage = MemoryStorage()
+    generation._current.clear()
+    await runner.dp.fsm.storage.set_state(key, state)
+
+    start = len(runner.session.calls)
+    await runner.feed_concurrently([MINIMAL[-1]])
+    methods = [call.method for call in runner.session.calls[start:]]
+    print(f"{MINIMAL[-1][1]} после перезапуска: {methods}")
+    if methods == ["answerCallbackQuery"]:
+        return [f"после перезапуска кнопка текущего вопроса отклонена: {methods}"]
+    return []
+
+
+async def check_skip_without_button(runner: ConversationRunner) -> list[str]:
+    """Нажатие «Пропустить» на вопросе о площади не записывает 0 и не двигает шаг."""
+    await runner.run(START)
+    key = runner.storage_key()
+    state_before = await runner.dp.fsm.storage.get_state(key)
+    data_before = await runner.dp.fsm.storage.get_data(key)
+
+    start = len(runner.session.calls)
+    await runner.feed_concurrently([("press", "skip_zero")])
+    methods = [call.method for call in runner.session.calls[start:]]
+    print(f"skip_zero на вопросе о площади: {methods}")
+    state_after = await runner.dp.fsm.storage.get_state(key)
+    data_after = await runner.dp.fsm.storage.get_data(key)
+    if (state_after, data_after) != (state_before, data_before):
+        return ["skip_zero на шаге без кнопки изменила состояние или данные сессии"]
+    return []
+
+
+def bench_check(number: int = 200_000) -> None:
+    """Печатает время разбора callback_data и сравнения с поколением из таблицы."""
+    generation.remember_generation(1, 3)
+
+    def check() -> bool:
+        press = parse_press("g:3:lighting_done")
+        return press is not None and is_current(press[0], known_generation(1))
+
+    seconds = timeit.timeit(check, number=number)
+    print(f"проверка поколения: {seconds / number * 1e9:.0f} нс на нажатие")
+
+
+def main() -> int:
+    """Прогоняет проверку и печатает отчёт."""
+    runner = ConversationRunner()
+    errors = asyncio.run(check_stale_press(runner))
+    errors += asyncio.run(check_after_restart(runner))
+    errors += asyncio.run(check_skip_without_button(runner))
+    bench_check()
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
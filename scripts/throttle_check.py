@@ -0,0 +1,130 @@
+"""Проверка защиты от флуда.
+
+Часы middleware подменяются, поэтому «мгновенная» серия апдейтов
+воспроизводима. Проверяется, что серия нажатий обрабатывается не больше
+запаса ведра, а остальные получают только ответ на callback и не берут
+блокировку FSM пользователя; что серия /start упирается в строгий лимит
+дорогих действий и получает одно предупреждение; что после паузы лимит
+восстанавливается; что таблица вёдер очищается от простаивающих
+пользователей. В конце печатается стоимость проверки на апдейт.
+
+Запуск: ``python -m scripts.throttle_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+import timeit
+from collections import Counter
+
+from app.bot.middlewares.throttling import ThrottlingMiddleware
+from app.utils.token_bucket import TokenBuckets
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner, Step
+
+RATE, BURST = 2.0, 10
+EXPENSIVE_RATE, EXPENSIVE_BURST = 0.2, 3
+
+
+class FakeClock:
+    """Часы, которые идут только вручную."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def install(runner: ConversationRunner, clock: FakeClock) -> ThrottlingMiddleware:
+    """Включает выключенный в скриптах middleware с заданными лимитами и подменёнными часами."""
+    manager = runner.dp.update.outer_middleware
+    throttling = next(m for m in manager if isinstance(m, ThrottlingMiddleware))
+    configured = ThrottlingMiddleware(RATE, BURST, EXPENSIVE_RATE, EXPENSIVE_BURST, clock)
+    # Порядок middleware сохраняется: включается тот же экземпляр, что стоит снаружи FSM
+    throttling.enabled = configured.enabled
+    throttling.updates, throttling.expensive = configured.updates, configured.expensive
+    throttling.clock = clock
+    return throttling
+
+
+async def feed(runner: ConversationRunner, steps: list[Step]) -> Counter[str]:
+    """Отправляет шаги по одному, как быстро нажимающий пользователь; возвращает вызовы."""
+    start = len(runner.session.calls)
+    for step in steps:
+        await runner.feed_concurrently([step])
+    return Counter(call.method for call in runner.session.calls[start:])
+
+
+async def check_flood() -> list[str]:
+    """Серии нажатий и /start от одного пользователя при остановленных часах."""
+    runner = ConversationRunner()
+    clock = FakeClock()
+    install(runner, clock)
+    errors = []
+
+    await runner.run(ALL_LIGHTING[: ALL_LIGHTING.index(("press", "toggle_spotlights"))])
+    clock.now += 60
+    isolation = runner.dp.fsm.events_isolation
+    lock, locks = isolation.lock, []
+    isolation.lock = lambda key: locks.append(key) or lock(key)
+    calls = await feed(runner, [("press", "toggle_spotlights")] * 30)
+    isolation.lock = lock
+    print(f"30 переключателей подряд: {dict(calls)}, блокировок FSM {len(locks)}")
+    handled = sum(calls.values()) - calls["answerCallbackQuery"]
+    if calls["answerCallbackQuery"] != 30 or handled != BURST:
+        errors.append(f"серия нажатий: {dict(calls)}")
+    if len(locks) != BURST:
+        errors.append(f"отброшенные нажатия брали блокировку FSM: {len(locks)}")
+
+    clock.now += 60
+    burst = await feed(runner, [("text", "/start")] * 10)
+    print(f"10 /start подряд: {dict(burst)}")
+
+    clock.now += 1 / EXPENSIVE_RATE
+    welcome = await feed(runner, [("text", "/start")])
+    print(f"/start после паузы: {dict(welcome)}")
+    if not welcome:
+        errors.append("после паузы /start не обработан")
+    # Запас строгого ведра приветствий и одно предупреждение
+    expected = sum(welcome.values()) * EXPENSIVE_BURST + 1
+    if sum(burst.values()) != expected:
+        errors.append(f"серия /start: {sum(burst.values())} вызовов, ожидалось {expected}")
+    return errors
+
+
+def check_eviction(users: int = 10_000) -> list[str]:
+    """Простаивающие вёдра удаляются, размер таблицы ограничен."""
+    buckets = TokenBuckets(RATE, BURST, max_keys=users // 2)
+    for user_id in range(users):
+        buckets.take(user_id, 0.0)
+    peak = len(buckets.buckets)
+    buckets.take(0, BURST / RATE)
+    print(f"вёдра: пик {peak} при лимите {users // 2}, после простоя {len(buckets.buckets)}")
+    errors = []
+    if peak > users // 2:
+        errors.append(f"таблица вёдер превысила лимит: {peak}")
+    if len(buckets.buckets) != 1:
+        errors.append(f"простаивающие вёдра не удалены: {len(buckets.buckets)}")
+    return errors
+
+
+def bench_take(number: int = 200_000) -> None:
+    """Печатает время проверки лимита на апдейт."""
+    buckets = TokenBuckets(RATE, BURST)
+    clock = iter(range(number * 2))
+    seconds = timeit.timeit(lambda: buckets.take(1, next(clock)), number=number)
+    print(f"проверка лимита: {seconds / number * 1e9:.0f} нс на апдейт")
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(check_flood())
+    errors += check_eviction()
+    bench_take()
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Проверка трейсов апдейтов и цена инструментирования.
+
+Сценарий расчёта с заказом замера прогоняется с TRACE_SAMPLE_RATE=1 и
+фейковым Bot API с задержкой: каждый апдейт должен дать один трейс в
+формате OTLP с одним корнем и связным деревом, а в трейсах должны быть
+спаны middleware (включая ожидание блокировки FSM), хендлеров,
+хранилища FSM, расчёта, шаблонов, запросов к Bot API и рассылки
+менеджерам. Печатается дерево апдейта с показом
+результата и время обработки апдейта без записи трейсов и с ней.
+
+Запуск: ``python -m scripts.trace_check``. Код выхода 1 при ошибке.
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from app.bot.middlewares.tracing import TelegramSpanMiddleware, TracingMiddleware
+from app.core.config import settings
+from scripts.api_budget import ALL_LIGHTING
+from scripts.harness import ConversationRunner
+from scripts.trace_view import load_traces, render_tree
+
+API_DELAY = 0.002
+TIMING_ROUNDS = 20
+
+EXPECTED_SPANS = {
+    "update",
+    "middleware SessionMiddleware",
+    "middleware ThrottlingMiddleware",
+    "middleware FSMContextMiddleware",
+    "fsm.get_data",
+    "fsm.set_data",
+    "handler process_wall_finish",
+    "advance",
+    "show_result",
+    "calculate_total",
+    "format_result_message",
+    "render_question",
+    "notify_managers",
+    "telegram sendMessage",
+}
+
+
+def check_traces(path: Path, updates: int) -> list[str]:
+    """Один трейс на апдейт, связное дерево и все ожидаемые спаны."""
+    traces = load_traces(path)
+    errors = []
+    if len(traces) != updates:
+        errors.append(f"трейсов {len(traces)}, апдейтов {updates}")
+    names = set()
+    for spans in traces:
+        ids = {item["spanId"] for item in spans}
+        roots = [item for item in spans if not item["parentSpanId"]]
+        orphans = [item for item in spans if item["parentSpanId"] not in ids | {""}]
+        if len(roots) != 1 or orphans or len({item["traceId"] for item in spans}) != 1:
+            errors.append(f"несвязный трейс {spans[0]['traceId']}")
+        names.update(item["name"] for item in spans)
+    missing = EXPECTED_SPANS - names
+    if missing:
+        errors.append(f"нет спанов: {', '.join(sorted(missing))}")
+
+    finish = [s for s in traces if any(i["name"] == "handler process_wall_finish" for i in s)]
+    if finish:
+        print(render_tree(finish[0]))
+    return errors
+
+
+async def time_updates(runner: ConversationRunner, tracing: TracingMiddleware) -> None:
+    """Время сценария без записи трейсов и с записью каждого апдейта."""
+    for label, rate in (("без трейсов", 0.0), ("все апдейты", 1.0)):
+        tracing.sample_rate = rate
+        started = time.perf_counter()
+        for _ in range(TIMING_ROUNDS):
+            await runner.run(ALL_LIGHTING)
+        per_update = (time.perf_counter() - started) / (TIMING_ROUNDS * len(ALL_LIGHTING))
+        print(f"{label:12} {per_update * 1e6:8.0f} мкс на апдейт")
+
+
+async def run() -> list[str]:
+    """Прогоняет сценарий с записью трейсов во временный файл."""
+    path = Path(tempfile.mkdtemp(prefix="traces_")) / "traces.jsonl"
+    settings.trace_sample_rate = 1.0
+    settings.trace_file = str(path)
+    runner = ConversationRunner()
+    runner.session.middleware(TelegramSpanMiddleware())
+    tracing = next(m for m in runner.dp.update.outer_middleware if isinstance(m, TracingMiddleware))
+
+    runner.session.delay = API_DELAY
+    await runner.run(ALL_LIGHTING)
+    runner.session.delay = 0
+    tracing.exporter.close()
+    errors = check_traces(path, len(ALL_LIGHTING))
+
+    await time_updates(runner, tracing)
+    tracing.exporter.close()
+    return errors
+
+
+def main() -> int:
+    """Прогоняет проверки и печатает отчёт."""
+    errors = asyncio.run(run())
+    for error in errors:
+        print(f"[FAIL] {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""Просмотр трейсов из JSONL: самые долгие апдейты деревом спанов.
+
+Для каждого спана печатается полная длительность и собственное время
+(без дочерних спанов) — видно, куда ушла задержка: хранилище FSM, расчёт,
+шаблоны, ожидание лимитов или сам запрос к Bot API.
+
+Запуск: ``python -m scripts.trace_view [файл] [--name process_wall_finish] [--top N]``.
+Без файла читается TRACE_FILE вместе с ротированными копиями.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+Span = dict[str, Any]
+
+
+def load_traces(path: Path) -> list[list[Span]]:
+    """Трейсы из файла и его ротированных копий (path.1, path.2, ...)."""
+    files = sorted(path.parent.glob(f"{path.name}.*"), reverse=True) + [path]
+    traces = []
+    for file in files:
+        if not file.exists():
+            continue
+        for line in file.read_text(encoding="utf-8").splitlines():
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    traces.append(scope["spans"])
+    return traces
+
+
+def duration_ms(item: Span) -> float:
+    """Длительность спана, мс."""
+    return (int(item["endTimeUnixNano"]) - int(item["startTimeUnixNano"])) / 1e6
+
+
+def render_tree(spans: list[Span]) -> str:
+    """Дерево спанов трейса с полной и собственной длительностью."""
+    children: dict[str, list[Span]] = {}
+    for item in spans:
+        children.setdefault(item["parentSpanId"], []).append(item)
+    for group in children.values():
+        group.sort(key=lambda item: int(item["startTimeUnixNano"]))
+
+    lines: list[str] = []
+
+    def walk(item: Span, depth: int) -> None:
+        nested = children.get(item["spanId"], [])
+        own = duration_ms(item) - sum(duration_ms(child) for child in nested)
+        status = "  ОШИБКА" if item.get("status") else ""
+        name = "  " * depth + item["name"]
+        lines.append(f"{name:<56} {duration_ms(item):9.2f} мс  своё {own:8.2f} мс{status}")
+        for child in nested:
+            walk(child, depth + 1)
+
+    for root in children.get("", []):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Печатает самые долгие трейсы, содержащие спан с заданным именем."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="?", default=settings.trace_file)
+    parser.add_argument("--name", default="", help="Часть имени спана, например process_wall")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    traces = [
+        spans
+        for spans in load_traces(Path(args.path))
+        if any(args.name in item["name"] for item in spans)
+    ]
+    traces.sort(key=lambda spans: max(duration_ms(item) for item in spans), reverse=True)
+    print(f"Трейсов: {len(traces)}")
+    for spans in traces[: args.top]:
+        print(f"\ntrace {spans[0]['traceId']}")
+        print(render_tree(spans))
+
+
+if __name__ == "__main__":
+    main()